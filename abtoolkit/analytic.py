@@ -0,0 +1,79 @@
+"""
+Closed-form alpha, power and p-value distribution of stattests with t or normal test statistic
+"""
+
+from typing import Literal
+
+import numpy as np
+from scipy import special
+
+
+def _null_statistic_cdf(x: np.ndarray, df: float) -> np.ndarray:
+    """
+    CDF of test statistic under null hypothesis: t with df degrees of freedom or standard normal if df is None
+    """
+    return special.ndtr(x) if df is None else special.stdtr(df, x)
+
+
+def _null_statistic_ppf(q: np.ndarray, df: float) -> np.ndarray:
+    """
+    Quantiles of test statistic under null hypothesis (see `_null_statistic_cdf`)
+    """
+    return special.ndtri(q) if df is None else special.stdtrit(df, q)
+
+
+def _statistic_cdf(x: np.ndarray, df: float, loc: float, scale: float) -> np.ndarray:
+    """
+    CDF of test statistic: noncentral t (noncentrality `loc`) or normal if df is None
+    """
+    if df is None:
+        return special.ndtr((x - loc) / scale)
+    return special.nctdtr(df, loc, x)
+
+
+def _analytic_rejection_probability(
+    df: float, loc: float, scale: float, alpha: float, alternative: Literal["less", "greater", "two-sided"]
+) -> float:
+    """
+    Probability of p-value lower than alpha, when test statistic has given distribution and p-value is calculated
+    under central distribution (t with df degrees of freedom or standard normal), statistic is
+    (control - treatment) / se as in stattests, so "less" is rejected by low statistic values
+    :param df: degrees of freedom of t-distribution, None for normal distribution
+    :param loc: noncentrality of t-distribution or mean of normal distribution
+    :param scale: std of normal distribution (not used for t-distribution)
+    :param alpha: alpha-level
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided")
+    :return: probability of rejection (alpha for AA test, power for AB test)
+    """
+    if alternative == "less":
+        return _statistic_cdf(_null_statistic_ppf(alpha, df), df, loc, scale)
+    if alternative == "greater":
+        return 1 - _statistic_cdf(_null_statistic_ppf(1 - alpha, df), df, loc, scale)
+    if alternative == "two-sided":
+        low = _statistic_cdf(_null_statistic_ppf(alpha / 2, df), df, loc, scale)
+        return low + 1 - _statistic_cdf(_null_statistic_ppf(1 - alpha / 2, df), df, loc, scale)
+    raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
+
+
+def _analytic_pvalues(
+    df: float, loc: float, scale: float, alternative: Literal["less", "greater", "two-sided"], size: int
+) -> np.ndarray:
+    """
+    Synthetic p-values: p-values of evenly spaced quantiles of test statistic distribution
+    (see `_analytic_rejection_probability`), so their empirical CDF is the analytic p-value distribution
+    :param df: degrees of freedom of t-distribution, None for normal distribution
+    :param loc: noncentrality of t-distribution or mean of normal distribution
+    :param scale: std of normal distribution (not used for t-distribution)
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided")
+    :param size: number of p-values
+    :return: array of p-values
+    """
+    quantiles = (np.arange(size) + 0.5) / max(size, 1)
+    statistic = loc + scale * special.ndtri(quantiles) if df is None else special.nctdtrit(df, loc, quantiles)
+    if alternative == "less":
+        return _null_statistic_cdf(statistic, df)
+    if alternative == "greater":
+        return _null_statistic_cdf(-statistic, df)
+    if alternative == "two-sided":
+        return _null_statistic_cdf(-np.abs(statistic), df) * 2
+    raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
@@ -0,0 +1,110 @@
+"""
+Bootstrap of metrics distributions
+"""
+
+from typing import Callable, List, Union
+
+import numpy as np
+import pandas as pd
+
+from abtoolkit.progress import progress_bar
+from abtoolkit.variables import ValueCountsVariable
+from abtoolkit.variables import ZeroInflatedVariable
+
+# Metrics which reduce samples along given axis, so block of resamples is reduced by one call
+_AXIS_METRICS = {
+    np.mean,
+    np.median,
+    np.percentile,
+    np.quantile,
+    np.std,
+    np.var,
+    np.sum,
+    np.min,
+    np.max,
+    np.nanmean,
+    np.nanmedian,
+    np.nanpercentile,
+    np.nanquantile,
+}
+
+
+def _draw_resamples(variable, shape: tuple, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw resamples of variable with replacement
+    :param variable: numpy array or compressed variable
+    :param shape: (number of resamples, resample size)
+    :param rng: random generator
+    :return: array with given shape
+    """
+    if isinstance(variable, ZeroInflatedVariable):
+        return variable.sample(shape, rng)[0]
+    if isinstance(variable, ValueCountsVariable):
+        return variable.sample(shape, rng)
+    return variable[rng.integers(0, len(variable), size=shape)]
+
+
+def _get_resample_bytes(variable, sample_size: int, moments_mean: bool) -> int:
+    """
+    Approximate memory taken by one resample while metric is calculated
+    :param variable: numpy array or compressed variable
+    :param sample_size: size of resample
+    :param moments_mean: mean is calculated from moments of compressed variable
+    :return: number of bytes
+    """
+    if moments_mean and isinstance(variable, ValueCountsVariable):
+        # Counts of distinct values and their products with values
+        return 16 * len(variable.values)
+    if moments_mean:
+        # Indices, values and squares of sampled stored rows only
+        return max(int(24 * sample_size * variable.nonzero_probability), 24)
+    # Indices and values of resample
+    return 16 * sample_size
+
+
+def bootstrap(
+    variable: Union[np.ndarray, pd.Series, List, ValueCountsVariable, ZeroInflatedVariable],
+    sample_size: int,
+    experiments_num: int,
+    metric_f: Callable[[np.ndarray, any], float] = np.mean,
+    memory_budget_mb: float = 256,
+    random_state: Union[int, np.random.Generator] = None,
+    disable_progress_bar: bool = True,
+    **metric_f_kwargs,
+) -> np.ndarray:
+    """
+    Bootstrap distribution of metric: takes `experiments_num` resamples of `sample_size` objects with replacement
+    and calculates metric on each of them. Resamples are drawn by blocks limited by `memory_budget_mb`.
+    Metrics reducing along axis (np.mean, np.median, np.percentile, np.quantile, ...) are calculated for whole block
+    at once, mean of compressed variables is calculated without drawing of resamples
+    :param variable: array-like or compressed variable
+    :param sample_size: size of each resample
+    :param experiments_num: number of resamples
+    :param metric_f: function to take from resample. Additional args could be given using metric_kwargs parameter
+    :param memory_budget_mb: memory limit for one block of resamples, megabytes
+    :param random_state: seed or random generator
+    :param disable_progress_bar: disable progress bar over blocks
+    :return: array of metric values with length experiments_num
+    """
+    rng = random_state if isinstance(random_state, np.random.Generator) else np.random.default_rng(random_state)
+    if not isinstance(variable, (ValueCountsVariable, ZeroInflatedVariable)):
+        variable = np.asarray(variable)
+    moments_mean = metric_f is np.mean and isinstance(variable, (ValueCountsVariable, ZeroInflatedVariable))
+
+    resample_bytes = _get_resample_bytes(variable, sample_size, moments_mean)
+    block_size = int(np.clip(memory_budget_mb * 1024**2 // resample_bytes, 1, max(experiments_num, 1)))
+
+    result = np.empty(experiments_num)
+    for start in progress_bar(range(0, experiments_num, block_size), disable=disable_progress_bar):
+        block = slice(start, min(start + block_size, experiments_num))
+        block_experiments_num = block.stop - block.start
+        if moments_mean:
+            result[block] = variable.sample_moments(sample_size, block_experiments_num, rng)[0]
+            continue
+
+        resamples = _draw_resamples(variable, (block_experiments_num, sample_size), rng)
+        if metric_f in _AXIS_METRICS:
+            result[block] = metric_f(resamples, axis=-1, **metric_f_kwargs)
+        else:
+            result[block] = [metric_f(resample, **metric_f_kwargs) for resample in resamples]
+    return result
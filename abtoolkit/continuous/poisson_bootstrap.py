@@ -0,0 +1,293 @@
+"""
+Poisson bootstrap of arbitrary metrics for data which doesn't fit into memory.
+Each row gets independent Poisson(1) weight in each replicate, so replicates are accumulated in a single pass over
+chunks of data and partial results of chunks are merged by summation
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Literal, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+PoissonBootstrapMetric = Literal["mean", "ratio", "quantile", "trimmed_mean"]
+
+# Metrics calculated from weighted histogram, bins edges should be fixed before the pass over data
+_HISTOGRAM_METRICS = ("quantile", "trimmed_mean")
+
+
+class PoissonBootstrapSummary:
+    """
+    Poisson bootstrap replicates of one group of experiment. Replicates keep weighted sums which metric is
+    calculated from:
+    * mean - weighted sum of values and sum of weights;
+    * ratio - weighted sums of numerator and denominator (ratio of sums, as CTR or revenue per order);
+    * quantile, trimmed_mean - weighted histogram (weights and weighted values sums in bins), values out of bins
+    are put into the first or the last bin. Metrics are interpolated inside bins, so precision depends on bins width
+    """
+
+    def __init__(
+        self,
+        metric: PoissonBootstrapMetric,
+        sums: np.ndarray,
+        bins: np.ndarray = None,
+        q: float = 0.5,
+        trim: float = 0.1,
+    ):
+        """
+        Replicates of group
+        :param metric: metric to bootstrap ("mean", "ratio", "quantile" or "trimmed_mean")
+        :param sums: weighted sums of replicates with shape (replicates_num, 2) for mean and ratio
+        and (replicates_num, 2, bins_num) for histogram metrics
+        :param bins: histogram bins edges for quantile and trimmed_mean
+        :param q: quantile for "quantile" metric
+        :param trim: proportion of values cut off from each side for "trimmed_mean" metric
+        """
+        if metric not in ("mean", "ratio") + _HISTOGRAM_METRICS:
+            raise ValueError("metric must be 'mean', 'ratio', 'quantile' or 'trimmed_mean'")
+        if (metric in _HISTOGRAM_METRICS) and (bins is None):
+            raise ValueError(f"bins should be given for {metric} metric")
+        if not 0 <= trim < 0.5:
+            raise ValueError("trim must be in [0, 0.5)")
+
+        self.metric = metric
+        self.sums = np.asarray(sums, dtype=np.float64)
+        self.bins = None if bins is None else np.asarray(bins, dtype=np.float64)
+        self.q = q
+        self.trim = trim
+
+    @property
+    def replicates_num(self) -> int:
+        """
+        Number of bootstrap replicates
+        """
+        return self.sums.shape[0]
+
+    @classmethod
+    def _empty(
+        cls, metric: PoissonBootstrapMetric, replicates_num: int, bins: np.ndarray, q: float, trim: float
+    ) -> "PoissonBootstrapSummary":
+        """
+        Replicates of empty group
+        """
+        shape = (
+            (replicates_num, 2)
+            if metric not in _HISTOGRAM_METRICS or bins is None
+            else (replicates_num, 2, len(bins) - 1)
+        )
+        return cls(metric, np.zeros(shape), bins, q, trim)
+
+    @classmethod
+    def from_array(
+        cls,
+        value: Union[np.ndarray, pd.Series],
+        denominator: Union[np.ndarray, pd.Series] = None,
+        metric: PoissonBootstrapMetric = "mean",
+        replicates_num: int = 1000,
+        bins: np.ndarray = None,
+        q: float = 0.5,
+        trim: float = 0.1,
+        memory_budget_mb: float = 256,
+        random_state: Union[int, np.random.SeedSequence, np.random.Generator] = None,
+    ) -> "PoissonBootstrapSummary":
+        """
+        Build replicates from raw values. Weights are generated by blocks of rows limited by `memory_budget_mb`.
+        Chunks processed in parallel should get different random states (see `numpy.random.SeedSequence.spawn`)
+        :param value: values of variable (numerator for ratio metric)
+        :param denominator: values of ratio denominator, aligned with values
+        :param metric: metric to bootstrap ("mean", "ratio", "quantile" or "trimmed_mean")
+        :param replicates_num: number of bootstrap replicates
+        :param bins: histogram bins edges for quantile and trimmed_mean
+        :param q: quantile for "quantile" metric
+        :param trim: proportion of values cut off from each side for "trimmed_mean" metric
+        :param memory_budget_mb: memory limit for weights of one block of rows, megabytes
+        :param random_state: seed, seed sequence or random generator of weights
+        :return: replicates
+        """
+        summary = cls._empty(metric, replicates_num, bins, q, trim)
+        if (metric == "ratio") != (denominator is not None):
+            raise ValueError("denominator should be given for ratio metric only")
+
+        value = np.asarray(value, dtype=np.float64)
+        second = np.ones_like(value) if denominator is None else np.asarray(denominator, dtype=np.float64)
+        if second.shape != value.shape:
+            raise ValueError("value and denominator should have the same length")
+
+        rng = random_state if isinstance(random_state, np.random.Generator) else np.random.default_rng(random_state)
+        block_size = max(int(memory_budget_mb * 1024**2 // (replicates_num * 8 * 2)), 1)
+        for start in range(0, len(value), block_size):
+            block = slice(start, start + block_size)
+            summary.sums += summary._get_block_sums(value[block], second[block], rng)
+        return summary
+
+    def _get_block_sums(self, value: np.ndarray, second: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Weighted sums of replicates over block of rows
+        :param value: values of block
+        :param second: denominator values of block (ones for metrics without denominator)
+        :param rng: random generator
+        :return: sums with the same shape as `self.sums`
+        """
+        weights = rng.poisson(1.0, size=(self.replicates_num, len(value))).astype(np.float64)
+        if self.metric not in _HISTOGRAM_METRICS:
+            return np.stack([weights @ value, weights @ second], axis=1)
+
+        # Rows are sorted by bins, so weights of each bin are summed by one reduce over contiguous columns
+        bins_num = len(self.bins) - 1
+        bin_index = np.clip(np.searchsorted(self.bins, value, side="right") - 1, 0, bins_num - 1)
+        order = np.argsort(bin_index, kind="stable")
+        bin_index, value, weights = bin_index[order], value[order], weights[:, order]
+        filled_bins, starts = np.unique(bin_index, return_index=True)
+
+        sums = np.zeros((self.replicates_num, 2, bins_num))
+        sums[:, 0, filled_bins] = np.add.reduceat(weights, starts, axis=1)
+        sums[:, 1, filled_bins] = np.add.reduceat(weights * value, starts, axis=1)
+        return sums
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: Iterable[
+            Union[np.ndarray, pd.Series, Tuple[Union[np.ndarray, pd.Series], Union[np.ndarray, pd.Series]]]
+        ],
+        metric: PoissonBootstrapMetric = "mean",
+        replicates_num: int = 1000,
+        bins: np.ndarray = None,
+        q: float = 0.5,
+        trim: float = 0.1,
+        memory_budget_mb: float = 256,
+        random_state: int = None,
+        n_jobs: int = 1,
+    ) -> "PoissonBootstrapSummary":
+        """
+        Build replicates in one pass over chunks of data. Each chunk gets its own child seed, so the result doesn't
+        depend on n_jobs
+        :param chunks: iterable of values chunks or of (numerator, denominator) chunks pairs for ratio metric
+        :param metric: metric to bootstrap ("mean", "ratio", "quantile" or "trimmed_mean")
+        :param replicates_num: number of bootstrap replicates
+        :param bins: histogram bins edges for quantile and trimmed_mean
+        :param q: quantile for "quantile" metric
+        :param trim: proportion of values cut off from each side for "trimmed_mean" metric
+        :param memory_budget_mb: memory limit for weights of one block of rows in each worker, megabytes
+        :param random_state: seed of weights
+        :param n_jobs: number of processes summarizing chunks
+        :return: replicates
+        """
+        seed_sequence = np.random.SeedSequence(random_state)
+        params = {
+            "metric": metric,
+            "replicates_num": replicates_num,
+            "bins": bins,
+            "q": q,
+            "trim": trim,
+            "memory_budget_mb": memory_budget_mb,
+        }
+        summary = cls._empty(metric, replicates_num, bins, q, trim)
+
+        def _get_tasks():
+            for chunk in chunks:
+                chunk = chunk if isinstance(chunk, tuple) else (chunk,)
+                yield chunk, seed_sequence.spawn(1)[0]
+
+        if n_jobs == 1:
+            for chunk, seed in _get_tasks():
+                summary = summary.merge(cls.from_array(*chunk, random_state=seed, **params))
+            return summary
+
+        with ProcessPoolExecutor(n_jobs) as executor:
+            # Number of chunks in flight is bounded, so chunks are read lazily
+            futures = []
+            for chunk, seed in _get_tasks():
+                futures.append(executor.submit(cls.from_array, *chunk, random_state=seed, **params))
+                if len(futures) >= 2 * n_jobs:
+                    summary = summary.merge(futures.pop(0).result())
+            for future in futures:
+                summary = summary.merge(future.result())
+        return summary
+
+    def merge(self, other: "PoissonBootstrapSummary") -> "PoissonBootstrapSummary":
+        """
+        Replicates of union of two parts of group
+        :param other: replicates of another part of group, built with the same parameters
+        :return: merged replicates
+        """
+        if (self.metric, self.q, self.trim) != (other.metric, other.q, other.trim) or (
+            self.sums.shape != other.sums.shape
+        ):
+            raise ValueError("Only replicates with the same metric and number of replicates could be merged")
+        if (self.bins is not None) and not np.array_equal(self.bins, other.bins):
+            raise ValueError("Only replicates with the same bins could be merged")
+        return PoissonBootstrapSummary(self.metric, self.sums + other.sums, self.bins, self.q, self.trim)
+
+    def __add__(self, other: "PoissonBootstrapSummary") -> "PoissonBootstrapSummary":
+        return self.merge(other)
+
+    def get_metric_values(self) -> np.ndarray:
+        """
+        Metric values of replicates
+        :return: array with length replicates_num
+        """
+        if self.metric in ("mean", "ratio"):
+            return self.sums[:, 0] / self.sums[:, 1]
+
+        weights, values_sums = self.sums[:, 0], self.sums[:, 1]
+        cumulative_weights = np.cumsum(weights, axis=1)
+        previous_weights = cumulative_weights - weights
+        total = cumulative_weights[:, -1:]
+
+        if self.metric == "quantile":
+            target = self.q * total
+            bin_index = np.minimum((cumulative_weights < target).sum(axis=1), weights.shape[1] - 1)
+            rows = np.arange(len(bin_index))
+            bin_weight = weights[rows, bin_index]
+            share = np.divide(
+                target[:, 0] - previous_weights[rows, bin_index],
+                bin_weight,
+                out=np.zeros_like(bin_weight),
+                where=bin_weight > 0,
+            )
+            return self.bins[bin_index] + np.clip(share, 0, 1) * np.diff(self.bins)[bin_index]
+
+        # Trimmed mean: bins are taken with share of their weights lying between lower and upper quantiles
+        lower, upper = self.trim * total, (1 - self.trim) * total
+        taken_weights = np.clip(np.minimum(cumulative_weights, upper) - np.maximum(previous_weights, lower), 0, None)
+        share = np.divide(taken_weights, weights, out=np.zeros_like(weights), where=weights > 0)
+        return (share * values_sums).sum(axis=1) / (upper - lower)[:, 0]
+
+    def __repr__(self) -> str:
+        return f"PoissonBootstrapSummary(metric={self.metric!r}, replicates_num={self.replicates_num})"
+
+
+def poisson_bootstrap_test(
+    control: PoissonBootstrapSummary,
+    treatment: PoissonBootstrapSummary,
+    alternative: Literal["less", "greater", "two-sided"],
+    alpha: float = 0.05,
+) -> Tuple[float, Tuple[float, float]]:
+    """
+    Compares metric between groups by bootstrap distribution of difference (treatment - control).
+    Groups should be summarized with different random states
+    :param control: replicates of control sample
+    :param treatment: replicates of treated sample
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    * 'two-sided' : metrics are equal;
+    * 'less': the metric of the control sample is less than the metric of the treated sample;
+    * 'greater': the metric of the control sample is greater than the metric of the treated sample;
+    :param alpha: alpha-level of confidence interval
+    :return: p-value, confidence interval of difference (low value, high value)
+    """
+    if control.metric != treatment.metric or control.replicates_num != treatment.replicates_num:
+        raise ValueError("Groups should be summarized with the same metric and number of replicates")
+
+    difference = treatment.get_metric_values() - control.get_metric_values()
+    less_p_value = np.mean(difference <= 0)
+    greater_p_value = np.mean(difference >= 0)
+
+    if alternative == "less":
+        return less_p_value, (np.quantile(difference, alpha), np.inf)
+    if alternative == "greater":
+        return greater_p_value, (-np.inf, np.quantile(difference, 1 - alpha))
+    if alternative == "two-sided":
+        p_value = min(2 * min(less_p_value, greater_p_value), 1.0)
+        return p_value, tuple(np.quantile(difference, [alpha / 2, 1 - alpha / 2]))
+    raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
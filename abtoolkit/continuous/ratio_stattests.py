@@ -0,0 +1,182 @@
+"""
+Stat tests for ratio metrics (revenue per session, CTR) with delta method variance
+"""
+
+from typing import List, Literal, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from abtoolkit.continuous.stattests import _covariant_moments
+from abtoolkit.continuous.summary import MomentSummary
+
+
+def _delta_method_ratio(
+    n: int,
+    my: Union[float, np.ndarray],
+    mx: Union[float, np.ndarray],
+    vy: Union[float, np.ndarray],
+    vx: Union[float, np.ndarray],
+    cxy: Union[float, np.ndarray],
+) -> Tuple[Union[float, np.ndarray], Union[float, np.ndarray]]:
+    """
+    Ratio of numerator (y) and denominator (x) means of group and its variance estimated by delta method
+    :param n: sample size
+    :param my: numerator mean
+    :param mx: denominator mean
+    :param vy: numerator variance (ddof=1)
+    :param vx: denominator variance (ddof=1)
+    :param cxy: covariance between numerator and denominator (ddof=1)
+    :return: ratio, variance of ratio
+    """
+    ratio = my / mx
+    return ratio, (vy - 2 * ratio * cxy + ratio**2 * vx) / (n * mx**2)
+
+
+def _ratio_ttest_p_value(
+    n1: int,
+    my1: Union[float, np.ndarray],
+    mx1: Union[float, np.ndarray],
+    vy1: Union[float, np.ndarray],
+    vx1: Union[float, np.ndarray],
+    cxy1: Union[float, np.ndarray],
+    n2: int,
+    my2: Union[float, np.ndarray],
+    mx2: Union[float, np.ndarray],
+    vy2: Union[float, np.ndarray],
+    vx2: Union[float, np.ndarray],
+    cxy2: Union[float, np.ndarray],
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shift: float = 0,
+) -> Union[float, np.ndarray]:
+    """
+    Ratio t-test p-value from groups moments of numerator (y) and denominator (x) with ddof=1.
+    Variance of ratio of means is estimated by delta method, difference of ratios is compared
+    with t-distribution with n1 + n2 - 2 degrees of freedom (as in `_ttest_p_value`)
+    :param n1: control sample size
+    :param my1: control numerator mean
+    :param mx1: control denominator mean
+    :param vy1: control numerator variance
+    :param vx1: control denominator variance
+    :param cxy1: control covariance between numerator and denominator
+    :param n2: treatment sample size
+    :param my2: treatment numerator mean
+    :param mx2: treatment denominator mean
+    :param vy2: treatment numerator variance
+    :param vx2: treatment denominator variance
+    :param cxy2: treatment covariance between numerator and denominator
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shift: value to add to treatment ratio (as if treatment numerator was increased by
+    shift * denominator), delta method variance doesn't change with it
+    :return: p-value
+    """
+    df = n1 + n2 - 2
+    if df < 1:
+        raise ValueError(f"df = {df}, too few samples in dataset")
+
+    r1, rv1 = _delta_method_ratio(n1, my1, mx1, vy1, vx1, cxy1)
+    r2, rv2 = _delta_method_ratio(n2, my2, mx2, vy2, vx2, cxy2)
+    t = (r1 - r2 - treatment_shift) / np.sqrt(rv1 + rv2)
+
+    if alternative == "less":
+        return special.stdtr(df, t)
+    if alternative == "greater":
+        return special.stdtr(df, -t)
+    if alternative == "two-sided":
+        return special.stdtr(df, -np.abs(t)) * 2
+    raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
+
+
+def _ratio_ttest_ndarray(
+    control_numerator: np.ndarray,
+    control_denominator: np.ndarray,
+    treatment_numerator: np.ndarray,
+    treatment_denominator: np.ndarray,
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> Union[float, np.ndarray]:
+    """
+    Ratio t-test for numpy arrays, reduced along the last axis (see `_ttest_ndarray`)
+    :param control_numerator: np.ndarray, control samples of numerator
+    :param control_denominator: np.ndarray, control samples of denominator
+    :param treatment_numerator: np.ndarray, treated samples of numerator
+    :param treatment_denominator: np.ndarray, treated samples of denominator
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: values to add to treatment ratio, if given then array of p-values
+    with shape (len(treatment_shifts), ...) is returned
+    :return: p-value or array of p-values
+    """
+    control_moments = _covariant_moments(control_numerator, control_denominator)
+    treatment_moments = _covariant_moments(treatment_numerator, treatment_denominator)
+    if treatment_shifts is None:
+        return _ratio_ttest_p_value(*control_moments, *treatment_moments, alternative)
+    return np.array(
+        [_ratio_ttest_p_value(*control_moments, *treatment_moments, alternative, shift) for shift in treatment_shifts]
+    )
+
+
+def ratio_ttest(
+    control_numerator: Union[pd.Series, np.ndarray],
+    control_denominator: Union[pd.Series, np.ndarray],
+    treatment_numerator: Union[pd.Series, np.ndarray],
+    treatment_denominator: Union[pd.Series, np.ndarray],
+    alternative: Literal["less", "greater", "two-sided"],
+) -> float:
+    """
+    Estimation treatment effect on ratio metric (revenue per session, CTR) using delta method:
+    ratio of numerator and denominator means is compared between groups by t-test, its variance is estimated
+    by linearization. Rows are units of randomization (users), numerator and denominator are their totals
+    :param control_numerator: pd.Series (or np.ndarray), control sample of numerator
+    :param control_denominator: pd.Series (or np.ndarray), control sample of denominator
+    :param treatment_numerator: pd.Series (or np.ndarray), treated sample of numerator
+    :param treatment_denominator: pd.Series (or np.ndarray), treated sample of denominator
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    * 'two-sided' : ratios are equal;
+    * 'less': the ratio of the control sample is less than the ratio of the treated sample;
+    * 'greater': the ratio of the control sample is greater than the ratio of the treated sample;
+    :return: p-value
+    """
+    return float(
+        _ratio_ttest_ndarray(
+            *(
+                np.asarray(v, dtype=np.float64)
+                for v in (control_numerator, control_denominator, treatment_numerator, treatment_denominator)
+            ),
+            alternative,
+        )
+    )
+
+
+def ratio_ttest_from_summary(
+    control: MomentSummary,
+    treatment: MomentSummary,
+    alternative: Literal["less", "greater", "two-sided"],
+) -> float:
+    """
+    Ratio t-test on sufficient statistics of groups, gives the same p-value as `ratio_ttest` on raw samples
+    :param control: summary of control sample numerator with denominator as covariant
+    :param treatment: summary of treated sample numerator with denominator as covariant
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    * 'two-sided' : ratios are equal;
+    * 'less': the ratio of the control sample is less than the ratio of the treated sample;
+    * 'greater': the ratio of the control sample is greater than the ratio of the treated sample;
+    :return: p-value
+    """
+    return float(
+        _ratio_ttest_p_value(
+            control.n,
+            control.mean,
+            control.covariant_mean,
+            control.variance,
+            control.covariant_variance,
+            control.covariance,
+            treatment.n,
+            treatment.mean,
+            treatment.covariant_mean,
+            treatment.variance,
+            treatment.covariant_variance,
+            treatment.covariance,
+            alternative,
+        )
+    )
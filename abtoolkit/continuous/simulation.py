@@ -2,18 +2,115 @@
 Simulates AA and AB tests to estimate test power and alpha
 """
 
-from typing import List, Literal
+import mmap
+import os
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Literal, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
+from abtoolkit.continuous.ratio_stattests import _ratio_ttest_ndarray
+from abtoolkit.continuous.ratio_stattests import ratio_ttest
+from abtoolkit.continuous.stattests import _additional_vars_regression_test_ndarray
+from abtoolkit.continuous.stattests import _cuped_ttest_ndarray
+from abtoolkit.continuous.stattests import _cuped_ttest_p_value
+from abtoolkit.continuous.stattests import _did_regression_test_ndarray
+from abtoolkit.continuous.stattests import _difference_ttest_ndarray
+from abtoolkit.continuous.stattests import _regression_test_ndarray
+from abtoolkit.continuous.stattests import _ttest_ndarray
+from abtoolkit.continuous.stattests import _ttest_p_value
 from abtoolkit.continuous.stattests import additional_vars_regression_test
 from abtoolkit.continuous.stattests import cuped_ttest
 from abtoolkit.continuous.stattests import difference_ttest
 from abtoolkit.continuous.stattests import did_regression_test
 from abtoolkit.continuous.stattests import regression_test
 from abtoolkit.continuous.stattests import ttest
+from abtoolkit.continuous.summary import MomentSummary
 from abtoolkit.utils import BaseSimulationClass
+from abtoolkit.variables import ValueCountsVariable
+from abtoolkit.variables import ZeroInflatedVariable
+
+# Variable given to simulation: pd.Series, numpy array (np.memmap as well), path to .npy file, pyarrow array
+# or compressed variable
+VariableType = Union[pd.Series, np.ndarray, str, os.PathLike, ValueCountsVariable, ZeroInflatedVariable, Any]
+
+
+class _ChunkedColumn:
+    """
+    Column of chunked pyarrow array: chunks are viewed as numpy arrays without copying, sampled rows are gathered
+    from chunks they belong to
+    """
+
+    def __init__(self, chunks: List[np.ndarray]):
+        """
+        :param chunks: numpy views of array chunks
+        """
+        self.chunks = chunks
+        self.offsets = np.cumsum([0] + [len(chunk) for chunk in chunks])
+        self.dtype = np.result_type(*chunks)
+        self.shape = (int(self.offsets[-1]),)
+        self.ndim = 1
+        self.nbytes = self.shape[0] * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> np.ndarray:
+        """
+        Gather rows by positions in column
+        :param index: slice or array of positions of any shape
+        :return: array of values with shape of index
+        """
+        if isinstance(index, slice):
+            index = np.arange(*index.indices(len(self)))
+        index = np.asarray(index)
+        flat_index = index.ravel()
+        chunk_id = np.searchsorted(self.offsets, flat_index, side="right") - 1
+        order = np.argsort(chunk_id, kind="stable")
+        bounds = np.searchsorted(chunk_id[order], np.arange(len(self.chunks) + 1))
+        result = np.empty(len(flat_index), dtype=self.dtype)
+        for i, chunk in enumerate(self.chunks):
+            rows = order[bounds[i] : bounds[i + 1]]
+            if len(rows) > 0:
+                result[rows] = chunk[flat_index[rows] - self.offsets[i]]
+        return result.reshape(index.shape)
+
+    def __array__(self, dtype=None, copy=None):  # pylint: disable=unused-argument
+        """
+        Whole column in memory, used to share column with worker processes
+        """
+        return np.concatenate(self.chunks).astype(dtype or self.dtype, copy=False)
+
+
+def _as_column(values: VariableType) -> Union[np.ndarray, _ChunkedColumn]:
+    """
+    Convert variable to 1d numpy column without copying of data where it's possible: .npy files are memory-mapped,
+    numpy arrays are used as is, chunks of pyarrow arrays are viewed as numpy arrays (so values are read only
+    when sampled)
+    :param values: variable given to simulation
+    :return: numpy array or column of pyarrow array chunks
+    """
+    if isinstance(values, (str, os.PathLike)):
+        values = np.load(values, mmap_mode="r")
+    elif isinstance(values, pd.Series):
+        values = values.to_numpy(dtype=np.float64)
+    elif type(values).__module__.startswith("pyarrow"):
+        # pyarrow is optional, arrays are recognised without import
+        if values.null_count > 0:
+            raise ValueError("Variable shouldn't contain nulls, they can't be read without copy, fill them first")
+        chunks = values.chunks if hasattr(values, "num_chunks") else [values]
+        # pyarrow raises ArrowInvalid (subclass of ValueError) for types which can't be viewed without copy
+        chunks = [chunk.to_numpy(zero_copy_only=True) for chunk in chunks if len(chunk) > 0]
+        if len(chunks) == 0:
+            values = np.empty(0, dtype=values.type.to_pandas_dtype())
+        else:
+            values = chunks[0] if len(chunks) == 1 else _ChunkedColumn(chunks)
+
+    values = np.asarray(values) if not isinstance(values, (np.ndarray, _ChunkedColumn)) else values
+    if values.ndim != 1 or values.dtype.kind not in "biuf":
+        raise ValueError(f"Variable should be 1d numeric array, got {values.dtype} array with shape {values.shape}")
+    return values
 
 
 class StatTestsSimulation(BaseSimulationClass):
@@ -23,7 +120,7 @@ class StatTestsSimulation(BaseSimulationClass):
 
     def __init__(
         self,
-        variable: pd.Series,
+        variable: VariableType,
         alternative: Literal["less", "greater", "two-sided"],
         stattests_list: List[str],
         treatment_sample_size: int,
@@ -32,15 +129,31 @@ class StatTestsSimulation(BaseSimulationClass):
         mde: float,
         alpha_level: float = 0.05,
         power: float = 0.8,
-        previous_values: pd.Series = None,
-        cuped_covariant: pd.Series = None,
-        additional_vars: List[pd.Series] = None,
+        previous_values: VariableType = None,
+        cuped_covariant: VariableType = None,
+        additional_vars: List[VariableType] = None,
+        ratio_denominator: VariableType = None,
+        vectorized: bool = False,
+        memory_budget_mb: float = 256,
+        n_jobs: int = 1,
+        executor: Executor = None,
+        random_state: int = None,
+        regression_backend: Literal["numpy", "linearmodels"] = "numpy",
+        common_random_numbers: bool = False,
+        shared_sampling: bool = False,
+        pvalues_dtype: type = np.float64,
+        analytic: bool = False,
+        cross_validate: bool = False,
     ):
         """
         Simulates AA and AB tests for given stat-tests. Prints result (alpha and power) for each test
         and builds plot for p-value distributions.
 
-        :param variable: variable for simulation
+        :param variable: variable for simulation: pd.Series, numpy array (e.g. np.memmap), path to .npy file
+        (memory-mapped) or pyarrow array, mapped and pyarrow data is not copied, only sampled rows are read.
+        Optional variables of the same types are aligned with variable by position (pd.Series by index).
+        Variable could be compressed to `ValueCountsVariable` or `ZeroInflatedVariable` as well, then optional
+        variables are not used (covariant of `ZeroInflatedVariable` serves as previous values and CUPED covariant)
         :param stattests_list: list of stat-tests for estimation
         :param treatment_sample_size: number of examples to sample from variables in each iteration
         :param treatment_split_proportion: proportion of ab split for test group (50/50 -> 0.5, 80/20 -> 0.2, ...)
@@ -54,6 +167,26 @@ class StatTestsSimulation(BaseSimulationClass):
         in cuped test
         :param additional_vars: list of additional variables used to
         reduce variance of main variable and speedup test in 'regression_with_additional_variables' test
+        :param ratio_denominator: denominator of ratio metric for 'ratio_ttest', variable is its numerator
+        (mde is added to ratio)
+        :param vectorized: simulate blocks of experiments at once using numpy (regression tests are vectorized
+        only with 'numpy' regression backend)
+        :param memory_budget_mb: memory limit for one block of experiments in vectorized mode, megabytes
+        :param n_jobs: number of worker processes to split experiments between, variables are passed to workers
+        through shared memory
+        :param executor: executor to run workers in, if None then process pool with `n_jobs` workers is created
+        :param random_state: seed for random generator, each worker gets independent generator spawned from it
+        :param regression_backend: engine for regression tests ('numpy' or 'linearmodels')
+        :param common_random_numbers: use the same samples for AA and AB test in each experiment
+        (AB test gets mde shift), for tests with batch version AB p-value is calculated by update of AA moments
+        :param shared_sampling: draw samples of each experiment once in `run` and use them for all tests with
+        batch version (indices are drawn and variables are gathered once), so tests are compared on identical samples
+        :param pvalues_dtype: dtype of p-values arrays kept in `info` (np.float32 halves memory of long simulations)
+        :param analytic: calculate alpha and power of tests having closed form (ttest, diff_ttest, cuped_ttest,
+        ratio_ttest) by variance and correlations of given variables instead of simulation,
+        other tests are simulated
+        :param cross_validate: simulate analytic tests as well, simulation results are kept in 'simulation' field
+        of test info
         """
         super().__init__(
             treatment_sample_size=treatment_sample_size,
@@ -64,9 +197,20 @@ class StatTestsSimulation(BaseSimulationClass):
             alpha_level=alpha_level,
             stattests_list=stattests_list,
             experiments_num=experiments_num,
+            vectorized=vectorized,
+            n_jobs=n_jobs,
+            executor=executor,
+            random_state=random_state,
+            common_random_numbers=common_random_numbers,
+            shared_sampling=shared_sampling,
+            pvalues_dtype=pvalues_dtype,
+            analytic=analytic,
+            cross_validate=cross_validate,
         )
 
         self.variable = variable
+        self.memory_budget_mb = memory_budget_mb
+        self.regression_backend = regression_backend
         self.stattests_func_map = {
             "ttest": self.simulate_ttest,
             "diff_ttest": self.simulate_difference_ttest,
@@ -74,12 +218,451 @@ class StatTestsSimulation(BaseSimulationClass):
             "regression_test": self.simulate_reg,
             "did_regression_test": self.simulate_reg_did,
             "additional_vars_regression_test": self.simulate_reg_add,
+            "ratio_ttest": self.simulate_ratio_ttest,
+        }
+
+        self.stattests_batch_func_map = {
+            "ttest": self.simulate_ttest_batch,
+            "diff_ttest": self.simulate_difference_ttest_batch,
+            "cuped_ttest": self.simulate_cuped_batch,
+            "ratio_ttest": self.simulate_ratio_ttest_batch,
+        }
+        if regression_backend == "numpy":
+            self.stattests_batch_func_map.update(
+                {
+                    "regression_test": self.simulate_reg_batch,
+                    "did_regression_test": self.simulate_reg_did_batch,
+                    "additional_vars_regression_test": self.simulate_reg_add_batch,
+                }
+            )
+
+        self.stattests_analytic_func_map = {
+            "ttest": self.analytic_ttest,
+            "diff_ttest": self.analytic_difference_ttest,
+            "cuped_ttest": self.analytic_cuped,
+            "ratio_ttest": self.analytic_ratio_ttest,
         }
 
         # Optional
         self.previous_values = previous_values
         self.cuped_covariant = cuped_covariant
         self.additional_vars = additional_vars
+        self.ratio_denominator = ratio_denominator
+
+        # Columnar store: variables aligned with main variable positions once, sampling is done by integer gathers
+        self._variables_names = {
+            "variable": getattr(variable, "name", None),
+            "previous_values": getattr(previous_values, "name", None),
+            "cuped_covariant": getattr(cuped_covariant, "name", None),
+            "additional_vars": None if additional_vars is None else [getattr(v, "name", None) for v in additional_vars],
+            "ratio_denominator": getattr(ratio_denominator, "name", None),
+        }
+        # Compressed variable is sampled by itself, it can't be joined with optional variables
+        self._compressed = variable if isinstance(variable, (ValueCountsVariable, ZeroInflatedVariable)) else None
+        self._arrays = self._build_arrays()
+        self._summaries = {}
+        self._check_tests_variables()
+
+    def _build_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Validate alignment of optional variables with main variable and convert all variables to numpy columns.
+        Optional pd.Series with index different from main variable index are aligned by labels, other variables
+        are aligned by position. Memory-mapped and pyarrow variables are not copied (see `_as_column`)
+        :return: dictionary name -> array with len(self.variable) values
+        """
+        if self._compressed is not None:
+            optional_vars = [self.previous_values, self.cuped_covariant, self.additional_vars, self.ratio_denominator]
+            if any(v is not None for v in optional_vars):
+                raise ValueError("Optional variables are not supported for compressed variable")
+            return {}
+
+        series_by_name = {
+            "variable": self.variable,
+            "previous_values": self.previous_values,
+            "cuped_covariant": self.cuped_covariant,
+            "ratio_denominator": self.ratio_denominator,
+        }
+        for i, series in enumerate(self.additional_vars or []):
+            series_by_name[f"additional_var_{i}"] = series
+
+        arrays = {}
+        for name, series in series_by_name.items():
+            if series is None:
+                continue
+            values = _as_column(series)
+            if (
+                series is not self.variable
+                and isinstance(series, pd.Series)
+                and isinstance(self.variable, pd.Series)
+                and not series.index.equals(self.variable.index)
+            ):
+                if not series.index.is_unique:
+                    raise ValueError(f"'{name}' index should be unique or equal to variable index")
+                positions = series.index.get_indexer(self.variable.index)
+                if (positions < 0).any():
+                    raise ValueError(f"'{name}' index doesn't contain all labels of variable index")
+                values = values[positions]
+            if name != "variable" and len(values) != len(arrays["variable"]):
+                raise ValueError(f"'{name}' should have the same length as variable")
+            arrays[name] = values
+        return arrays
+
+    def _check_tests_variables(self):
+        """
+        Check that optional variables needed by tests from 'self.stattests_list' are given, otherwise test
+        can't be performed in any experiment
+        :return:
+        """
+        if self._compressed is not None:
+            given_names = {"variable"}
+            if isinstance(self._compressed, ZeroInflatedVariable) and self._compressed.has_covariant:
+                given_names.update({"previous_values", "cuped_covariant"})
+        else:
+            given_names = set(self._arrays)
+
+        for test_name in self.stattests_list:
+            if test_name not in self.stattests_func_map:
+                continue
+            if test_name == "additional_vars_regression_test" and not self.additional_vars:
+                raise ValueError(f"'additional_vars' should be given for simulation of {test_name}")
+            for name in self._get_test_arrays_names(test_name):
+                if name not in given_names:
+                    raise ValueError(f"'{name}' should be given for simulation of {test_name}")
+
+    def _get_array(self, name: str) -> np.ndarray:
+        """
+        Get values of variable (or optional variable aligned by index with main variable) as numpy array
+        :param name: attribute name ("variable", "previous_values", "cuped_covariant" or "ratio_denominator")
+        or "additional_var_<i>" for i-th additional variable
+        :return: numpy array with len(self.variable) values
+        """
+        if name not in self._arrays:
+            raise ValueError(f"'{name}' should be given for simulation")
+        return self._arrays[name]
+
+    def _get_mapped_arrays(self) -> Dict[str, Tuple[str, int, tuple, str]]:
+        """
+        Variables memory-mapped from files, workers map the same files instead of copying them to shared memory
+        :return: dictionary name -> (filename, offset, shape, dtype)
+        """
+        return {
+            name: (array.filename, array.offset, array.shape, array.dtype.str)
+            for name, array in self._arrays.items()
+            if isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap) and array.filename is not None
+        }
+
+    def _get_shared_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Variables aligned with main variable positions to share with worker processes
+        :return: dictionary name -> array
+        """
+        mapped_arrays = self._get_mapped_arrays()
+        return {name: array for name, array in self._arrays.items() if name not in mapped_arrays}
+
+    def _set_shared_arrays(self, arrays: Dict[str, np.ndarray]):
+        """
+        Restore columnar store in worker process, that's enough for sampling
+        :param arrays: dictionary name -> array
+        :return: None
+        """
+        self._arrays = dict(arrays)
+        for name, (filename, offset, shape, dtype) in self._mapped_arrays.items():
+            self._arrays[name] = np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+    def _get_worker_state(self) -> dict:
+        """
+        Attributes to pickle and send to worker processes, variables are passed through shared memory
+        or mapped from files
+        :return: dictionary with attributes
+        """
+        state = super()._get_worker_state()
+        for name in [
+            "variable",
+            "previous_values",
+            "cuped_covariant",
+            "additional_vars",
+            "ratio_denominator",
+            "_arrays",
+        ]:
+            state[name] = None
+        state["_mapped_arrays"] = self._get_mapped_arrays()
+        return state
+
+    def _sample_groups(self, names: List[str]) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Sample control and treatment groups for one experiment by integer gathers from columnar store
+        :param names: names of arrays to take samples from (see `_get_array`)
+        :return: lists of control and treatment samples in order of names
+        """
+        if self._compressed is not None:
+            control, treatment = self._sample_compressed(names)
+            for name in names:
+                if name not in control:
+                    raise ValueError(f"'{name}' should be given for simulation")
+            return [control[name] for name in names], [treatment[name] for name in names]
+
+        arrays = [self._get_array(name) for name in names]
+        size = len(arrays[0])
+        control_index = self.rng.integers(0, size, size=self.control_sample_size)
+        treatment_index = self.rng.integers(0, size, size=self.treatment_sample_size)
+        return (
+            [np.asarray(a[control_index], dtype=np.float64) for a in arrays],
+            [np.asarray(a[treatment_index], dtype=np.float64) for a in arrays],
+        )
+
+    def _sample_compressed(
+        self, names: List[str], experiments_num: int = None
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Sample control and treatment groups from compressed variable, names which compressed variable
+        doesn't have are skipped
+        :param names: names of arrays to take samples of (see `_get_array`)
+        :param experiments_num: number of experiments in block, if None then samples of one experiment are drawn
+        :return: dictionaries name -> samples for control and treatment
+        """
+        groups_samples = []
+        for group_size in [self.control_sample_size, self.treatment_sample_size]:
+            size = group_size if experiments_num is None else (experiments_num, group_size)
+            if isinstance(self._compressed, ZeroInflatedVariable):
+                values, covariant = self._compressed.sample(size, self.rng)
+            else:
+                values, covariant = self._compressed.sample(size, self.rng), None
+            samples = {"variable": values}
+            if covariant is not None:
+                samples.update({"previous_values": covariant, "cuped_covariant": covariant})
+            groups_samples.append({name: samples[name] for name in names if name in samples})
+        return groups_samples[0], groups_samples[1]
+
+    def _get_compressed_moments_tests(self) -> set:
+        """
+        Tests which take samples moments from compressed variable directly in vectorized mode
+        :return: set of tests names
+        """
+        if isinstance(self._compressed, ZeroInflatedVariable) and self._compressed.has_covariant:
+            return {"ttest", "diff_ttest", "cuped_ttest"}
+        return {"ttest"}
+
+    def _get_test_arrays_names(self, test_name: str) -> List[str]:
+        """
+        Names of arrays (see `_get_array`) test needs for simulation
+        :param test_name: name of test
+        :return: list of arrays names
+        """
+        if test_name == "additional_vars_regression_test":
+            additional_vars_num = len(self._variables_names["additional_vars"] or [])
+            return ["variable"] + [f"additional_var_{i}" for i in range(additional_vars_num)]
+        return {
+            "ttest": ["variable"],
+            "diff_ttest": ["variable", "previous_values"],
+            "cuped_ttest": ["variable", "cuped_covariant"],
+            "regression_test": ["variable"],
+            "did_regression_test": ["variable", "previous_values"],
+            "ratio_ttest": ["variable", "ratio_denominator"],
+        }[test_name]
+
+    def _sample_batch(
+        self, experiments_num: int, names: List[str]
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Sample control and treatment groups for block of experiments at once. Same index matrix is used
+        for all given arrays, arrays which are not given to simulation are skipped
+        :param experiments_num: number of experiments in block
+        :param names: names of aligned arrays to take samples from (see `_get_array`)
+        :return: dictionaries name -> samples for control and treatment, samples have shape
+        (experiments_num, group_size)
+        """
+        if self._compressed is not None:
+            return self._sample_compressed(names, experiments_num)
+
+        arrays = {}
+        for name in names:
+            try:
+                arrays[name] = self._get_array(name)
+            except ValueError:
+                continue
+
+        size = len(self._get_array("variable"))
+        control_index = self.rng.integers(0, size, size=(experiments_num, self.control_sample_size))
+        treatment_index = self.rng.integers(0, size, size=(experiments_num, self.treatment_sample_size))
+        return (
+            {name: np.asarray(a[control_index], dtype=np.float64) for name, a in arrays.items()},
+            {name: np.asarray(a[treatment_index], dtype=np.float64) for name, a in arrays.items()},
+        )
+
+    def _sample_batch_for_tests(
+        self, test_names: List[str], mdes: List[float], experiments_num: int
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Sample block of experiments once for several tests: indices are drawn once and all arrays needed by tests
+        are gathered by them. Mde is added by tests themselves
+        :param test_names: names of tests to sample data for
+        :param mdes: minimal detectable effects the block is simulated for
+        :param experiments_num: number of experiments in block
+        :return: dictionaries name -> samples for control and treatment (None if tests sample data by themselves)
+        """
+        if self._compressed is not None and set(test_names) <= self._get_compressed_moments_tests():
+            # Tests draw moments of compressed variable by themselves without samples
+            return None
+        names = list(dict.fromkeys(name for test_name in test_names for name in self._get_test_arrays_names(test_name)))
+        return self._sample_batch(experiments_num, names)
+
+    def _sample_nested_batch(
+        self, test_names: List[str], experiments_num: int
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Sample block of experiments for current groups sizes, samples of compressed variables are drawn as well
+        :param test_names: names of tests to sample data for
+        :param experiments_num: number of experiments in block
+        :return: dictionaries name -> samples for control and treatment
+        """
+        names = list(dict.fromkeys(name for test_name in test_names for name in self._get_test_arrays_names(test_name)))
+        return self._sample_batch(experiments_num, names)
+
+    def _get_nested_samples(  # pylint: disable=unused-argument
+        self, samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]], mdes: List[float]
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Prefixes of samples with current groups sizes, mde is added by tests themselves
+        :param samples: control and treatment samples given by `_sample_nested_batch`
+        :param mdes: minimal detectable effects, to sum with test variable
+        :return: dictionaries name -> samples for control and treatment
+        """
+        control, treatment = samples
+        return (
+            {name: sample[:, : self.control_sample_size] for name, sample in control.items()},
+            {name: sample[:, : self.treatment_sample_size] for name, sample in treatment.items()},
+        )
+
+    def _get_batch_samples(
+        self,
+        test_name: str,
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Samples of arrays needed by test, sampled if not given
+        :param test_name: name of test
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples given by `_sample_batch_for_tests`
+        :return: list of control samples and list of treatment samples in order of `_get_test_arrays_names`
+        """
+        names = self._get_test_arrays_names(test_name)
+        control, treatment = self._sample_batch(experiments_num, names) if samples is None else samples
+        for name in names:
+            if name not in control:
+                raise ValueError(f"'{name}' should be given for simulation")
+        return [control[name] for name in names], [treatment[name] for name in names]
+
+    def _get_batch_size(self, test_name: str) -> int:
+        """
+        Number of experiments simulated at once in vectorized mode, limited by `memory_budget_mb`.
+        Memory of experiment is estimated as number of arrays with length of both groups it keeps at once
+        (index, gathered samples, design matrices and temporaries)
+        :param test_name: name of test for simulation
+        :return: batch size
+        """
+        additional_vars_num = len(self._variables_names["additional_vars"] or [])
+        arrays_num = {
+            "ttest": 3,
+            "diff_ttest": 5,
+            "cuped_ttest": 7,
+            "ratio_ttest": 7,
+            "regression_test": 4,
+            "did_regression_test": 8,
+            "additional_vars_regression_test": 3 * additional_vars_num + 8,
+        }.get(test_name, 8)
+        experiment_bytes = (self.control_sample_size + self.treatment_sample_size) * 8 * arrays_num
+        batch_size = int(self.memory_budget_mb * 1024**2 // experiment_bytes)
+        return int(np.clip(batch_size, 1, max(self.experiments_num, 1)))
+
+    def _get_summary(self, covariant_name: str = None) -> MomentSummary:
+        """
+        Moments of whole variable (and of optional variable as covariant), calculated once by chunks
+        :param covariant_name: name of array to take as covariant (see `_get_array`)
+        :return: summary of variable
+        """
+        if covariant_name in self._summaries:
+            return self._summaries[covariant_name]
+
+        if self._compressed is None:
+            arrays = [self._get_array(name) for name in ["variable", covariant_name] if name is not None]
+            chunk_size = 2**20
+            summary = MomentSummary.from_chunks(
+                tuple(array[start : start + chunk_size] for array in arrays)
+                for start in range(0, len(arrays[0]), chunk_size)
+            )
+        elif covariant_name is None:
+            n = len(self._compressed)
+            summary = MomentSummary(n, self._compressed.mean(), self._compressed.var() * (n - 1))
+        elif (
+            isinstance(self._compressed, ZeroInflatedVariable)
+            and self._compressed.has_covariant
+            and covariant_name in ["previous_values", "cuped_covariant"]
+        ):
+            summary = self._compressed.summary()
+        else:
+            raise ValueError(f"'{covariant_name}' should be given for simulation")
+
+        self._summaries[covariant_name] = summary
+        return summary
+
+    def _get_t_distribution(self, variance: float, mde: float) -> Tuple[int, float, float]:
+        """
+        Distribution of t-statistic of groups with given variance when treatment is shifted by mde
+        :param variance: variance of tested values
+        :param mde: minimal detectable effect, to sum with test variable
+        :return: degrees of freedom, noncentrality, scale (see `stattests_analytic_func_map`)
+        """
+        if not variance > 0:
+            raise ValueError(f"variance of tested values should be positive, got {variance}")
+        n1, n2 = self.control_sample_size, self.treatment_sample_size
+        se = np.sqrt(variance * (1 / n1 + 1 / n2))
+        return n1 + n2 - 2, -mde / se, 1.0
+
+    def analytic_ttest(self, mde: float) -> Tuple[int, float, float]:
+        """
+        Closed form of ttest
+        :param mde: minimal detectable effect, to sum with test variable
+        :return: distribution of test statistic (see `stattests_analytic_func_map`)
+        """
+        return self._get_t_distribution(self._get_summary().variance, mde)
+
+    def analytic_difference_ttest(self, mde: float) -> Tuple[int, float, float]:
+        """
+        Closed form of difference ttest, variance of difference is var(y) + var(x) - 2 * cov(x, y)
+        :param mde: minimal detectable effect, to sum with test variable
+        :return: distribution of test statistic (see `stattests_analytic_func_map`)
+        """
+        summary = self._get_summary("previous_values")
+        variance = summary.variance + summary.covariant_variance - 2 * summary.covariance
+        return self._get_t_distribution(variance, mde)
+
+    def analytic_cuped(self, mde: float) -> Tuple[int, float, float]:
+        """
+        Closed form of CUPED ttest, variance of CUPED variable is var(y) * (1 - corr(x, y) ** 2)
+        :param mde: minimal detectable effect, to sum with test variable
+        :return: distribution of test statistic (see `stattests_analytic_func_map`)
+        """
+        summary = self._get_summary("cuped_covariant")
+        if not summary.covariant_variance > 0:
+            raise ValueError(f"variance of CUPED covariant should be positive, got {summary.covariant_variance}")
+        variance = summary.variance - summary.covariance**2 / summary.covariant_variance
+        return self._get_t_distribution(variance, mde)
+
+    def analytic_ratio_ttest(self, mde: float) -> Tuple[int, float, float]:
+        """
+        Closed form of ratio ttest, t-statistic with delta method variance of ratio
+        :param mde: minimal detectable effect, to sum with treatment ratio
+        :return: distribution of test statistic (see `stattests_analytic_func_map`)
+        """
+        summary = self._get_summary("ratio_denominator")
+        if summary.covariant_mean == 0:
+            raise ValueError("mean of ratio denominator should be non-zero")
+        ratio = summary.mean / summary.covariant_mean
+        variance = (
+            summary.variance - 2 * ratio * summary.covariance + ratio**2 * summary.covariant_variance
+        ) / summary.covariant_mean**2
+        return self._get_t_distribution(variance, mde)
 
     def simulate_ttest(self, mde: float) -> float:
         """
@@ -87,8 +670,7 @@ class StatTestsSimulation(BaseSimulationClass):
         :param mde: minimal detectable effect, to sum with test variable
         :return: p_value
         """
-        control_sample = self.variable.sample(self.control_sample_size, replace=True)
-        treatment_sample = self.variable.sample(self.treatment_sample_size, replace=True)
+        (control_sample,), (treatment_sample,) = self._sample_groups(["variable"])
         treatment_sample += mde
 
         return ttest(control_sample, treatment_sample, self.alternative)
@@ -99,17 +681,9 @@ class StatTestsSimulation(BaseSimulationClass):
         :param mde: minimal detectable effect, to sum with test variable
         :return: p_value
         """
-        control_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.control_sample_size)
-        ]
-        treatment_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.treatment_sample_size)
-        ]
-
-        control_sample = self.variable.loc[control_index_sample]
-        control_pre_sample = self.previous_values.loc[control_index_sample]
-        treatment_sample = self.variable.loc[treatment_index_sample]
-        treatment_pre_sample = self.previous_values.loc[treatment_index_sample]
+        (control_sample, control_pre_sample), (treatment_sample, treatment_pre_sample) = self._sample_groups(
+            ["variable", "previous_values"]
+        )
         treatment_sample += mde
 
         return difference_ttest(
@@ -126,34 +700,40 @@ class StatTestsSimulation(BaseSimulationClass):
         :param mde: minimal detectable effect, to sum with test variable
         :return: p_value
         """
-        control_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.control_sample_size)
-        ]
-        treatment_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.treatment_sample_size)
-        ]
-
-        control_sample = self.variable.loc[control_index_sample]
-        control_covariant_sample = self.cuped_covariant.loc[control_index_sample]
-        treatment_sample = self.variable.loc[treatment_index_sample]
-        treatment_covariant_sample = self.cuped_covariant.loc[treatment_index_sample]
+        (control_sample, control_covariant_sample), (treatment_sample, treatment_covariant_sample) = (
+            self._sample_groups(["variable", "cuped_covariant"])
+        )
         treatment_sample += mde
 
         return cuped_ttest(
             control_sample, control_covariant_sample, treatment_sample, treatment_covariant_sample, self.alternative
         )
 
+    def simulate_ratio_ttest(self, mde: float) -> float:
+        """
+        Simulate ratio ttest (delta method)
+        :param mde: minimal detectable effect, to sum with treatment ratio
+        :return: p_value
+        """
+        (control_sample, control_denominator_sample), (treatment_sample, treatment_denominator_sample) = (
+            self._sample_groups(["variable", "ratio_denominator"])
+        )
+        treatment_sample += mde * treatment_denominator_sample
+
+        return ratio_ttest(
+            control_sample, control_denominator_sample, treatment_sample, treatment_denominator_sample, self.alternative
+        )
+
     def simulate_reg(self, mde: float) -> float:
         """
         Simulate test using regression
         :param mde: minimal detectable effect, to sum with test variable
         :return: p_value
         """
-        control_sample = self.variable.sample(self.control_sample_size, replace=True)
-        treatment_sample = self.variable.sample(self.treatment_sample_size, replace=True)
+        (control_sample,), (treatment_sample,) = self._sample_groups(["variable"])
         treatment_sample += mde
 
-        return regression_test(control_sample, treatment_sample, self.alternative)
+        return regression_test(control_sample, treatment_sample, self.alternative, self.regression_backend)
 
     def simulate_reg_did(self, mde: float) -> float:
         """
@@ -161,21 +741,18 @@ class StatTestsSimulation(BaseSimulationClass):
         :param mde: minimal detectable effect, to sum with test variable
         :return: p_value
         """
-        control_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.control_sample_size)
-        ]
-        treatment_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.treatment_sample_size)
-        ]
-
-        control_sample = self.variable.loc[control_index_sample]
-        control_previous_sample = self.previous_values.loc[control_index_sample]
-        treatment_sample = self.variable.loc[treatment_index_sample]
-        treatment_previous_sample = self.previous_values.loc[treatment_index_sample]
+        (control_sample, control_previous_sample), (treatment_sample, treatment_previous_sample) = self._sample_groups(
+            ["variable", "previous_values"]
+        )
         treatment_sample += mde
 
         return did_regression_test(
-            control_sample, control_previous_sample, treatment_sample, treatment_previous_sample, self.alternative
+            control_sample,
+            control_previous_sample,
+            treatment_sample,
+            treatment_previous_sample,
+            self.alternative,
+            self.regression_backend,
         )
 
     def simulate_reg_add(self, mde: float) -> float:
@@ -184,19 +761,208 @@ class StatTestsSimulation(BaseSimulationClass):
         :param mde: minimal detectable effect, to sum with test variable
         :return: p_value
         """
-        control_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.control_sample_size)
-        ]
-        treatment_index_sample = self.variable.index[
-            np.random.randint(0, len(self.variable), size=self.treatment_sample_size)
-        ]
-
-        control_sample = self.variable.loc[control_index_sample]
-        control_add_samples = [a.loc[control_index_sample] for a in self.additional_vars]
-        treatment_sample = self.variable.loc[treatment_index_sample]
-        treatment_add_samples = [a.loc[treatment_index_sample] for a in self.additional_vars]
+        if not self._variables_names["additional_vars"]:
+            raise ValueError("'additional_vars' should be given for simulation")
+        (control_sample, *control_add_samples), (treatment_sample, *treatment_add_samples) = self._sample_groups(
+            self._get_test_arrays_names("additional_vars_regression_test")
+        )
         treatment_sample += mde
 
         return additional_vars_regression_test(
-            control_sample, control_add_samples, treatment_sample, treatment_add_samples, self.alternative
+            control_sample,
+            control_add_samples,
+            treatment_sample,
+            treatment_add_samples,
+            self.alternative,
+            self.regression_backend,
+        )
+
+    def simulate_ttest_batch(
+        self,
+        mdes: List[float],
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Simulate block of ttest experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        if self._compressed is not None and samples is None:
+            # Moments are calculated from compressed variable without drawing samples
+            n1, n2 = self.control_sample_size, self.treatment_sample_size
+            m1, v1 = self._compressed.sample_moments(n1, experiments_num, self.rng)
+            m2, v2 = self._compressed.sample_moments(n2, experiments_num, self.rng)
+            return np.array([_ttest_p_value(n1, m1, v1, n2, m2 + mde, v2, self.alternative) for mde in mdes])
+
+        (control_sample,), (treatment_sample,) = self._get_batch_samples("ttest", experiments_num, samples)
+
+        return _ttest_ndarray(control_sample, treatment_sample, self.alternative, mdes)
+
+    def _sample_compressed_difference_moments(
+        self, sample_size: int, experiments_num: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Moments of difference between variable and covariant of group samples drawn from compressed variable
+        :param sample_size: size of group
+        :param experiments_num: number of experiments in block
+        :return: array of means of difference, array of variances of difference
+        """
+        my, mx, vy, vx, cxy = self._compressed.sample_covariant_moments(sample_size, experiments_num, self.rng)
+        return my - mx, vy + vx - 2 * cxy
+
+    def simulate_difference_ttest_batch(
+        self,
+        mdes: List[float],
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Simulate block of difference ttest experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        if self._compressed is not None and samples is None and "diff_ttest" in self._get_compressed_moments_tests():
+            # Moments of difference are calculated from moments of sparse variable and covariant
+            n1, n2 = self.control_sample_size, self.treatment_sample_size
+            m1, v1 = self._sample_compressed_difference_moments(n1, experiments_num)
+            m2, v2 = self._sample_compressed_difference_moments(n2, experiments_num)
+            return np.array([_ttest_p_value(n1, m1, v1, n2, m2 + mde, v2, self.alternative) for mde in mdes])
+
+        (control_sample, control_pre_sample), (treatment_sample, treatment_pre_sample) = self._get_batch_samples(
+            "diff_ttest", experiments_num, samples
+        )
+
+        return _difference_ttest_ndarray(
+            control_sample, control_pre_sample, treatment_sample, treatment_pre_sample, self.alternative, mdes
+        )
+
+    def simulate_cuped_batch(
+        self,
+        mdes: List[float],
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Simulate block of CUPED ttest experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        if self._compressed is not None and samples is None and "cuped_ttest" in self._get_compressed_moments_tests():
+            n1, n2 = self.control_sample_size, self.treatment_sample_size
+            my1, mx1, vy1, vx1, cxy1 = self._compressed.sample_covariant_moments(n1, experiments_num, self.rng)
+            my2, mx2, vy2, vx2, cxy2 = self._compressed.sample_covariant_moments(n2, experiments_num, self.rng)
+            return np.array(
+                [
+                    _cuped_ttest_p_value(
+                        n1, my1, mx1, vy1, vx1, cxy1, n2, my2 + mde, mx2, vy2, vx2, cxy2, self.alternative
+                    )
+                    for mde in mdes
+                ]
+            )
+
+        (control_sample, control_covariant_sample), (treatment_sample, treatment_covariant_sample) = (
+            self._get_batch_samples("cuped_ttest", experiments_num, samples)
+        )
+
+        return _cuped_ttest_ndarray(
+            control_sample,
+            control_covariant_sample,
+            treatment_sample,
+            treatment_covariant_sample,
+            self.alternative,
+            mdes,
+        )
+
+    def simulate_ratio_ttest_batch(
+        self,
+        mdes: List[float],
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Simulate block of ratio ttest experiments at once
+        :param mdes: minimal detectable effects, to sum with treatment ratio
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        (control_sample, control_denominator_sample), (treatment_sample, treatment_denominator_sample) = (
+            self._get_batch_samples("ratio_ttest", experiments_num, samples)
+        )
+
+        return _ratio_ttest_ndarray(
+            control_sample,
+            control_denominator_sample,
+            treatment_sample,
+            treatment_denominator_sample,
+            self.alternative,
+            mdes,
+        )
+
+    def simulate_reg_batch(
+        self,
+        mdes: List[float],
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Simulate block of regression test experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        (control_sample,), (treatment_sample,) = self._get_batch_samples("regression_test", experiments_num, samples)
+
+        return _regression_test_ndarray(control_sample, treatment_sample, self.alternative, mdes)
+
+    def simulate_reg_did_batch(
+        self,
+        mdes: List[float],
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Simulate block of difference-in-difference regression test experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        (control_sample, control_previous_sample), (treatment_sample, treatment_previous_sample) = (
+            self._get_batch_samples("did_regression_test", experiments_num, samples)
+        )
+
+        return _did_regression_test_ndarray(
+            control_sample, control_previous_sample, treatment_sample, treatment_previous_sample, self.alternative, mdes
+        )
+
+    def simulate_reg_add_batch(
+        self,
+        mdes: List[float],
+        experiments_num: int,
+        samples: Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Simulate block of regression with additional variables test experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment samples shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        if not self._variables_names["additional_vars"]:
+            raise ValueError("'additional_vars' should be given for simulation")
+        (control_sample, *control_add_samples), (treatment_sample, *treatment_add_samples) = self._get_batch_samples(
+            "additional_vars_regression_test", experiments_num, samples
+        )
+
+        return _additional_vars_regression_test_ndarray(
+            control_sample, control_add_samples, treatment_sample, treatment_add_samples, self.alternative, mdes
         )
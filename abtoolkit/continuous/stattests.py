@@ -2,13 +2,14 @@
 Stat tests for continuous variables
 """
 
-from typing import List, Literal
+from typing import List, Literal, Tuple, Union
 
-import linearmodels as lm
 import numpy as np
 import pandas as pd
 from scipy import special
 
+from abtoolkit.continuous.summary import MomentSummary
+
 
 def _corrected_regression_p_value(
     value: float,
@@ -28,6 +29,13 @@ def _corrected_regression_p_value(
     :return: corrected p_value
     """
 
+    if np.ndim(value) > 0:
+        if alternative == "less":
+            p_value = np.where(value < 0, 1.0, p_value)
+        elif alternative == "greater":
+            p_value = np.where(value > 0, 1.0, p_value)
+        return p_value
+
     if (alternative == "less") and (value < 0):
         p_value = 1
     elif (alternative == "greater") and (value > 0):
@@ -36,15 +44,106 @@ def _corrected_regression_p_value(
     return p_value
 
 
-def ttest(
-    control: pd.Series,
-    treatment: pd.Series,
+def _ols_p_value(
+    xtx: np.ndarray,
+    xty: np.ndarray,
+    yty: Union[float, np.ndarray],
+    n: int,
+    column: int,
+    alternative: Literal["less", "greater", "two-sided"],
+) -> Union[float, np.ndarray]:
+    """
+    OLS estimation from cross-products with Cholesky decomposition and p-value of one weight.
+    Uses the same conventions as PanelOLS with unadjusted covariance: residual variance SSR / (n - k) and
+    two-sided t-test p-value corrected by `_corrected_regression_p_value`.
+    Cross-products could be stacked along leading axes to fit many regressions at once
+    :param xtx: X'X matrix with shape (..., k, k)
+    :param xty: X'y vector with shape (..., k)
+    :param yty: y'y value with shape (...)
+    :param n: number of observations in each regression
+    :param column: index of weight to test
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :return: p-value or array of p-values
+    """
+    k = xtx.shape[-1]
+    df = n - k
+    if df < 1:
+        raise ValueError(f"df = {df}, too few samples in dataset")
+
+    singular = None
+    try:
+        chol = np.linalg.cholesky(xtx)
+    except np.linalg.LinAlgError as e:
+        if xtx.ndim == 2:
+            raise ValueError("Regressors don't have full column rank") from e
+        # Some of stacked regressions are degenerate: give them nan p-value instead of failing all of them
+        singular = np.zeros(xtx.shape[:-2], dtype=bool)
+        for index in np.ndindex(*xtx.shape[:-2]):
+            try:
+                np.linalg.cholesky(xtx[index])
+            except np.linalg.LinAlgError:
+                singular[index] = True
+        xtx = np.where(singular[..., None, None], np.eye(k), xtx)
+        chol = np.linalg.cholesky(xtx)
+
+    chol_inv = np.linalg.inv(chol)
+    xtx_inv = np.swapaxes(chol_inv, -1, -2) @ chol_inv
+    weights = (xtx_inv @ xty[..., None])[..., 0]
+
+    ssr = np.maximum(yty - np.sum(weights * xty, axis=-1), 0)
+    std = np.sqrt(ssr / df * xtx_inv[..., column, column])
+    t = weights[..., column] / std
+    p_value = special.stdtr(df, -np.abs(t)) * 2
+    if singular is not None:
+        p_value = np.where(singular, np.nan, p_value)
+
+    return _corrected_regression_p_value(weights[..., column], p_value, alternative)
+
+
+def _ols_fit_p_value(
+    regressors: np.ndarray,
+    value: np.ndarray,
+    column: int,
     alternative: Literal["less", "greater", "two-sided"],
 ) -> float:
     """
-    Simple t-test
-    :param control: pd.Series for control sample
-    :param treatment: pd.Series for treated sample
+    Fit OLS by design matrix and return p-value of one weight. First column of design matrix should be bias,
+    other columns and target are centered before cross-products calculation (weights except bias don't change),
+    it makes estimation numerically stable. Rows with missing values are dropped as PanelOLS does
+    :param regressors: design matrix with shape (n, k), first column is bias
+    :param value: target with shape (n,)
+    :param column: index of weight to test
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :return: p-value
+    """
+    finite = np.isfinite(value) & np.isfinite(regressors).all(axis=1)
+    if not finite.all():
+        regressors, value = regressors[finite], value[finite]
+
+    regressors = np.concatenate([regressors[:, :1], regressors[:, 1:] - regressors[:, 1:].mean(axis=0)], axis=1)
+    value = value - value.mean()
+
+    return _ols_p_value(regressors.T @ regressors, regressors.T @ value, value @ value, len(value), column, alternative)
+
+
+def _ttest_p_value(
+    n1: int,
+    m1: Union[float, np.ndarray],
+    v1: Union[float, np.ndarray],
+    n2: int,
+    m2: Union[float, np.ndarray],
+    v2: Union[float, np.ndarray],
+    alternative: Literal["less", "greater", "two-sided"],
+) -> Union[float, np.ndarray]:
+    """
+    T-test p-value from samples moments. Means and variances could be arrays (one value per experiment),
+    then array of p-values is returned
+    :param n1: control sample size
+    :param m1: control sample mean
+    :param v1: control sample variance (ddof=1)
+    :param n2: treatment sample size
+    :param m2: treatment sample mean
+    :param v2: treatment sample variance (ddof=1)
     :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
     * 'two-sided' : means are equal;
     * 'less': the mean of the control sample is less than the mean of the treated sample;
@@ -52,10 +151,6 @@ def ttest(
     :return: p-value
     """
 
-    n1, n2 = len(control), len(treatment)  # Samples num
-    v1, v2 = control.var(), treatment.var()  # Variance
-    m1, m2 = control.mean(), treatment.mean()  # Mean
-
     df = n1 + n2 - 2
     if df < 1:
         raise ValueError(f"df = {df}, too few samples in dataset")
@@ -75,25 +170,221 @@ def ttest(
     return p_value
 
 
+def _cuped_ttest_p_value(
+    n1: int,
+    my1: Union[float, np.ndarray],
+    mx1: Union[float, np.ndarray],
+    vy1: Union[float, np.ndarray],
+    vx1: Union[float, np.ndarray],
+    cxy1: Union[float, np.ndarray],
+    n2: int,
+    my2: Union[float, np.ndarray],
+    mx2: Union[float, np.ndarray],
+    vy2: Union[float, np.ndarray],
+    vx2: Union[float, np.ndarray],
+    cxy2: Union[float, np.ndarray],
+    alternative: Literal["less", "greater", "two-sided"],
+) -> Union[float, np.ndarray]:
+    """
+    CUPED t-test p-value from groups moments (variances and covariances with ddof=1).
+    Theta is estimated on pooled groups, pooled moments are combined from groups moments
+    :param n1: control sample size
+    :param my1: control variable mean
+    :param mx1: control covariant mean
+    :param vy1: control variable variance
+    :param vx1: control covariant variance
+    :param cxy1: control covariance between variable and covariant
+    :param n2: treatment sample size
+    :param my2: treatment variable mean
+    :param mx2: treatment covariant mean
+    :param vy2: treatment variable variance
+    :param vx2: treatment covariant variance
+    :param cxy2: treatment covariance between variable and covariant
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :return: p-value
+    """
+    between_coef = n1 * n2 / (n1 + n2)
+    sxx = (n1 - 1) * vx1 + (n2 - 1) * vx2 + between_coef * (mx1 - mx2) ** 2
+    sxy = (n1 - 1) * cxy1 + (n2 - 1) * cxy2 + between_coef * (mx1 - mx2) * (my1 - my2)
+    theta = sxy / sxx
+
+    m1 = my1 - theta * mx1
+    m2 = my2 - theta * mx2
+    v1 = vy1 - 2 * theta * cxy1 + theta**2 * vx1
+    v2 = vy2 - 2 * theta * cxy2 + theta**2 * vx2
+
+    return _ttest_p_value(n1, m1, v1, n2, m2, v2, alternative)
+
+
+def _ttest_ndarray(
+    control: np.ndarray,
+    treatment: np.ndarray,
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> Union[float, np.ndarray]:
+    """
+    T-test for numpy arrays. Moments are reduced along the last axis, so 2d arrays with shape
+    (experiments_num, sample_size) give p-value for each experiment (row)
+    :param control: np.ndarray, control samples
+    :param treatment: np.ndarray, treated samples
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: if given, p-values are calculated for treatment shifted by each of values
+    (result gets leading axis of len(treatment_shifts)), shifts update moments without samples copying
+    :return: p-value or array of p-values
+    """
+    n1, n2 = control.shape[-1], treatment.shape[-1]
+    v1, v2 = control.var(axis=-1, ddof=1), treatment.var(axis=-1, ddof=1)
+    m1, m2 = control.mean(axis=-1), treatment.mean(axis=-1)
+
+    if treatment_shifts is None:
+        return _ttest_p_value(n1, m1, v1, n2, m2, v2, alternative)
+    return np.array([_ttest_p_value(n1, m1, v1, n2, m2 + shift, v2, alternative) for shift in treatment_shifts])
+
+
+def _difference_ttest_ndarray(
+    control: np.ndarray,
+    control_pre: np.ndarray,
+    treatment: np.ndarray,
+    treatment_pre: np.ndarray,
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> Union[float, np.ndarray]:
+    """
+    Difference t-test for numpy arrays, reduced along the last axis (see `_ttest_ndarray`)
+    :param control: np.ndarray, control samples
+    :param control_pre: np.ndarray, control previous period values
+    :param treatment: np.ndarray, treated samples
+    :param treatment_pre: np.ndarray, treatment previous period values
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: values to shift treatment by (see `_ttest_ndarray`)
+    :return: p-value or array of p-values
+    """
+    return _ttest_ndarray(control - control_pre, treatment - treatment_pre, alternative, treatment_shifts)
+
+
+def _covariant_moments(value: np.ndarray, covariant: np.ndarray) -> tuple:
+    """
+    Moments of variable and covariant (ddof=1) reduced along the last axis
+    :param value: np.ndarray, samples of variable
+    :param covariant: np.ndarray, samples of covariant
+    :return: sample size, variable mean, covariant mean, variable variance, covariant variance, covariance
+    """
+    my, mx = value.mean(axis=-1), covariant.mean(axis=-1)
+    centered_value = value - my[..., None]
+    centered_covariant = covariant - mx[..., None]
+    ddof_n = value.shape[-1] - 1
+    vy = np.einsum("...i,...i->...", centered_value, centered_value) / ddof_n
+    vx = np.einsum("...i,...i->...", centered_covariant, centered_covariant) / ddof_n
+    cxy = np.einsum("...i,...i->...", centered_value, centered_covariant) / ddof_n
+    return value.shape[-1], my, mx, vy, vx, cxy
+
+
+def _cuped_ttest_ndarray(
+    control: np.ndarray,
+    control_covariant: np.ndarray,
+    treatment: np.ndarray,
+    treatment_covariant: np.ndarray,
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> Union[float, np.ndarray]:
+    """
+    CUPED t-test for numpy arrays, reduced along the last axis (see `_ttest_ndarray`).
+    Theta is estimated on pooled control and treatment samples of each experiment
+    :param control: np.ndarray, control samples
+    :param control_covariant: np.ndarray, control samples covariant
+    :param treatment: np.ndarray, treated samples
+    :param treatment_covariant: np.ndarray, treated samples covariant
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: values to shift treatment by (see `_ttest_ndarray`), shift changes treatment mean
+    and so pooled theta
+    :return: p-value or array of p-values
+    """
+    n1, my1, mx1, vy1, vx1, cxy1 = _covariant_moments(control, control_covariant)
+    n2, my2, mx2, vy2, vx2, cxy2 = _covariant_moments(treatment, treatment_covariant)
+
+    if treatment_shifts is None:
+        return _cuped_ttest_p_value(n1, my1, mx1, vy1, vx1, cxy1, n2, my2, mx2, vy2, vx2, cxy2, alternative)
+    return np.array(
+        [
+            _cuped_ttest_p_value(n1, my1, mx1, vy1, vx1, cxy1, n2, my2 + shift, mx2, vy2, vx2, cxy2, alternative)
+            for shift in treatment_shifts
+        ]
+    )
+
+
+def _is_ndarray(*samples) -> bool:
+    """
+    Check if any of samples is numpy array, then stattest is calculated by numpy kernel without pandas
+    :param samples: samples given to stattest
+    :return: True if numpy kernel should be used
+    """
+    return any(isinstance(sample, np.ndarray) for sample in samples)
+
+
+def _as_series(sample: Union[pd.Series, np.ndarray], name: str = None) -> pd.Series:
+    """
+    Convert numpy sample to pd.Series with positional index (pd.Series is returned as is)
+    :param sample: sample given to stattest
+    :param name: name for series converted from numpy array
+    :return: pd.Series
+    """
+    if isinstance(sample, pd.Series):
+        return sample
+    return pd.Series(np.asarray(sample, dtype=np.float64), name=name)
+
+
+def ttest(
+    control: Union[pd.Series, np.ndarray],
+    treatment: Union[pd.Series, np.ndarray],
+    alternative: Literal["less", "greater", "two-sided"],
+) -> float:
+    """
+    Simple t-test
+    :param control: pd.Series (or np.ndarray) for control sample
+    :param treatment: pd.Series (or np.ndarray) for treated sample
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    * 'two-sided' : means are equal;
+    * 'less': the mean of the control sample is less than the mean of the treated sample;
+    * 'greater': the mean of the control sample is greater than the mean of the treated sample;
+    :return: p-value
+    """
+    if _is_ndarray(control, treatment):
+        return float(_ttest_ndarray(np.asarray(control), np.asarray(treatment), alternative))
+
+    n1, n2 = len(control), len(treatment)  # Samples num
+    v1, v2 = control.var(), treatment.var()  # Variance
+    m1, m2 = control.mean(), treatment.mean()  # Mean
+
+    return _ttest_p_value(n1, m1, v1, n2, m2, v2, alternative)
+
+
 def difference_ttest(
-    control: pd.Series,
-    control_pre: pd.Series,
-    treatment: pd.Series,
-    treatment_pre: pd.Series,
+    control: Union[pd.Series, np.ndarray],
+    control_pre: Union[pd.Series, np.ndarray],
+    treatment: Union[pd.Series, np.ndarray],
+    treatment_pre: Union[pd.Series, np.ndarray],
     alternative: Literal["less", "greater", "two-sided"],
 ) -> float:
     """
     Estimation treatment effect using ttest and CUPED to increase test's power
-    :param control: pd.Series, control sample
-    :param control_pre: pd.Series, control previous period value
-    :param treatment: pd.Series, treated sample
-    :param treatment_pre: pd.Series, treatment previous period value
+    :param control: pd.Series (or np.ndarray), control sample
+    :param control_pre: pd.Series (or np.ndarray), control previous period value
+    :param treatment: pd.Series (or np.ndarray), treated sample
+    :param treatment_pre: pd.Series (or np.ndarray), treatment previous period value
     :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
     * 'two-sided' : means are equal;
     * 'less': the mean of the control sample is less than the mean of the treated sample;
     * 'greater': the mean of the control sample is greater than the mean of the treated sample;
     :return: p-value
     """
+    if _is_ndarray(control, control_pre, treatment, treatment_pre):
+        return float(
+            _difference_ttest_ndarray(
+                *(np.asarray(v, dtype=np.float64) for v in (control, control_pre, treatment, treatment_pre)),
+                alternative,
+            )
+        )
+
     control = control - control_pre
     treatment = treatment - treatment_pre
 
@@ -101,24 +392,34 @@ def difference_ttest(
 
 
 def cuped_ttest(
-    control: pd.Series,
-    control_covariant: pd.Series,
-    treatment: pd.Series,
-    treatment_covariant: pd.Series,
+    control: Union[pd.Series, np.ndarray],
+    control_covariant: Union[pd.Series, np.ndarray],
+    treatment: Union[pd.Series, np.ndarray],
+    treatment_covariant: Union[pd.Series, np.ndarray],
     alternative: Literal["less", "greater", "two-sided"],
 ) -> float:
     """
     Estimation treatment effect using ttest and CUPED to increase test's power
-    :param control: pd.Series, control sample
-    :param control_covariant: pd.Series, control sample covariant
-    :param treatment: pd.Series, treated sample
-    :param treatment_covariant: pd.Series, treated sample covariant
+    :param control: pd.Series (or np.ndarray), control sample
+    :param control_covariant: pd.Series (or np.ndarray), control sample covariant
+    :param treatment: pd.Series (or np.ndarray), treated sample
+    :param treatment_covariant: pd.Series (or np.ndarray), treated sample covariant
     :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
     * 'two-sided' : means are equal;
     * 'less': the mean of the control sample is less than the mean of the treated sample;
     * 'greater': the mean of the control sample is greater than the mean of the treated sample;
     :return: p-value
     """
+    if _is_ndarray(control, control_covariant, treatment, treatment_covariant):
+        return float(
+            _cuped_ttest_ndarray(
+                *(
+                    np.asarray(v, dtype=np.float64)
+                    for v in (control, control_covariant, treatment, treatment_covariant)
+                ),
+                alternative,
+            )
+        )
 
     full_value = pd.concat(
         [
@@ -146,25 +447,303 @@ def cuped_ttest(
     return ttest(cuped_control, cuped_treatment, alternative)
 
 
+def ttest_from_summary(
+    control: MomentSummary,
+    treatment: MomentSummary,
+    alternative: Literal["less", "greater", "two-sided"],
+) -> float:
+    """
+    T-test on sufficient statistics of groups, gives the same p-value as `ttest` on raw samples
+    :param control: summary of control sample
+    :param treatment: summary of treated sample
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    * 'two-sided' : means are equal;
+    * 'less': the mean of the control sample is less than the mean of the treated sample;
+    * 'greater': the mean of the control sample is greater than the mean of the treated sample;
+    :return: p-value
+    """
+    return _ttest_p_value(
+        control.n, control.mean, control.variance, treatment.n, treatment.mean, treatment.variance, alternative
+    )
+
+
+def _difference_summary_moments(summary: MomentSummary) -> Tuple[int, float, float]:
+    """
+    Moments of difference between variable and covariant (previous period value) of group
+    :param summary: summary of group with previous period value as covariant
+    :return: sample size, mean of difference, variance of difference
+    """
+    mean = summary.mean - summary.covariant_mean
+    variance = summary.variance + summary.covariant_variance - 2 * summary.covariance
+    return summary.n, mean, variance
+
+
+def difference_ttest_from_summary(
+    control: MomentSummary,
+    treatment: MomentSummary,
+    alternative: Literal["less", "greater", "two-sided"],
+) -> float:
+    """
+    Difference t-test on sufficient statistics of groups, gives the same p-value as `difference_ttest`
+    on raw samples
+    :param control: summary of control sample with previous period value as covariant
+    :param treatment: summary of treated sample with previous period value as covariant
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    * 'two-sided' : means are equal;
+    * 'less': the mean of the control sample is less than the mean of the treated sample;
+    * 'greater': the mean of the control sample is greater than the mean of the treated sample;
+    :return: p-value
+    """
+    n1, m1, v1 = _difference_summary_moments(control)
+    n2, m2, v2 = _difference_summary_moments(treatment)
+    return _ttest_p_value(n1, m1, v1, n2, m2, v2, alternative)
+
+
+def cuped_ttest_from_summary(
+    control: MomentSummary,
+    treatment: MomentSummary,
+    alternative: Literal["less", "greater", "two-sided"],
+) -> float:
+    """
+    CUPED t-test on sufficient statistics of groups, gives the same p-value as `cuped_ttest` on raw samples
+    :param control: summary of control sample with CUPED covariant
+    :param treatment: summary of treated sample with CUPED covariant
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    * 'two-sided' : means are equal;
+    * 'less': the mean of the control sample is less than the mean of the treated sample;
+    * 'greater': the mean of the control sample is greater than the mean of the treated sample;
+    :return: p-value
+    """
+    return _cuped_ttest_p_value(
+        control.n,
+        control.mean,
+        control.covariant_mean,
+        control.variance,
+        control.covariant_variance,
+        control.covariance,
+        treatment.n,
+        treatment.mean,
+        treatment.covariant_mean,
+        treatment.variance,
+        treatment.covariant_variance,
+        treatment.covariance,
+        alternative,
+    )
+
+
+def _ols_ndarray(
+    regressors: np.ndarray,
+    value: np.ndarray,
+    column: int,
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> np.ndarray:
+    """
+    Fit many OLS regressions at once. Cross-products X'X and X'y are stacked for all experiments and solved
+    together. First column of design matrix should be bias, other columns and target are centered
+    in each experiment (see `_ols_fit_p_value`)
+    :param regressors: design matrix with shape (n, k) shared by all experiments or (experiments_num, n, k)
+    :param value: targets with shape (experiments_num, n)
+    :param column: index of weight to test, should be binary treatment flag
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: if given, p-values are calculated for targets shifted by each of values in rows
+    where tested flag is 1 (result gets leading axis of len(treatment_shifts)). Shift updates cross-products:
+    X'(y + s * x) = X'y + s * X'x and (y + s * x)'(y + s * x) = y'y + 2 * s * x'y + s^2 * x'x
+    :return: array of p-values
+    """
+    bias = regressors[..., :1]
+    other = regressors[..., 1:]
+    regressors = np.concatenate([bias, other - other.mean(axis=-2, keepdims=True)], axis=-1)
+    value = value - value.mean(axis=-1, keepdims=True)
+
+    if regressors.ndim == 2:
+        xtx = regressors.T @ regressors
+        xty = value @ regressors
+    else:
+        xtx = np.einsum("enk,enj->ekj", regressors, regressors)
+        xty = np.einsum("enk,en->ek", regressors, value)
+    yty = np.einsum("en,en->e", value, value)
+    n = value.shape[-1]
+
+    if treatment_shifts is None:
+        return _ols_p_value(xtx, xty, yty, n, column, alternative)
+
+    xtx_column = xtx[..., column]
+    return np.array(
+        [
+            _ols_p_value(
+                xtx,
+                xty + shift * xtx_column,
+                yty + 2 * shift * xty[..., column] + shift**2 * xtx_column[..., column],
+                n,
+                column,
+                alternative,
+            )
+            for shift in treatment_shifts
+        ]
+    )
+
+
+def _regression_test_ndarray(
+    control: np.ndarray,
+    treatment: np.ndarray,
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> np.ndarray:
+    """
+    Regression test for 2d numpy arrays with shape (experiments_num, sample_size), one regression per row
+    :param control: np.ndarray, control samples
+    :param treatment: np.ndarray, treated samples
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: values to shift treatment by (see `_ols_ndarray`)
+    :return: array of p-values
+    """
+    value = np.concatenate([control, treatment], axis=-1)
+    treated = np.concatenate([np.zeros(control.shape[-1]), np.ones(treatment.shape[-1])])
+    regressors = np.column_stack([np.ones(len(treated)), treated])
+    return _ols_ndarray(regressors, value, 1, alternative, treatment_shifts)
+
+
+def _did_regression_test_ndarray(
+    control: np.ndarray,
+    control_pre: np.ndarray,
+    treatment: np.ndarray,
+    treatment_pre: np.ndarray,
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> np.ndarray:
+    """
+    Difference-in-difference regression test for 2d numpy arrays with shape (experiments_num, sample_size),
+    one regression per row
+    :param control: np.ndarray, control samples after treatment
+    :param control_pre: np.ndarray, control samples before treatment
+    :param treatment: np.ndarray, treated samples after treatment
+    :param treatment_pre: np.ndarray, treated samples before treatment
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: values to shift treatment by (see `_ols_ndarray`)
+    :return: array of p-values
+    """
+    samples = [control_pre, control, treatment_pre, treatment]
+    value = np.concatenate(samples, axis=-1)
+    sizes = [sample.shape[-1] for sample in samples]
+    treated = np.repeat([0.0, 0.0, 1.0, 1.0], sizes)
+    after = np.repeat([0.0, 1.0, 0.0, 1.0], sizes)
+    regressors = np.column_stack([np.ones(len(treated)), after, treated, treated * after])
+    return _ols_ndarray(regressors, value, 3, alternative, treatment_shifts)
+
+
+def _additional_vars_regression_test_ndarray(
+    control: np.ndarray,
+    control_additional_vars: List[np.ndarray],
+    treatment: np.ndarray,
+    treatment_additional_vars: List[np.ndarray],
+    alternative: Literal["less", "greater", "two-sided"],
+    treatment_shifts: List[float] = None,
+) -> np.ndarray:
+    """
+    Regression test with additional variables for 2d numpy arrays with shape (experiments_num, sample_size),
+    one regression per row. Additional variables are matched between groups by position
+    :param control: np.ndarray, control samples
+    :param control_additional_vars: list of np.ndarray, control samples of additional variables
+    :param treatment: np.ndarray, treated samples
+    :param treatment_additional_vars: list of np.ndarray, treated samples of additional variables
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :param treatment_shifts: values to shift treatment by (see `_ols_ndarray`)
+    :return: array of p-values
+    """
+    assert len(treatment_additional_vars) > 0, "No additional vars given"
+
+    value = np.concatenate([control, treatment], axis=-1)
+    treated = np.concatenate([np.zeros(control.shape[-1]), np.ones(treatment.shape[-1])])
+    additional_vars = [
+        np.concatenate([control_var, treatment_var], axis=-1)
+        for control_var, treatment_var in zip(control_additional_vars, treatment_additional_vars)
+    ]
+    regressors = np.stack(
+        [np.ones(value.shape), np.broadcast_to(treated, value.shape)] + additional_vars,
+        axis=-1,
+    )
+    return _ols_ndarray(regressors, value, 1, alternative, treatment_shifts)
+
+
+def _aligned_values(variable: pd.Series, additional_vars: List[pd.Series]) -> np.ndarray:
+    """
+    Stack variable and additional variables into 2d array, aligning additional variables by index
+    only if their index differs from variable index
+    :param variable: main variable
+    :param additional_vars: list of additional variables
+    :return: array with shape (len(variable), 1 + len(additional_vars))
+    """
+    if all(v.index.equals(variable.index) for v in additional_vars):
+        return np.column_stack(
+            [variable.to_numpy(dtype=np.float64)] + [v.to_numpy(dtype=np.float64) for v in additional_vars]
+        )
+    df = pd.concat([variable.rename("value").to_frame()] + additional_vars, axis=1)
+    return df.to_numpy(dtype=np.float64)
+
+
+def _additional_vars_regression_p_value(
+    control_values: np.ndarray,
+    treatment_values: np.ndarray,
+    alternative: Literal["less", "greater", "two-sided"],
+) -> float:
+    """
+    Regression with additional variables on numpy arrays
+    :param control_values: array with shape (n, 1 + additional_vars_num), variable and additional vars of control
+    :param treatment_values: array with shape (n, 1 + additional_vars_num), variable and additional vars of treatment
+    :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
+    :return: p-value
+    """
+    values = np.concatenate([control_values, treatment_values])
+    treated = np.concatenate([np.zeros(len(control_values)), np.ones(len(treatment_values))])
+    regressors = np.column_stack([np.ones(len(values)), treated, values[:, 1:]])
+    return _ols_fit_p_value(regressors, values[:, 0], 1, alternative)
+
+
+def _fit_panel_ols(formula: str, df: pd.DataFrame):
+    """
+    Fit PanelOLS from linearmodels package, it's imported on first use (import takes long)
+    :param formula: regression formula
+    :param df: data with [entity, dt] multi-index
+    :return: fitted model results
+    """
+    import linearmodels as lm  # pylint: disable=import-outside-toplevel
+
+    return lm.PanelOLS.from_formula(formula, data=df).fit()
+
+
 def regression_test(
-    control: pd.Series,
-    treatment: pd.Series,
+    control: Union[pd.Series, np.ndarray],
+    treatment: Union[pd.Series, np.ndarray],
     alternative: Literal["less", "greater", "two-sided"],
+    backend: Literal["numpy", "linearmodels"] = "numpy",
 ) -> float:
     """
-    Treatment effect estimation using linear regression
+    Treatment effect estimation using linear regression.
+    Samples could be np.ndarray as well
     :param control: pd.Series with index [entity, dt], where dt could be int of datetime. Control sample
     :param treatment: pd.Series with index [entity, dt], where dt could be int of datetime. treated sample
     :param alternative: alternative hypothesis ("less", "greater" or "two-sided").
     * 'two-sided' : means are equal;
     * 'less': the mean of the control sample is less than the mean of the treated sample;
     * 'greater': the mean of the control sample is greater than the mean of the treated sample;
+    :param backend: regression engine
+    * 'numpy': OLS on numpy arrays (fast);
+    * 'linearmodels': PanelOLS from linearmodels package;
     :return: p-value
     """
+    if backend == "numpy":
+        value = np.concatenate([np.asarray(control, dtype=np.float64), np.asarray(treatment, dtype=np.float64)])
+        treated = np.concatenate([np.zeros(len(control)), np.ones(len(treatment))])
+        regressors = np.column_stack([np.ones(len(value)), treated])
+        return _ols_fit_p_value(regressors, value, 1, alternative)
+    if backend != "linearmodels":
+        raise ValueError("backend must be 'numpy' or 'linearmodels'")
+
     df = pd.concat(
         [
-            control.rename("value").to_frame().assign(treated=0),
-            treatment.rename("value").to_frame().assign(treated=1),
+            _as_series(control).rename("value").to_frame().assign(treated=0),
+            _as_series(treatment).rename("value").to_frame().assign(treated=1),
         ],
         axis=0,
     )
@@ -175,22 +754,23 @@ def regression_test(
         df["index2"] = 1
         df = df.set_index(["index1", "index2"])
 
-    mod = lm.PanelOLS.from_formula("value ~ bias + treated", data=df)
-    result = mod.fit()
+    result = _fit_panel_ols("value ~ bias + treated", df)
     return _corrected_regression_p_value(result.params["treated"], result.pvalues["treated"], alternative)
 
 
 def did_regression_test(
-    control: pd.Series,
-    control_pre: pd.Series,
-    treatment: pd.Series,
-    treatment_pre: pd.Series,
+    control: Union[pd.Series, np.ndarray],
+    control_pre: Union[pd.Series, np.ndarray],
+    treatment: Union[pd.Series, np.ndarray],
+    treatment_pre: Union[pd.Series, np.ndarray],
     alternative: Literal["less", "greater", "two-sided"],
+    backend: Literal["numpy", "linearmodels"] = "numpy",
 ) -> float:
     """
     Difference-in-Difference treatment effect estimation using linear regression.
     Calculates difference between current and last values in treatment and control groups and then
-    calculates difference between differences to increase treatment power
+    calculates difference between differences to increase treatment power.
+    Samples could be np.ndarray as well
     :param control_pre: pd.Series with index [entity, dt], where dt could be int of datetime.
     Control sample before treatment
     :param control: pd.Series with index [entity, dt], where dt could be int of datetime.
@@ -203,14 +783,27 @@ def did_regression_test(
     * 'two-sided' : means are equal;
     * 'less': the mean of the control sample is less than the mean of the treated sample;
     * 'greater': the mean of the control sample is greater than the mean of the treated sample;
+    :param backend: regression engine
+    * 'numpy': OLS on numpy arrays (fast);
+    * 'linearmodels': PanelOLS from linearmodels package;
     :return: p-value
     """
+    if backend == "numpy":
+        samples = [control_pre, control, treatment_pre, treatment]
+        value = np.concatenate([np.asarray(sample, dtype=np.float64) for sample in samples])
+        treated = np.repeat([0.0, 0.0, 1.0, 1.0], [len(sample) for sample in samples])
+        after = np.repeat([0.0, 1.0, 0.0, 1.0], [len(sample) for sample in samples])
+        regressors = np.column_stack([np.ones(len(value)), after, treated, treated * after])
+        return _ols_fit_p_value(regressors, value, 3, alternative)
+    if backend != "linearmodels":
+        raise ValueError("backend must be 'numpy' or 'linearmodels'")
+
     df = pd.concat(
         [
-            control_pre.rename("value").to_frame().assign(treated=0).assign(after=0),
-            control.rename("value").to_frame().assign(treated=0).assign(after=1),
-            treatment_pre.rename("value").to_frame().assign(treated=1).assign(after=0),
-            treatment.rename("value").to_frame().assign(treated=1).assign(after=1),
+            _as_series(control_pre).rename("value").to_frame().assign(treated=0).assign(after=0),
+            _as_series(control).rename("value").to_frame().assign(treated=0).assign(after=1),
+            _as_series(treatment_pre).rename("value").to_frame().assign(treated=1).assign(after=0),
+            _as_series(treatment).rename("value").to_frame().assign(treated=1).assign(after=1),
         ],
         axis=0,
     )
@@ -222,21 +815,22 @@ def did_regression_test(
         df["index2"] = 1
         df = df.set_index(["index1", "index2"])
 
-    mod = lm.PanelOLS.from_formula("value ~ bias + after + treated + treated*after", data=df)
-    result = mod.fit()
+    result = _fit_panel_ols("value ~ bias + after + treated + treated*after", df)
     return _corrected_regression_p_value(result.params["treated:after"], result.pvalues["treated:after"], alternative)
 
 
 def additional_vars_regression_test(
-    control: pd.Series,
-    control_additional_vars: List[pd.Series],
-    treatment: pd.Series,
-    treatment_additional_vars: List[pd.Series],
+    control: Union[pd.Series, np.ndarray],
+    control_additional_vars: List[Union[pd.Series, np.ndarray]],
+    treatment: Union[pd.Series, np.ndarray],
+    treatment_additional_vars: List[Union[pd.Series, np.ndarray]],
     alternative: Literal["less", "greater", "two-sided"],
+    backend: Literal["numpy", "linearmodels"] = "numpy",
 ) -> float:
     """
     Treatment effect estimation using additional variables in linear regression. Additional
-    variables should reduce deviation of target variable and increase test power
+    variables should reduce deviation of target variable and increase test power.
+    Samples could be np.ndarray as well (additional vars are matched by position then)
     :param control: pd.Series with index [entity, dt], where dt could be int of datetime.
     Control sample
     :param control_additional_vars: List of pd.Series with index [entity, dt], where dt could be int of datetime.
@@ -249,6 +843,9 @@ def additional_vars_regression_test(
     * 'two-sided' : means are equal;
     * 'less': the mean of the control sample is less than the mean of the treated sample;
     * 'greater': the mean of the control sample is greater than the mean of the treated sample;
+    :param backend: regression engine
+    * 'numpy': OLS on numpy arrays (fast);
+    * 'linearmodels': PanelOLS from linearmodels package;
     :return: p-value
     """
 
@@ -256,6 +853,20 @@ def additional_vars_regression_test(
         len(treatment_additional_vars) > 0
     ), "No additional vars for 'additional_vars_regression_treatment' treatment given"
 
+    if backend == "numpy" and _is_ndarray(control, treatment, *control_additional_vars, *treatment_additional_vars):
+        # Numpy additional vars are matched by position
+        assert len(control_additional_vars) == len(
+            treatment_additional_vars
+        ), "Lists of control and treatment additional vars should have the same length"
+        control_values = np.column_stack([control] + list(control_additional_vars)).astype(np.float64)
+        treatment_values = np.column_stack([treatment] + list(treatment_additional_vars)).astype(np.float64)
+        return _additional_vars_regression_p_value(control_values, treatment_values, alternative)
+
+    # Numpy additional vars are named by position
+    treatment_additional_vars = [_as_series(v, f"additional_var_{i}") for i, v in enumerate(treatment_additional_vars)]
+    control_additional_vars = [_as_series(v, f"additional_var_{i}") for i, v in enumerate(control_additional_vars)]
+    control, treatment = _as_series(control), _as_series(treatment)
+
     additional_vars_names_treatment = [v.name for v in treatment_additional_vars]
     additional_vars_names_control = [v.name for v in control_additional_vars]
     assert set(additional_vars_names_treatment) == set(additional_vars_names_control), (
@@ -264,6 +875,17 @@ def additional_vars_regression_test(
         f"and {set(additional_vars_names_control)} vars for control"
     )
 
+    if backend == "numpy":
+        if len(set(additional_vars_names_control)) == len(additional_vars_names_control):
+            # Match control additional vars with treatment ones by name
+            control_vars_by_name = dict(zip(additional_vars_names_control, control_additional_vars))
+            control_additional_vars = [control_vars_by_name[name] for name in additional_vars_names_treatment]
+        control_values = _aligned_values(control, control_additional_vars)
+        treatment_values = _aligned_values(treatment, treatment_additional_vars)
+        return _additional_vars_regression_p_value(control_values, treatment_values, alternative)
+    if backend != "linearmodels":
+        raise ValueError("backend must be 'numpy' or 'linearmodels'")
+
     control_df = pd.concat([control.rename("value").to_frame()] + control_additional_vars, axis=1)
     treatment_df = pd.concat([treatment.rename("value").to_frame()] + treatment_additional_vars, axis=1)
 
@@ -285,6 +907,5 @@ def additional_vars_regression_test(
     additional_vars_formula = " + ".join(map(str, additional_vars_names_treatment))
 
     formula = f"value ~ bias + treated + {additional_vars_formula}"
-    mod = lm.PanelOLS.from_formula(formula, data=df)
-    result = mod.fit()
+    result = _fit_panel_ols(formula, df)
     return _corrected_regression_p_value(result.params["treated"], result.pvalues["treated"], alternative)
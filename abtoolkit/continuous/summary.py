@@ -0,0 +1,232 @@
+"""
+Sufficient statistics of continuous variables for stat tests on pre-aggregated data
+"""
+
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class MomentSummary:
+    """
+    First and second moments of variable (and optionally of its covariant) for one group of experiment.
+    Moments are kept as mean and sum of squared deviations from mean, so summaries could be merged
+    without loss of precision
+    """
+
+    def __init__(
+        self,
+        n: int,
+        mean: float,
+        m2: float,
+        covariant_mean: float = None,
+        covariant_m2: float = None,
+        comoment: float = None,
+    ):
+        """
+        Summary of group
+        :param n: number of samples
+        :param mean: mean of variable
+        :param m2: sum of squared deviations of variable from its mean
+        :param covariant_mean: mean of covariant
+        :param covariant_m2: sum of squared deviations of covariant from its mean
+        :param comoment: sum of products of variable and covariant deviations from their means
+        """
+        covariant_moments = [covariant_mean, covariant_m2, comoment]
+        if any(m is None for m in covariant_moments) and any(m is not None for m in covariant_moments):
+            raise ValueError("covariant_mean, covariant_m2 and comoment should be given together")
+
+        self.n = int(n)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+        self.covariant_mean = None if covariant_mean is None else float(covariant_mean)
+        self.covariant_m2 = None if covariant_m2 is None else float(covariant_m2)
+        self.comoment = None if comoment is None else float(comoment)
+
+    @property
+    def has_covariant(self) -> bool:
+        """
+        Summary keeps moments of covariant
+        """
+        return self.covariant_mean is not None
+
+    @property
+    def variance(self) -> float:
+        """
+        Variance of variable (ddof=1)
+        """
+        return self.m2 / (self.n - 1)
+
+    @property
+    def covariant_variance(self) -> float:
+        """
+        Variance of covariant (ddof=1)
+        """
+        self._check_covariant()
+        return self.covariant_m2 / (self.n - 1)
+
+    @property
+    def covariance(self) -> float:
+        """
+        Covariance between variable and covariant (ddof=1)
+        """
+        self._check_covariant()
+        return self.comoment / (self.n - 1)
+
+    def _check_covariant(self):
+        if not self.has_covariant:
+            raise ValueError("Summary has no covariant moments")
+
+    @classmethod
+    def from_arrays(
+        cls,
+        value: Union[np.ndarray, pd.Series],
+        covariant: Union[np.ndarray, pd.Series] = None,
+    ) -> "MomentSummary":
+        """
+        Build summary from raw values
+        :param value: values of variable
+        :param covariant: values of covariant (previous period value, CUPED covariant), aligned with values
+        :return: summary
+        """
+        value = np.asarray(value, dtype=np.float64)
+        mean = value.mean()
+        centered_value = value - mean
+        if covariant is None:
+            return cls(len(value), mean, centered_value @ centered_value)
+
+        covariant = np.asarray(covariant, dtype=np.float64)
+        if covariant.shape != value.shape:
+            raise ValueError("value and covariant should have the same length")
+        covariant_mean = covariant.mean()
+        centered_covariant = covariant - covariant_mean
+        return cls(
+            len(value),
+            mean,
+            centered_value @ centered_value,
+            covariant_mean,
+            centered_covariant @ centered_covariant,
+            centered_value @ centered_covariant,
+        )
+
+    @classmethod
+    def from_sums(
+        cls,
+        n: int,
+        sum_value: float,
+        sum_squares: float,
+        covariant_sum: float = None,
+        covariant_sum_squares: float = None,
+        cross_sum: float = None,
+    ) -> "MomentSummary":
+        """
+        Build summary from raw sums (as they usually come from SQL aggregation).
+        Note that raw sums of squares lose precision when variance is small relative to mean
+        :param n: number of samples
+        :param sum_value: sum of variable
+        :param sum_squares: sum of squared variable
+        :param covariant_sum: sum of covariant
+        :param covariant_sum_squares: sum of squared covariant
+        :param cross_sum: sum of products of variable and covariant
+        :return: summary
+        """
+        mean = sum_value / n
+        m2 = sum_squares - sum_value * mean
+        if covariant_sum is None:
+            return cls(n, mean, m2)
+
+        covariant_mean = covariant_sum / n
+        return cls(
+            n,
+            mean,
+            m2,
+            covariant_mean,
+            covariant_sum_squares - covariant_sum * covariant_mean,
+            cross_sum - sum_value * covariant_mean,
+        )
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: Iterable[
+            Union[np.ndarray, pd.Series, Tuple[Union[np.ndarray, pd.Series], Union[np.ndarray, pd.Series]]]
+        ],
+    ) -> "MomentSummary":
+        """
+        Build summary in one pass over chunks of data, so data of any size could be summarized with flat memory
+        usage. Each chunk is summarized separately and merged into running summary (see `merge`)
+        :param chunks: iterable of values chunks or of (values, covariant) chunks pairs
+        :return: summary
+        """
+        summary = None
+        for chunk in chunks:
+            chunk = chunk if isinstance(chunk, tuple) else (chunk,)
+            if len(chunk[0]) == 0:
+                continue
+            chunk_summary = cls.from_arrays(*chunk)
+            summary = chunk_summary if summary is None else summary.merge(chunk_summary)
+        if summary is None:
+            raise ValueError("No data given in chunks")
+        return summary
+
+    def merge(self, other: "MomentSummary") -> "MomentSummary":
+        """
+        Summary of union of two groups (Chan et al. pairwise update)
+        :param other: summary of another part of group
+        :return: merged summary
+        """
+        if self.has_covariant != other.has_covariant:
+            raise ValueError("Only summaries both with or both without covariant could be merged")
+        if other.n == 0:
+            return MomentSummary(**self.to_dict())
+        if self.n == 0:
+            return MomentSummary(**other.to_dict())
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.n / n
+        m2 = self.m2 + other.m2 + delta**2 * self.n * other.n / n
+        if not self.has_covariant:
+            return MomentSummary(n, mean, m2)
+
+        covariant_delta = other.covariant_mean - self.covariant_mean
+        return MomentSummary(
+            n,
+            mean,
+            m2,
+            self.covariant_mean + covariant_delta * other.n / n,
+            self.covariant_m2 + other.covariant_m2 + covariant_delta**2 * self.n * other.n / n,
+            self.comoment + other.comoment + delta * covariant_delta * self.n * other.n / n,
+        )
+
+    def __add__(self, other: "MomentSummary") -> "MomentSummary":
+        return self.merge(other)
+
+    def to_dict(self) -> dict:
+        """
+        Serialize summary to dictionary of python numbers (json compatible)
+        :return: dictionary with moments
+        """
+        result = {"n": self.n, "mean": self.mean, "m2": self.m2}
+        if self.has_covariant:
+            result.update(
+                {"covariant_mean": self.covariant_mean, "covariant_m2": self.covariant_m2, "comoment": self.comoment}
+            )
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MomentSummary":
+        """
+        Deserialize summary from dictionary given by `to_dict`
+        :param data: dictionary with moments
+        :return: summary
+        """
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        params = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"MomentSummary({params})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MomentSummary) and self.to_dict() == other.to_dict()
@@ -5,7 +5,7 @@ Utils functions for continuous variables
 from typing import Tuple, Literal
 
 import numpy as np
-from scipy import stats
+from scipy import special
 
 
 def estimate_confidence_interval(
@@ -32,7 +32,7 @@ def estimate_confidence_interval(
     if alternative == "two-sided":
         alpha = alpha / 2
 
-    z = stats.norm.ppf(q=1 - alpha) + stats.norm.ppf(q=power)
+    z = special.ndtri(1 - alpha) + special.ndtri(power)
     se = z * std / np.sqrt(sample_size)
 
     return mean - se, mean + se
@@ -62,7 +62,7 @@ def estimate_sample_size_by_mde(
     if alternative == "two-sided":
         alpha = alpha / 2
 
-    z = stats.norm.ppf(q=1 - alpha) + stats.norm.ppf(q=power)
+    z = special.ndtri(1 - alpha) + special.ndtri(power)
     size = 2 * (std * z / mde) ** 2
 
     return round(size) + 1
@@ -91,7 +91,7 @@ def estimate_mde_by_sample_size(
     if alternative == "two-sided":
         alpha = alpha / 2
 
-    z = stats.norm.ppf(q=1 - alpha) + stats.norm.ppf(q=power)
+    z = special.ndtri(1 - alpha) + special.ndtri(power)
     mde = std * z / np.sqrt(sample_size / 2)
 
     return mde
@@ -2,16 +2,111 @@
 Simulates AA and AB tests to estimate test power and alpha
 """
 
-from typing import List, Literal
+from bisect import bisect_left
+from concurrent.futures import Executor
+from typing import List, Literal, Tuple
 
 import numpy as np
 
+from abtoolkit.discrete.stattests import _chi_square_test_ndarray
 from abtoolkit.discrete.stattests import conversion_ztest
 from abtoolkit.discrete.stattests import chi_square_test
 from abtoolkit.discrete.stattests import bayesian_test
 from abtoolkit.utils import BaseSimulationClass
 
 
+class _NestedBinomialCounts:  # pylint: disable=too-few-public-methods
+    """
+    Numbers of positives in nested groups of Bernoulli trials for block of experiments, sampled on demand.
+    Trials are split into chunks by requested group sizes and into bins by requested probabilities of positive,
+    new size or probability splits known chunk or bin by hypergeometric or binomial draw. So counts are sampled as
+    if all groups and probabilities were taken from the same trials: count of experiment grows with group size
+    and probability (common random numbers) and each count is exactly binomial
+    """
+
+    def __init__(self, rng: np.random.Generator, size: int, experiments_num: int):
+        """
+        :param rng: random generator
+        :param size: size of the largest group
+        :param experiments_num: number of experiments in block
+        """
+        self.rng = rng
+        self.sizes = [0, size]
+        self.probabilities = [0.0, 1.0]
+        # cumulative[i, j] - number of trials among first sizes[i] with uniform value less than probabilities[j]
+        self.cumulative = np.zeros((2, 2, experiments_num), dtype=np.int64)
+        self.cumulative[1, 1] = size
+
+    def count(self, size: int, probability: float) -> np.ndarray:
+        """
+        Number of positives in first `size` trials with given probability of positive
+        :param size: group size
+        :param probability: probability of positive
+        :return: array of counts with shape (experiments_num,)
+        """
+        if not 0 <= probability <= 1:
+            raise ValueError(f"Probability of positive should be in [0, 1], got {probability}")
+        i = self._add_size(size)
+        j = self._add_probability(probability)
+        return self.cumulative[i, j]
+
+    def _add_size(self, size: int) -> int:
+        """
+        Split trials by group size (if it is new)
+        :param size: group size
+        :return: index of size
+        """
+        i = bisect_left(self.sizes, size)
+        if i < len(self.sizes) and self.sizes[i] == size:
+            return i
+
+        bins_num = len(self.probabilities) - 1
+        new_bins = np.empty((bins_num, self.cumulative.shape[-1]), dtype=np.int64)
+        if i == len(self.sizes):
+            # Trials after the largest group are spread over bins by sequential binomial draws
+            remaining = np.full(self.cumulative.shape[-1], size - self.sizes[-1])
+            for j in range(bins_num):
+                rest = 1 - self.probabilities[j]
+                share = (self.probabilities[j + 1] - self.probabilities[j]) / rest if rest > 0 else 1
+                new_bins[j] = self.rng.binomial(remaining, min(share, 1))
+                remaining -= new_bins[j]
+            previous = self.cumulative[-1]
+        else:
+            # First trials of chunk are drawn without replacement from its bins
+            chunk_bins = np.diff(self.cumulative[i] - self.cumulative[i - 1], axis=0)
+            remaining_trials = self.sizes[i] - self.sizes[i - 1]
+            remaining_sample = np.full(self.cumulative.shape[-1], size - self.sizes[i - 1])
+            for j in range(bins_num):
+                new_bins[j] = self.rng.hypergeometric(chunk_bins[j], remaining_trials - chunk_bins[j], remaining_sample)
+                remaining_trials = remaining_trials - chunk_bins[j]
+                remaining_sample -= new_bins[j]
+            previous = self.cumulative[i - 1]
+
+        row = previous + np.concatenate([np.zeros_like(new_bins[:1]), np.cumsum(new_bins, axis=0)])
+        self.cumulative = np.insert(self.cumulative, i, row, axis=0)
+        self.sizes.insert(i, size)
+        return i
+
+    def _add_probability(self, probability: float) -> int:
+        """
+        Split trials by probability of positive (if it is new)
+        :param probability: probability of positive
+        :return: index of probability
+        """
+        j = bisect_left(self.probabilities, probability)
+        if self.probabilities[j] == probability:
+            return j
+
+        # Trials of bin fall below new probability independently, chunk by chunk
+        chunks = np.diff(self.cumulative[:, j] - self.cumulative[:, j - 1], axis=0)
+        share = (probability - self.probabilities[j - 1]) / (self.probabilities[j] - self.probabilities[j - 1])
+        lower = self.rng.binomial(chunks, share)
+        column = self.cumulative[:, j - 1] + np.concatenate([np.zeros_like(lower[:1]), np.cumsum(lower, axis=0)])
+        self.cumulative = np.insert(self.cumulative, j, column, axis=1)
+        self.probabilities.insert(j, probability)
+        return j
+
+
 class StatTestsSimulation(BaseSimulationClass):
     """
     Class simulates AA and AB tests to estimate test power, builds p-value distribution plot
@@ -31,6 +126,15 @@ class StatTestsSimulation(BaseSimulationClass):
         power: float = 0.8,
         bayesian_prior_positives: int = 1,
         bayesian_prior_negatives: int = 1,
+        vectorized: bool = False,
+        n_jobs: int = 1,
+        executor: Executor = None,
+        random_state: int = None,
+        common_random_numbers: bool = False,
+        shared_sampling: bool = False,
+        pvalues_dtype: type = np.float64,
+        analytic: bool = False,
+        cross_validate: bool = False,
     ):
         """
         Simulates AA and AB tests for given stat-tests. Prints result (alpha and power) for each test
@@ -47,6 +151,19 @@ class StatTestsSimulation(BaseSimulationClass):
         :param power: test power
         :param bayesian_prior_positives: prior positive examples for bayesian stattest (default = 1)
         :param bayesian_prior_negatives: prior negative examples for bayesian stattest (default = 1)
+        :param vectorized: simulate all experiments at once using array-valued binomial draws
+        :param n_jobs: number of worker processes to split experiments between
+        :param executor: executor to run workers in, if None then process pool with `n_jobs` workers is created
+        :param random_state: seed for random generator, each worker gets independent generator spawned from it
+        :param common_random_numbers: use the same random numbers for AA and AB test in each experiment,
+        treatment counts for AB test are coupled with AA ones by taking them from the same trials
+        :param shared_sampling: draw counts of each experiment once in `run` and use them for all tests with
+        batch version
+        :param pvalues_dtype: dtype of p-values arrays kept in `info` (np.float32 halves memory of long simulations)
+        :param analytic: calculate alpha and power of conversion_ztest by normal approximation instead of simulation,
+        other tests are simulated
+        :param cross_validate: simulate analytic tests as well, simulation results are kept in 'simulation' field
+        of test info
         """
         super().__init__(
             treatment_sample_size=treatment_sample_size,
@@ -57,6 +174,15 @@ class StatTestsSimulation(BaseSimulationClass):
             alpha_level=alpha_level,
             stattests_list=stattests_list,
             experiments_num=experiments_num,
+            vectorized=vectorized,
+            n_jobs=n_jobs,
+            executor=executor,
+            random_state=random_state,
+            common_random_numbers=common_random_numbers,
+            shared_sampling=shared_sampling,
+            pvalues_dtype=pvalues_dtype,
+            analytic=analytic,
+            cross_validate=cross_validate,
         )
 
         self.count = count
@@ -67,9 +193,35 @@ class StatTestsSimulation(BaseSimulationClass):
             "bayesian_test": self.simulate_bayesian_test,
             "chi_square_test": self.simulate_chi_square_test,
         }
+        self.stattests_batch_func_map = {
+            "conversion_ztest": self.simulate_conversion_ztest_batch,
+            "chi_square_test": self.simulate_chi_square_test_batch,
+            "bayesian_test": self.simulate_bayesian_test_batch,
+        }
+        self.stattests_analytic_func_map = {
+            "conversion_ztest": self.analytic_conversion_ztest,
+        }
         self.bayesian_prior_positives = bayesian_prior_positives
         self.bayesian_prior_negatives = bayesian_prior_negatives
 
+    def analytic_conversion_ztest(self, mde: float) -> Tuple[None, float, float]:
+        """
+        Closed form of conversion z-test: z-statistic is normal with mean -mde / se0 and std se1 / se0, where
+        se0 is pooled standard error used by test and se1 is actual standard error of conversions difference
+        :param mde: minimal detectable effect, to sum with test variable
+        :return: distribution of test statistic (see `stattests_analytic_func_map`)
+        """
+        n1, n2 = self.control_sample_size, self.treatment_sample_size
+        p1, p2 = self.p, self.p + mde
+        if not 0 <= p2 <= 1:
+            raise ValueError(f"conversion with mde should be in [0, 1], got {p2}")
+        p_pooled = (n1 * p1 + n2 * p2) / (n1 + n2)
+        if not 0 < p_pooled < 1:
+            raise ValueError(f"pooled conversion should be in (0, 1) for z-statistic to be defined, got {p_pooled}")
+        se0 = np.sqrt(p_pooled * (1 - p_pooled) * (1 / n1 + 1 / n2))
+        se1 = np.sqrt(p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2)
+        return None, -mde / se0, se1 / se0
+
     def simulate_conversion_ztest(self, mde: float) -> float:
         """
         Simulate ttest
@@ -77,8 +229,8 @@ class StatTestsSimulation(BaseSimulationClass):
         :return: p_value
         """
 
-        control_count = np.random.binomial(n=self.control_sample_size, p=self.p)
-        treatment_count = np.random.binomial(n=self.treatment_sample_size, p=self.p + mde)
+        control_count = self.rng.binomial(n=self.control_sample_size, p=self.p)
+        treatment_count = self.rng.binomial(n=self.treatment_sample_size, p=self.p + mde)
 
         return conversion_ztest(
             control_count, self.control_sample_size, treatment_count, self.treatment_sample_size, self.alternative
@@ -91,8 +243,8 @@ class StatTestsSimulation(BaseSimulationClass):
         :return: p_value
         """
 
-        control_count = np.random.binomial(n=self.control_sample_size, p=self.p)
-        treatment_count = np.random.binomial(n=self.treatment_sample_size, p=self.p + mde)
+        control_count = self.rng.binomial(n=self.control_sample_size, p=self.p)
+        treatment_count = self.rng.binomial(n=self.treatment_sample_size, p=self.p + mde)
 
         return chi_square_test(control_count, self.control_sample_size, treatment_count, self.treatment_sample_size)
 
@@ -103,8 +255,129 @@ class StatTestsSimulation(BaseSimulationClass):
         :return: p_value
         """
 
-        control_count = np.random.binomial(n=self.control_sample_size, p=self.p)
-        treatment_count = np.random.binomial(n=self.treatment_sample_size, p=self.p + mde)
+        control_count = self.rng.binomial(n=self.control_sample_size, p=self.p)
+        treatment_count = self.rng.binomial(n=self.treatment_sample_size, p=self.p + mde)
+
+        return 1 - bayesian_test(
+            control_count,
+            self.control_sample_size,
+            treatment_count,
+            self.treatment_sample_size,
+            self.alternative,
+            self.bayesian_prior_positives,
+            self.bayesian_prior_negatives,
+        )
+
+    def _sample_counts_batch(self, mdes: List[float], experiments_num: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sample number of positives in control and treatment groups for block of experiments at once.
+        Control counts are shared by all mdes, treatment counts for several mdes are taken from the same trials
+        (see `_NestedBinomialCounts`), so they differ only because of mde
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :return: array of control counts with shape (experiments_num,),
+        array of treatment counts with shape (len(mdes), experiments_num)
+        """
+        control_count = self.rng.binomial(n=self.control_sample_size, p=self.p, size=experiments_num)
+        if len(mdes) == 1:
+            treatment_count = self.rng.binomial(n=self.treatment_sample_size, p=self.p + mdes[0], size=experiments_num)
+            return control_count, treatment_count[None]
+
+        treatment = _NestedBinomialCounts(self.rng, self.treatment_sample_size, experiments_num)
+        treatment_count = np.array([treatment.count(self.treatment_sample_size, self.p + mde) for mde in mdes])
+        return control_count, treatment_count
+
+    def _sample_batch_for_tests(
+        self, test_names: List[str], mdes: List[float], experiments_num: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sample counts for block of experiments once for several tests
+        :param test_names: names of tests to sample data for
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :return: array of control counts, array of treatment counts (see `_sample_counts_batch`)
+        """
+        return self._sample_counts_batch(mdes, experiments_num)
+
+    def _sample_nested_batch(  # pylint: disable=unused-argument
+        self, test_names: List[str], experiments_num: int
+    ) -> Tuple[_NestedBinomialCounts, _NestedBinomialCounts]:
+        """
+        Trials of control and treatment groups of block of experiments, counts are sampled on demand
+        :param test_names: names of tests to sample data for
+        :param experiments_num: number of experiments in block
+        :return: control and treatment trials
+        """
+        return (
+            _NestedBinomialCounts(self.rng, self.control_sample_size, experiments_num),
+            _NestedBinomialCounts(self.rng, self.treatment_sample_size, experiments_num),
+        )
+
+    def _get_nested_samples(
+        self, samples: Tuple[_NestedBinomialCounts, _NestedBinomialCounts], mdes: List[float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Counts for current groups sizes taken from the same trials, so counts of experiment grow with group size
+        and mde
+        :param samples: control and treatment trials given by `_sample_nested_batch`
+        :param mdes: minimal detectable effects, to sum with test variable
+        :return: array of control counts, array of treatment counts (see `_sample_counts_batch`)
+        """
+        control, treatment = samples
+        control_count = control.count(self.control_sample_size, self.p)
+        treatment_count = np.array([treatment.count(self.treatment_sample_size, self.p + mde) for mde in mdes])
+        return control_count, treatment_count
+
+    def simulate_conversion_ztest_batch(
+        self, mdes: List[float], experiments_num: int, samples: Tuple[np.ndarray, np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Simulate block of conversion z-test experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment counts shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        control_count, treatment_count = (
+            self._sample_counts_batch(mdes, experiments_num) if samples is None else samples
+        )
+
+        return conversion_ztest(
+            control_count, self.control_sample_size, treatment_count, self.treatment_sample_size, self.alternative
+        )
+
+    def simulate_chi_square_test_batch(
+        self, mdes: List[float], experiments_num: int, samples: Tuple[np.ndarray, np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Simulate block of chi-square test experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment counts shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        (np.nan for experiments with too few samples)
+        """
+        control_count, treatment_count = (
+            self._sample_counts_batch(mdes, experiments_num) if samples is None else samples
+        )
+
+        return _chi_square_test_ndarray(
+            control_count, self.control_sample_size, treatment_count, self.treatment_sample_size
+        )
+
+    def simulate_bayesian_test_batch(
+        self, mdes: List[float], experiments_num: int, samples: Tuple[np.ndarray, np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Simulate block of bayesian test experiments at once
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments in block
+        :param samples: control and treatment counts shared with other tests, sampled if not given
+        :return: array of p-values with shape (len(mdes), experiments_num)
+        """
+        control_count, treatment_count = (
+            self._sample_counts_batch(mdes, experiments_num) if samples is None else samples
+        )
 
         return 1 - bayesian_test(
             control_count,
@@ -2,22 +2,23 @@
 Stat tests for discrete variable analysis
 """
 
-from typing import Literal
+from typing import Literal, Union
 
 import numpy as np
-from scipy import stats
+from scipy import special
 from abtoolkit.discrete.utils import compare_beta_distributions
 
 
 def conversion_ztest(
-    control_count: int,
-    control_objects_num: int,
-    treatment_count: int,
-    treatment_objects_num: int,
+    control_count: Union[int, np.ndarray],
+    control_objects_num: Union[int, np.ndarray],
+    treatment_count: Union[int, np.ndarray],
+    treatment_objects_num: Union[int, np.ndarray],
     alternative: Literal["less", "greater"],
-) -> float:
+) -> Union[float, np.ndarray]:
     """
-    Conversion z-test
+    Conversion z-test. Counts could be given as numpy arrays (one value per experiment),
+    then array of p-values is returned. If both groups have no positives (or no negatives), z-statistic is 0
     :param control_count: number of positive samples in control group
     :param control_objects_num: number of all samples in control group
     :param treatment_count: number of positive samples in test group
@@ -32,14 +33,17 @@ def conversion_ztest(
     diff = control_count / control_objects_num - treatment_count / treatment_objects_num
     p_pooled = (control_count + treatment_count) / (control_objects_num + treatment_objects_num)
     std_diff = np.sqrt(p_pooled * (1 - p_pooled) * (1 / control_objects_num + 1 / treatment_objects_num))
-    z_stat = diff / std_diff
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_stat = diff / std_diff
+    # Groups without positives (or without negatives) at all show no difference, test doesn't reject
+    z_stat = np.where(std_diff > 0, z_stat, 0.0)
 
     if alternative == "less":
-        p_value = stats.norm.cdf(z_stat)
+        p_value = special.ndtr(z_stat)
     elif alternative == "greater":
-        p_value = stats.norm.sf(z_stat)
+        p_value = special.ndtr(-z_stat)
     elif alternative == "two-sided":
-        p_value = stats.norm.sf(np.abs(z_stat)) * 2
+        p_value = special.ndtr(-np.abs(z_stat)) * 2
     else:
         raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
 
@@ -47,16 +51,17 @@ def conversion_ztest(
 
 
 def bayesian_test(
-    control_count: int,
-    control_objects_num: int,
-    treatment_count: int,
-    treatment_objects_num: int,
+    control_count: Union[int, np.ndarray],
+    control_objects_num: Union[int, np.ndarray],
+    treatment_count: Union[int, np.ndarray],
+    treatment_objects_num: Union[int, np.ndarray],
     alternative: Literal["less", "greater"],
-    prior_positives_count: int = 1,
-    prior_negatives_count: int = 1,
-) -> float:
+    prior_positives_count: Union[int, np.ndarray] = 1,
+    prior_negatives_count: Union[int, np.ndarray] = 1,
+) -> Union[float, np.ndarray]:
     """
-    Bayesian Test
+    Bayesian Test. Counts and priors could be arrays (broadcast against each other),
+    then array of probabilities is returned
     :param control_count: posterior number of positive samples in control group
     :param control_objects_num: posterior number of all samples in control group
     :param treatment_count: posterior number of positive samples in test group
@@ -104,8 +109,52 @@ def chi_square_test(
     if control_negative_count < 5 or control_count < 5 or treatment_negative_count < 5 or treatment_count < 5:
         raise ValueError("Too few samples for chi-square test (>= 5 in each case)")
 
-    contingency_table = [[control_count, control_negative_count], [treatment_count, treatment_negative_count]]
+    return float(_chi_square_test_ndarray(control_count, control_objects_num, treatment_count, treatment_objects_num))
 
-    _, pvalue, _, _ = stats.chi2_contingency(contingency_table, correction=True)
 
-    return pvalue
+def _chi_square_test_ndarray(
+    control_count: np.ndarray,
+    control_objects_num: int,
+    treatment_count: np.ndarray,
+    treatment_objects_num: int,
+) -> np.ndarray:
+    """
+    Chi-square test with Yates correction for arrays of counts, closed form for 2x2 contingency table.
+    Gives the same p-values as `chi_square_test`, but returns np.nan for experiments with too few samples
+    instead of raising ValueError
+    :param control_count: array, number of positive samples in control group
+    :param control_objects_num: number of all samples in control group
+    :param treatment_count: array, number of positive samples in test group
+    :param treatment_objects_num: number of all samples in test group
+    :return: array of p-values
+    """
+    control_count = np.asarray(control_count, dtype=np.float64)
+    treatment_count = np.asarray(treatment_count, dtype=np.float64)
+    control_negative_count = control_objects_num - control_count
+    treatment_negative_count = treatment_objects_num - treatment_count
+
+    objects_num = control_objects_num + treatment_objects_num
+    positive_count = control_count + treatment_count
+    negative_count = objects_num - positive_count
+
+    # |observed - expected| is the same for every cell of 2x2 table
+    deviation = (
+        np.abs(control_count * treatment_negative_count - control_negative_count * treatment_count) / objects_num
+    )
+    deviation = np.maximum(deviation - 0.5, 0)
+
+    # sum of 1 / expected over all cells, expected = row_total * column_total / objects_num
+    # (infinite for tables without positives or negatives, such experiments get np.nan below)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inverse_expected_sum = (
+            objects_num
+            * (1 / control_objects_num + 1 / treatment_objects_num)
+            * (1 / positive_count + 1 / negative_count)
+        )
+        chi2 = deviation**2 * inverse_expected_sum
+    p_value = special.chdtrc(1, chi2)
+
+    too_few_samples = (
+        (control_negative_count < 5) | (control_count < 5) | (treatment_negative_count < 5) | (treatment_count < 5)
+    )
+    return np.where(too_few_samples, np.nan, p_value)
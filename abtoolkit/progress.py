@@ -0,0 +1,18 @@
+"""
+Progress bar helper shared by simulation and bootstrap modules
+"""
+
+
+def progress_bar(iterable, disable: bool = False, **kwargs):
+    """
+    Wrap iterable into tqdm progress bar, tqdm is imported only when progress bar is shown
+    :param iterable: iterable to wrap
+    :param disable: return iterable as is
+    :param kwargs: tqdm arguments
+    :return: iterable
+    """
+    if disable:
+        return iterable
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+    return tqdm(iterable, **kwargs)
@@ -2,57 +2,91 @@
 Utils for stat analysis
 """
 
-from typing import Literal, List, Callable
+import gc
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from typing import Literal, List, Callable, Dict, Tuple
 from typing import Union
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
-from scipy.stats import shapiro
+from scipy import special
 
+from abtoolkit.analytic import _analytic_pvalues
+from abtoolkit.analytic import _analytic_rejection_probability
 from abtoolkit.discrete.utils import estimate_ci_binomial
+from abtoolkit.progress import progress_bar
+
+
+def _get_pyplot():
+    """
+    Import matplotlib on first plot, so services and workers which don't plot don't pay for its import
+    :return: matplotlib.pyplot module
+    """
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
+    return plt
 
 
 def check_clt(
     variable,
     do_plot_distribution: bool = True,
-    sample_size: int = None,
+    sample_size: Union[int, List[int]] = None,
     experiments_num: int = 5000,
     metric_f: Callable[[List, any], float] = np.mean,
+    random_state: int = None,
+    memory_budget_mb: float = 256,
     **metric_f_kwargs,
-) -> float:
+) -> Union[float, Dict[int, float]]:
     """
     Tests the central limit theorem by sampling subsamples of length `sample_size`, `experiments_num` times.
     `metric_f` is then taken from a subsample and the distribution of such values is compared to the normal
     distribution using the Shapiro-Wilk test. Returns p-value, where the null hypothesis that the weights were drawn
     from a normal distribution and alternative is another distribution. So if p-value lower 0.05 then variable doesn't
-    consider CLT.
-    :param variable: array-like, variable we want to test
-    :param sample_size: subsample size we take on each simulation step, if None then take length(variable).
-    Default = None
+    consider CLT. Subsamples are drawn by `abtoolkit.bootstrap.bootstrap` in memory-bounded blocks.
+    :param variable: array-like, `ValueCountsVariable` or `ZeroInflatedVariable`, variable we want to test
+    :param sample_size: subsample size (or list of sizes) we take on each simulation step, if None then take
+    length(variable). Default = None
     :param experiments_num: number of simulations for estimation, default = 5000
     :param metric_f: function to take from subsample, default = numpy.mean(). Additional args could be given using
     metric_kwargs parameter
     :param do_plot_distribution: whether to plot distribution or not, default = True
-    :return: p-value of Shapiro-Wilk test for normality
+    :param random_state: seed for subsamples, default = None
+    :param memory_budget_mb: memory limit for one block of subsamples, megabytes, default = 256
+    :return: p-value of Shapiro-Wilk test for normality, or dictionary {sample size: p-value} if list of sizes given
     """
+    # pylint: disable=import-outside-toplevel
+    from scipy.stats import shapiro
+
+    from abtoolkit.bootstrap import bootstrap
 
-    sample_size = len(variable) if sample_size is None else sample_size
-    values = []
-    for _ in tqdm(range(experiments_num)):
-        sample = np.random.choice(variable, size=sample_size, replace=True)
-        values.append(metric_f(sample, **metric_f_kwargs))
+    plt = _get_pyplot() if do_plot_distribution else None
+    sample_sizes = [len(variable) if sample_size is None else sample_size] if np.ndim(sample_size) == 0 else sample_size
+    rng = np.random.default_rng(random_state)
 
-    # Shapiro-Wilk test
-    res = shapiro(values)
+    if do_plot_distribution:
+        _, axes = plt.subplots(len(sample_sizes), 1, figsize=(8, 4 * len(sample_sizes)), squeeze=False)
+
+    pvalues = {}
+    for i, size in enumerate(progress_bar(sample_sizes)):
+        values = bootstrap(
+            variable, size, experiments_num, metric_f, memory_budget_mb, random_state=rng, **metric_f_kwargs
+        )
+        # Shapiro-Wilk test
+        pvalues[size] = shapiro(values).pvalue
+
+        if do_plot_distribution:
+            axes[i, 0].hist(values, bins=100)
+            axes[i, 0].set_title(
+                f"Distribution for {metric_f.__name__}, sample size {size}. Normality p-value: {pvalues[size]}"
+            )
 
     if do_plot_distribution:
-        plt.hist(values, bins=100)
-        plt.title(f"Distribution for {metric_f.__name__}. Normality p-value: {res.pvalue}")
+        plt.tight_layout()
         plt.show()
 
-    return res.pvalue
+    return pvalues if np.ndim(sample_size) else pvalues[sample_sizes[0]]
 
 
 def generate_data(
@@ -96,6 +130,51 @@ def generate_data(
     return result_sr
 
 
+def _pvalues_ecdf(pvalues: np.ndarray, points_num: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Empirical CDF of p-values (share of p-values lower than x) by one sort and binary search
+    :param pvalues: p-values
+    :param points_num: number of evenly spaced points on [0, 1], if None then CDF is evaluated at every p-value
+    :return: x values, CDF values
+    """
+    sorted_pvalues = np.sort(np.asarray(pvalues))
+    if points_num is None:
+        x_axis = np.concatenate([[0], sorted_pvalues, [1]])
+    else:
+        x_axis = np.linspace(0, 1, points_num)
+    return x_axis, np.searchsorted(sorted_pvalues, x_axis, side="left") / max(len(sorted_pvalues), 1)
+
+
+def _concatenate_pvalues(
+    tests_pvalues: Dict[str, Tuple[List[np.ndarray], List[np.ndarray]]], dtype: type
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Concatenate p-values collected by parts (blocks of experiments or workers)
+    :param tests_pvalues: dictionary test name -> (list of AA p-values parts, list of AB p-values parts)
+    :param dtype: dtype of p-values
+    :return: dictionary test name -> (AA p-values, AB p-values)
+    """
+    return {
+        test_name: tuple(np.concatenate(parts, dtype=dtype) if parts else np.empty(0, dtype=dtype) for parts in groups)
+        for test_name, groups in tests_pvalues.items()
+    }
+
+
+def _estimate_rejection_rate(
+    pvalues: np.ndarray, alpha_level: float
+) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Share of experiments where test rejects null hypothesis with confidence interval, experiments where
+    test can't be performed (np.nan p-values) are skipped
+    :param pvalues: array of p-values, experiments are along last axis
+    :param alpha_level: test alpha-level
+    :return: array of rejection rates, low and high confidence interval arrays
+    """
+    performed_num = np.maximum(np.sum(~np.isnan(pvalues), axis=-1), 1)
+    rate = np.sum(pvalues < alpha_level, axis=-1) / performed_num
+    return rate, estimate_ci_binomial(rate, performed_num, alpha=0.05)
+
+
 class BaseSimulationClass:
     """
     Virtual class for AA and AB tests simulation
@@ -111,34 +190,64 @@ class BaseSimulationClass:
         mde: float,
         alpha_level: float = 0.05,
         power: float = 0.8,
+        vectorized: bool = False,
+        n_jobs: int = 1,
+        executor: Executor = None,
+        random_state: int = None,
+        common_random_numbers: bool = False,
+        shared_sampling: bool = False,
+        pvalues_dtype: type = np.float64,
+        analytic: bool = False,
+        cross_validate: bool = False,
     ):
         self.treatment_sample_size = treatment_sample_size
+        self.treatment_split_proportion = treatment_split_proportion
         self.alternative = alternative
         self.mde = mde
         self.power = power
         self.alpha_level = alpha_level
         self.stattests_list = stattests_list
         self.experiments_num = experiments_num
+        self.vectorized = vectorized
+        self.common_random_numbers = common_random_numbers
+        self.shared_sampling = shared_sampling
+        self.pvalues_dtype = pvalues_dtype
+        self.analytic = analytic
+        self.cross_validate = cross_validate
+        self.n_jobs = n_jobs
+        self.executor = executor
+        self.seed_sequence = np.random.SeedSequence(random_state)
+        self.rng = np.random.default_rng(self.seed_sequence)
         self.info = {}
         self.stattests_func_map = {}
-
-        control_group_increase_coef = (1 - treatment_split_proportion) / treatment_split_proportion
-        self.control_sample_size = int(self.treatment_sample_size * control_group_increase_coef)
-
-    def plot_p_values(self):
+        # Batch versions of stattests, take (mdes, experiments_num, samples), sample experiments once
+        # (if samples are not given by `_sample_batch_for_tests`) and return array of p-values with shape
+        # (len(mdes), experiments_num) for each mde added to treatment (np.nan for experiments where test
+        # can't be performed). Used if `vectorized`, `common_random_numbers` or `shared_sampling` is True
+        self.stattests_batch_func_map = {}
+        # Closed forms of stattests, take mde and return distribution of test statistic (df, loc, scale):
+        # noncentral t with `df` degrees of freedom and noncentrality `loc` or normal with `loc` and `scale`
+        # if df is None. Used instead of simulation if `analytic` is True
+        self.stattests_analytic_func_map = {}
+        self._disable_progress_bar = False
+        self._parallel_executor = None
+        self._shared_arrays_spec = None
+
+        self.control_sample_size = self._get_control_sample_size(self.treatment_sample_size)
+
+    def plot_p_values(self, points_num: int = 1000):
         """
-        Plot p-values distribution for each test
+        Plot p-values distribution (empirical CDF) for each test
+        :param points_num: number of points to plot for each test, if None then all steps of empirical CDF are plotted
         :return: None
         """
         if len(self.info) == 0:
             return
 
+        plt = _get_pyplot()
         # AB
-        x_axis = np.linspace(0, 1, 1000)
         for test, test_info in self.info.items():
-            ab_pvalues = np.array(test_info["ab_pvalues"])
-            y_axis = [np.mean(ab_pvalues < x) for x in x_axis]
-            plt.plot(x_axis, y_axis, label=test)
+            plt.plot(*_pvalues_ecdf(test_info["ab_pvalues"], points_num), label=test)
 
         plt.plot([self.alpha_level, self.alpha_level], [0, 1], "--k", alpha=0.8)
         plt.plot([0, 1], [self.power, self.power], "--k", alpha=0.8)
@@ -150,9 +259,7 @@ class BaseSimulationClass:
 
         # AA
         for test, test_info in self.info.items():
-            aa_pvalues = np.array(test_info["aa_pvalues"])
-            y_axis = [np.mean(aa_pvalues < x) for x in x_axis]
-            plt.plot(x_axis, y_axis, label=test)
+            plt.plot(*_pvalues_ecdf(test_info["aa_pvalues"], points_num), label=test)
         plt.plot([0, 1], [0, 1], "--k", alpha=0.8)
         plt.title("P-Value Distribution for AA Simulation", size=12)
         plt.xlabel("p-value", size=10)
@@ -177,53 +284,302 @@ class BaseSimulationClass:
                 # success
                 print("\033[92m" + f"'{test_name}'; alpha={a} [{aci1}; {aci2}], power={p} [{pci1}; {pci2}]" + "\033[0m")
 
+            if "simulation" in test_info:
+                # Analytic values are checked to lie in confidence intervals of simulated ones
+                sim_info = test_info["simulation"]
+                agrees = (sim_info["alpha_ci"][0] <= a <= sim_info["alpha_ci"][1]) and (
+                    sim_info["power_ci"][0] <= p <= sim_info["power_ci"][1]
+                )
+                print(
+                    f"    simulated: alpha={sim_info['alpha']} [{round(sim_info['alpha_ci'][0], 4)}; "
+                    f"{round(sim_info['alpha_ci'][1], 4)}], power={sim_info['power']} "
+                    f"[{round(sim_info['power_ci'][0], 4)}; {round(sim_info['power_ci'][1], 4)}]"
+                    f"{'' if agrees else ' - analytic values are out of simulated confidence intervals'}"
+                )
+            if test_info.get("aa_skipped", 0) > 0 or test_info.get("ab_skipped", 0) > 0:
+                print(
+                    f"    test can't be performed in {test_info['aa_skipped']} AA and {test_info['ab_skipped']} AB "
+                    f"experiments, they are skipped"
+                )
+            if "analytic_error" in test_info:
+                print(f"    simulated, closed form can't be calculated: {test_info['analytic_error']}")
+
     def run(self):
         """
         Simulate all tests from 'self.stattests_list' by given data and save information to 'info' dictionary
         :return:
         """
         self.info = {}
-        for stattest in self.stattests_list:
-            self.simulate_test_by_name(stattest)
+        analytic_tests = [t for t in self.stattests_list if self.analytic and t in self.stattests_analytic_func_map]
+        simulated_tests = [t for t in self.stattests_list if t not in analytic_tests or self.cross_validate]
+        with self._parallel_resources():
+            if self.shared_sampling:
+                # Tests with batch versions are simulated together on the same samples
+                shared_tests = [t for t in simulated_tests if t in self.stattests_batch_func_map]
+                if len(shared_tests) > 0:
+                    self._simulate_tests(shared_tests)
+            for stattest in simulated_tests:
+                if stattest not in self.info:
+                    self.simulate_test_by_name(stattest)
+        for stattest in analytic_tests:
+            self._save_analytic_test_info(stattest)
+        self.info = {test_name: self.info[test_name] for test_name in self.stattests_list}
         return self.info
 
     def simulate_test_by_name(self, test_name: str):
         """
         Simulate AA and AB test and save results to 'info' dictionary
         :param test_name: name of test for simulation (ttest | cuped_ttest | regression_test | did_regression_test
-                                                        | additional_vars_regression_test)
+                                                        | additional_vars_regression_test | ratio_ttest)
         :return: None
         """
+        self._simulate_tests([test_name])
 
-        assert test_name in self.stattests_func_map, f"Given test_name {test_name} not found"
-        stattest_func = self.stattests_func_map[test_name]
-
-        test_success_no_effect_cnt = 0
-        test_pvalues_no_effect = []
-        test_success_effect_cnt = 0
-        test_pvalues_effect = []
+    def estimate_sample_size_by_simulation(
+        self,
+        test_name: str,
+        power: float = None,
+        min_sample_size: int = 10,
+        max_sample_size: int = None,
+        tolerance: float = 0.02,
+        min_experiments_num: int = 200,
+        max_experiments_num: int = None,
+        candidates_num: int = 8,
+    ) -> dict:
+        """
+        Search treatment sample size giving `power` for test without closed-form formula (control group size
+        follows `treatment_split_proportion`). On each step `candidates_num` sizes from current bracket are
+        simulated at once: experiments are sampled for the largest size and smaller sizes take nested prefixes
+        of the same samples. Bracket is narrowed to sizes which power confidence intervals don't separate from
+        target power, number of experiments is multiplied by 4 (up to `max_experiments_num`) when confidence
+        intervals are too wide to halve the bracket
+        :param test_name: name of test having batch version
+        :param power: target power, if None then `power` of simulation is used
+        :param min_sample_size: low bound of treatment sample size
+        :param max_sample_size: high bound of treatment sample size, if None then `treatment_sample_size` is used
+        :param tolerance: relative width of sample size confidence interval to stop search at
+        :param min_experiments_num: number of experiments on first step
+        :param max_experiments_num: limit of experiments number, if None then `experiments_num` is used
+        :param candidates_num: number of sizes simulated on each step
+        :return: dictionary with treatment and control sample sizes, confidence interval of treatment sample size,
+        power estimation with confidence interval at nearest simulated size and number of experiments on last step
+        """
+        power = self.power if power is None else power
+        max_sample_size = self.treatment_sample_size if max_sample_size is None else max_sample_size
+        max_experiments_num = self.experiments_num if max_experiments_num is None else max_experiments_num
+        experiments_num = min(min_experiments_num, max_experiments_num)
+        low, high = min_sample_size, max_sample_size
+
+        while True:
+            sizes = np.unique(np.linspace(low, high, candidates_num).round().astype(int))
+            group_sizes = [(self._get_control_sample_size(size), size) for size in sizes]
+            pvalues = self._simulate_nested_pvalues([test_name], group_sizes, [self.mde], experiments_num)[test_name]
+            powers, (powers_ci_low, powers_ci_high) = _estimate_rejection_rate(pvalues[:, 0], self.alpha_level)
+            if high == max_sample_size and powers_ci_high[-1] < power:
+                raise ValueError(f"power {power} is not reached with max_sample_size={max_sample_size}")
+
+            reached = powers_ci_low >= power
+            new_high = sizes[reached][0] if reached.any() else high
+            not_reached = (powers_ci_high < power) & (sizes < new_high)
+            new_low = sizes[not_reached][-1] if not_reached.any() else low
+
+            converged = new_high - new_low <= max(tolerance * new_high, 1)
+            noisy = new_high - new_low > (high - low) / 2
+            if converged or (noisy and experiments_num >= max_experiments_num):
+                break
+            if noisy:
+                experiments_num = min(experiments_num * 4, max_experiments_num)
+            low, high = int(new_low), int(new_high)
+
+        # Sample size is interpolated between simulated sizes around target power
+        crossed = np.flatnonzero(powers >= power)
+        i = crossed[0] if len(crossed) > 0 else len(sizes) - 1
+        sample_size = sizes[i]
+        if 0 < i < len(sizes) and powers[i] > powers[i - 1]:
+            share = (power - powers[i - 1]) / (powers[i] - powers[i - 1])
+            sample_size = int(np.ceil(sizes[i - 1] + share * (sizes[i] - sizes[i - 1])))
+        sample_size = int(np.clip(sample_size, new_low, new_high))
+        return {
+            "treatment_sample_size": sample_size,
+            "control_sample_size": self._get_control_sample_size(sample_size),
+            "treatment_sample_size_ci": (int(new_low), int(new_high)),
+            "power": float(powers[i]),
+            "power_ci": (float(powers_ci_low[i]), float(powers_ci_high[i])),
+            "experiments_num": experiments_num,
+        }
 
-        for _ in tqdm(range(self.experiments_num), desc=f"Simulation test '{test_name}'"):
-            try:
-                p_value = stattest_func(mde=0)
-            except ValueError as e:
-                print(f"error accured in test {test_name}: {e}")
-                continue
+    def estimate_mde_by_simulation(
+        self,
+        test_name: str,
+        power: float = None,
+        max_mde: float = None,
+        tolerance: float = 0.01,
+        candidates_num: int = 8,
+    ) -> dict:
+        """
+        Search minimal detectable effect giving `power` for test with current groups sizes by simulation.
+        Experiments are sampled once and p-values for sequence of mdes are calculated on the same samples
+        (mean-based tests update moments by mde shift instead of calculating test again). On each step
+        `candidates_num` mdes are taken from brackets around target power and bounds of its confidence
+        interval, brackets are narrowed until their relative width is less than `tolerance`
+        :param test_name: name of test having batch version
+        :param power: target power, if None then `power` of simulation is used
+        :param max_mde: high bound of mde to start search from, if None then `mde` of simulation is used.
+        Bound is doubled while power is not reached
+        :param tolerance: relative width of brackets to stop search at
+        :param candidates_num: number of mdes simulated in each bracket on each step
+        :return: dictionary with mde (positive for 'less' alternative, negative for 'greater' and with sign of `mde`
+        for 'two-sided'), mde confidence interval, power and alpha on simulated samples
+        """
+        power = self.power if power is None else power
+        max_mde = abs(self.mde if max_mde is None else max_mde)
+        if max_mde == 0:
+            raise ValueError("mde or max_mde should be non-zero to start search from")
+        # Treatment is greater than control for 'less' alternative (statistic is control minus treatment)
+        direction = {"less": 1.0, "greater": -1.0}.get(self.alternative, np.sign(self.mde) or 1.0)
+
+        group_sizes = [(self.control_sample_size, self.treatment_sample_size)]
+        samples_cache = {}
+        evaluated_mdes, evaluated_powers = np.array([]), np.array([])
+
+        def simulate_powers(mdes: np.ndarray) -> np.ndarray:
+            nonlocal evaluated_mdes, evaluated_powers
+            pvalues = self._simulate_nested_pvalues(
+                [test_name], group_sizes, list(direction * mdes), self.experiments_num, samples_cache
+            )[test_name]
+            powers, _ = _estimate_rejection_rate(pvalues[0], self.alpha_level)
+            evaluated_mdes = np.concatenate([evaluated_mdes, mdes])
+            evaluated_powers = np.concatenate([evaluated_powers, powers])
+            return powers
+
+        alpha = float(simulate_powers(np.array([0.0]))[0])
+        # Power levels which confidence intervals bounds hit target power
+        half_width = special.ndtri(0.975) * np.sqrt(power * (1 - power) / self.experiments_num)
+        targets = [max(power - half_width, 0), power, min(power + half_width, 1)]
+        for _ in range(30):
+            if simulate_powers(np.array([max_mde]))[0] >= targets[-1]:
+                break
+            max_mde *= 2
+        else:
+            raise ValueError(f"power {power} is not reached with mde up to {max_mde}")
+
+        while True:
+            order = np.argsort(evaluated_mdes, kind="stable")
+            mdes, powers = evaluated_mdes[order], np.maximum.accumulate(evaluated_powers[order])
+            brackets = []
+            for target in targets:
+                i = np.searchsorted(powers, target)
+                brackets.append((mdes[max(i - 1, 0)], mdes[i]))
+            if all(high - low <= tolerance * high for low, high in brackets):
+                break
+            candidates = np.unique(
+                np.concatenate(
+                    [np.linspace(low, high, candidates_num + 2)[1:-1] for low, high in brackets if high - low > 0]
+                )
+            )
+            simulate_powers(candidates)
+
+        (_, ci_low), (_, mde), (_, ci_high) = brackets
+        return {
+            "mde": float(direction * mde),
+            "mde_ci": tuple(sorted([float(direction * ci_low), float(direction * ci_high)])),
+            "power": float(powers[np.searchsorted(mdes, mde)]),
+            "alpha": alpha,
+            "experiments_num": self.experiments_num,
+        }
 
-            test_pvalues_no_effect.append(p_value)
-            if p_value < self.alpha_level:
-                test_success_no_effect_cnt += 1
+    def simulate_power_surface(
+        self,
+        mdes: List[float],
+        treatment_sample_sizes: List[int],
+        treatment_split_proportions: List[float] = None,
+        stattests_list: List[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Simulate alpha and power of tests for all combinations of mdes, treatment sample sizes and split proportions
+        on common random numbers: each block of experiments is sampled once for the largest groups, smaller groups
+        take nested prefixes of the samples and mdes are added to the same samples, so the whole grid costs about
+        one simulation with the largest groups. Tests need batch versions
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param treatment_sample_sizes: numbers of examples in treatment group
+        :param treatment_split_proportions: proportions of ab split for test group, if None then
+        `treatment_split_proportion` of simulation is used
+        :param stattests_list: tests to simulate, if None then `stattests_list` of simulation is used
+        :return: dataframe with row for each test and grid point: test, mde, treatment_sample_size,
+        treatment_split_proportion, control_sample_size, alpha, alpha_ci_low, alpha_ci_high, power, power_ci_low,
+        power_ci_high
+        """
+        stattests_list = self.stattests_list if stattests_list is None else stattests_list
+        if treatment_split_proportions is None:
+            treatment_split_proportions = [self.treatment_split_proportion]
+
+        grid = [
+            (treatment_size, proportion, self._get_control_sample_size(treatment_size, proportion))
+            for proportion in treatment_split_proportions
+            for treatment_size in treatment_sample_sizes
+        ]
+        group_sizes = [(control_size, treatment_size) for treatment_size, _, control_size in grid]
+        tests_pvalues = self._simulate_nested_pvalues(
+            stattests_list, group_sizes, [0] + list(mdes), self.experiments_num
+        )
+
+        rows = []
+        for test_name, pvalues in tests_pvalues.items():
+            rates, (rates_ci_low, rates_ci_high) = _estimate_rejection_rate(pvalues, self.alpha_level)
+            for i, (treatment_size, proportion, control_size) in enumerate(grid):
+                for j, mde in enumerate(mdes, start=1):
+                    rows.append(
+                        {
+                            "test": test_name,
+                            "mde": mde,
+                            "treatment_sample_size": treatment_size,
+                            "treatment_split_proportion": proportion,
+                            "control_sample_size": control_size,
+                            "alpha": rates[i, 0],
+                            "alpha_ci_low": rates_ci_low[i, 0],
+                            "alpha_ci_high": rates_ci_high[i, 0],
+                            "power": rates[i, j],
+                            "power_ci_low": rates_ci_low[i, j],
+                            "power_ci_high": rates_ci_high[i, j],
+                        }
+                    )
+        return pd.DataFrame(rows)
+
+    def _simulate_tests(self, test_names: List[str]):
+        """
+        Simulate AA and AB tests (on shared samples if several tests given) and save results to 'info' dictionary
+        :param test_names: names of tests for simulation
+        :return: None
+        """
+        for test_name in test_names:
+            assert test_name in self.stattests_func_map, f"Given test_name {test_name} not found"
 
-            p_value = stattest_func(mde=self.mde)
-            test_pvalues_effect.append(p_value)
-            if p_value < self.alpha_level:
-                test_success_effect_cnt += 1
+        if self.n_jobs > 1:
+            tests_pvalues = self._simulate_tests_parallel(test_names)
+        else:
+            tests_pvalues = self._simulate_tests_pvalues(test_names)
 
-        alpha = test_success_no_effect_cnt / self.experiments_num
-        power = test_success_effect_cnt / self.experiments_num
+        for test_name, (test_pvalues_no_effect, test_pvalues_effect) in tests_pvalues.items():
+            self._save_test_info(test_name, test_pvalues_no_effect, test_pvalues_effect)
 
-        alpha_ci = estimate_ci_binomial(alpha, self.experiments_num, alpha=0.05)
-        power_ci = estimate_ci_binomial(power, self.experiments_num, alpha=0.05)
+    def _save_test_info(self, test_name: str, test_pvalues_no_effect: np.ndarray, test_pvalues_effect: np.ndarray):
+        """
+        Estimate alpha and power by p-values and save them to 'info' dictionary, experiments where test can't be
+        performed (np.nan p-values or dropped ones) are skipped and counted in 'aa_skipped' and 'ab_skipped' fields.
+        P-values are kept as numpy arrays of `pvalues_dtype`
+        :param test_name: name of test
+        :param test_pvalues_no_effect: AA p-values
+        :param test_pvalues_effect: AB p-values
+        :return: None
+        """
+        test_pvalues_no_effect = np.asarray(test_pvalues_no_effect, dtype=self.pvalues_dtype)
+        test_pvalues_effect = np.asarray(test_pvalues_effect, dtype=self.pvalues_dtype)
+        # Rates are estimated the same way as in searches: experiments where test can't be performed are skipped
+        alpha, alpha_ci = _estimate_rejection_rate(test_pvalues_no_effect, self.alpha_level)
+        power, power_ci = _estimate_rejection_rate(test_pvalues_effect, self.alpha_level)
+        alpha, power = float(alpha), float(power)
+        alpha_ci = (float(alpha_ci[0]), float(alpha_ci[1]))
+        power_ci = (float(power_ci[0]), float(power_ci[1]))
 
         if test_name in self.info:
             del self.info[test_name]
@@ -234,4 +590,394 @@ class BaseSimulationClass:
             "power_ci": power_ci,
             "aa_pvalues": test_pvalues_no_effect,
             "ab_pvalues": test_pvalues_effect,
+            "aa_skipped": self.experiments_num - int(np.sum(~np.isnan(test_pvalues_no_effect))),
+            "ab_skipped": self.experiments_num - int(np.sum(~np.isnan(test_pvalues_effect))),
+        }
+
+    def _save_analytic_test_info(self, test_name: str):
+        """
+        Calculate alpha and power of test by closed form and save them to 'info' dictionary with synthetic p-values
+        (quantiles of p-value distribution, experiments_num values). Results of simulation of the test
+        (if it was cross-validated) are kept in 'simulation' field. If closed form can't be calculated, test is
+        simulated and the error is kept in 'analytic_error' field
+        :param test_name: name of test
+        :return: None
+        """
+        try:
+            aa_distribution = self.stattests_analytic_func_map[test_name](mde=0)
+            ab_distribution = self.stattests_analytic_func_map[test_name](mde=self.mde)
+        except ValueError as e:
+            if test_name not in self.info:
+                self.simulate_test_by_name(test_name)
+            self.info[test_name]["analytic_error"] = str(e)
+            return
+
+        simulation_info = self.info.pop(test_name, None)
+        alpha = float(_analytic_rejection_probability(*aa_distribution, self.alpha_level, self.alternative))
+        power = float(_analytic_rejection_probability(*ab_distribution, self.alpha_level, self.alternative))
+        self.info[test_name] = {
+            "alpha": alpha,
+            "alpha_ci": (alpha, alpha),
+            "power": power,
+            "power_ci": (power, power),
+            "aa_pvalues": _analytic_pvalues(*aa_distribution, self.alternative, self.experiments_num).astype(
+                self.pvalues_dtype
+            ),
+            "ab_pvalues": _analytic_pvalues(*ab_distribution, self.alternative, self.experiments_num).astype(
+                self.pvalues_dtype
+            ),
+            "analytic": True,
+        }
+        if simulation_info is not None:
+            self.info[test_name]["simulation"] = simulation_info
+
+    def _simulate_tests_pvalues(self, test_names: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Simulate AA and AB tests in current process. Tests with batch versions are simulated by blocks
+        (sharing samples between tests), other tests experiment by experiment
+        :param test_names: names of tests for simulation
+        :return: dictionary test name -> (AA p-values, AB p-values)
+        """
+        use_batches = self.vectorized or self.common_random_numbers or self.shared_sampling
+        if use_batches and all(t in self.stattests_batch_func_map for t in test_names):
+            return self._simulate_tests_batches(test_names)
+        return {test_name: self._simulate_test_loop(test_name) for test_name in test_names}
+
+    def _simulate_tests_parallel(self, test_names: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Split experiments between `n_jobs` worker processes. Each worker gets its own random generator
+        spawned from `seed_sequence` and reads variables from shared memory. P-values from workers are merged
+        in order of chunks
+        :param test_names: names of tests for simulation
+        :return: dictionary test name -> (AA p-values, AB p-values)
+        """
+        with self._parallel_resources():
+            executor, shared_arrays_spec = self._parallel_executor, self._shared_arrays_spec
+
+            chunks = [len(c) for c in np.array_split(np.arange(self.experiments_num), self.n_jobs) if len(c) > 0]
+            seeds = self.seed_sequence.spawn(len(chunks))
+            worker_state = self._get_worker_state()
+            futures = [
+                executor.submit(
+                    _simulate_tests_chunk,
+                    type(self),
+                    worker_state,
+                    shared_arrays_spec,
+                    test_names,
+                    experiments_num,
+                    seed,
+                )
+                for experiments_num, seed in zip(chunks, seeds)
+            ]
+
+            tests_pvalues = {test_name: ([], []) for test_name in test_names}
+            desc = f"Simulation tests {test_names} ({self.n_jobs} jobs)"
+            for future in progress_bar(futures, desc=desc, disable=self._disable_progress_bar):
+                for test_name, (aa_pvalues, ab_pvalues) in future.result().items():
+                    tests_pvalues[test_name][0].append(aa_pvalues)
+                    tests_pvalues[test_name][1].append(ab_pvalues)
+
+        return _concatenate_pvalues(tests_pvalues, self.pvalues_dtype)
+
+    @contextmanager
+    def _parallel_resources(self):
+        """
+        Context with process pool and shared memory copies of variables used by parallel simulation.
+        Resources are created once and reused by nested contexts (e.g. for all tests in `run`)
+        :return: None
+        """
+        if self.n_jobs <= 1 or self._parallel_executor is not None:
+            yield
+            return
+
+        shared_memories = []
+        try:
+            self._shared_arrays_spec = {}
+            for key, array in self._get_shared_arrays().items():
+                shared_memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+                shared_memories.append(shared_memory)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=shared_memory.buf)[:] = array
+                self._shared_arrays_spec[key] = (shared_memory.name, array.shape, array.dtype.str)
+
+            if self.executor is not None:
+                self._parallel_executor = self.executor
+                yield
+            else:
+                with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+                    self._parallel_executor = executor
+                    yield
+        finally:
+            self._parallel_executor = None
+            self._shared_arrays_spec = None
+            for shared_memory in shared_memories:
+                shared_memory.close()
+                shared_memory.unlink()
+
+    def _get_shared_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Numpy arrays to share with worker processes through shared memory instead of pickling
+        :return: dictionary name -> array
+        """
+        return {}
+
+    def _set_shared_arrays(self, arrays: Dict[str, np.ndarray]):
+        """
+        Restore variables in worker process from arrays given by `_get_shared_arrays`
+        :param arrays: dictionary name -> array
+        :return: None
+        """
+
+    def _get_worker_state(self) -> dict:
+        """
+        Attributes to pickle and send to worker processes. Stattests functions are sent by names
+        and variables are passed through shared memory
+        :return: dictionary with attributes
+        """
+        excluded = {"info", "executor", "rng", "seed_sequence", "_parallel_executor", "_shared_arrays_spec"}
+        state = {k: v for k, v in self.__dict__.items() if k not in excluded}
+        state["stattests_func_map"] = {k: f.__name__ for k, f in self.stattests_func_map.items()}
+        state["stattests_batch_func_map"] = {k: f.__name__ for k, f in self.stattests_batch_func_map.items()}
+        state["stattests_analytic_func_map"] = {k: f.__name__ for k, f in self.stattests_analytic_func_map.items()}
+        return state
+
+    def _simulate_test_loop(self, test_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Simulate AA and AB test experiment by experiment
+        :param test_name: name of test for simulation
+        :return: AA p-values, AB p-values
+        """
+        stattest_func = self.stattests_func_map[test_name]
+
+        test_pvalues_no_effect = np.empty(self.experiments_num, dtype=self.pvalues_dtype)
+        test_pvalues_effect = np.empty(self.experiments_num, dtype=self.pvalues_dtype)
+        success_num = 0
+
+        for _ in progress_bar(
+            range(self.experiments_num), desc=f"Simulation test '{test_name}'", disable=self._disable_progress_bar
+        ):
+            # The same random numbers give the same samples for AA and AB tests
+            rng_state = self.rng.bit_generator.state
+            try:
+                p_value = stattest_func(mde=0)
+            except ValueError as e:
+                print(f"error accured in test {test_name}: {e}")
+                continue
+
+            test_pvalues_no_effect[success_num] = p_value
+            if self.common_random_numbers:
+                self.rng.bit_generator.state = rng_state
+            test_pvalues_effect[success_num] = stattest_func(mde=self.mde)
+            success_num += 1
+
+        return test_pvalues_no_effect[:success_num], test_pvalues_effect[:success_num]
+
+    def _simulate_tests_batches(self, test_names: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Simulate AA and AB tests by blocks of experiments using batch versions of stattests.
+        Samples of each block are drawn once and shared between all given tests.
+        Block size is limited by `_get_batch_size` to bound memory usage
+        :param test_names: names of tests for simulation
+        :return: dictionary test name -> (AA p-values, AB p-values)
+        """
+        batch_size = min(self._get_batch_size(test_name) for test_name in test_names)
+        # AA and AB tests on the same samples or on independent ones
+        mdes_groups = [[0, self.mde]] if self.common_random_numbers else [[0], [self.mde]]
+
+        tests_pvalues = {test_name: ([], []) for test_name in test_names}
+        for start in progress_bar(
+            range(0, self.experiments_num, batch_size),
+            desc=f"Simulation test{'s' if len(test_names) > 1 else ''} '{', '.join(test_names)}'",
+            disable=self._disable_progress_bar,
+        ):
+            experiments_num = min(batch_size, self.experiments_num - start)
+            block_pvalues = {test_name: [] for test_name in test_names}
+            for mdes in mdes_groups:
+                # Samples are None if subclass doesn't share them, then batch stattests sample block by themselves
+                samples = self._sample_batch_for_tests(  # pylint: disable=assignment-from-none
+                    test_names, mdes, experiments_num
+                )
+                for test_name in test_names:
+                    if block_pvalues[test_name] is None:
+                        continue
+                    batch_func = self.stattests_batch_func_map[test_name]
+                    try:
+                        block_pvalues[test_name].extend(
+                            batch_func(mdes=mdes, experiments_num=experiments_num, samples=samples)
+                        )
+                    except ValueError as e:
+                        print(f"error accured in test {test_name}: {e}")
+                        block_pvalues[test_name] = None
+
+            for test_name, pvalues in block_pvalues.items():
+                if pvalues is None:
+                    continue
+                aa_pvalues, ab_pvalues = pvalues
+                success = ~(np.isnan(aa_pvalues) | np.isnan(ab_pvalues))
+                tests_pvalues[test_name][0].append(aa_pvalues[success].astype(self.pvalues_dtype))
+                tests_pvalues[test_name][1].append(ab_pvalues[success].astype(self.pvalues_dtype))
+
+        return _concatenate_pvalues(tests_pvalues, self.pvalues_dtype)
+
+    def _sample_batch_for_tests(  # pylint: disable=unused-argument
+        self, test_names: List[str], mdes: List[float], experiments_num: int
+    ):
+        """
+        Sample block of experiments once for several tests, result is given to batch versions of stattests
+        as `samples` argument. By default samples are not shared and each batch stattest samples block by itself
+        :param test_names: names of tests to sample data for
+        :param mdes: minimal detectable effects the block is simulated for
+        :param experiments_num: number of experiments in block
+        :return: samples for batch versions of stattests (None if tests sample data by themselves)
+        """
+        return None
+
+    def _get_batch_size(self, test_name: str) -> int:  # pylint: disable=unused-argument
+        """
+        Number of experiments simulated at once in vectorized mode
+        :param test_name: name of test for simulation
+        :return: batch size
+        """
+        return max(self.experiments_num, 1)
+
+    def _get_control_sample_size(self, treatment_sample_size: int, treatment_split_proportion: float = None) -> int:
+        """
+        Size of control group for given treatment group size
+        :param treatment_sample_size: number of examples in treatment group
+        :param treatment_split_proportion: proportion of ab split for test group, if None then
+        `treatment_split_proportion` of simulation is used
+        :return: control sample size
+        """
+        if treatment_split_proportion is None:
+            treatment_split_proportion = self.treatment_split_proportion
+        control_group_increase_coef = (1 - treatment_split_proportion) / treatment_split_proportion
+        return int(treatment_sample_size * control_group_increase_coef)
+
+    @contextmanager
+    def _simulation_params(self, **params):
+        """
+        Context with simulation attributes (groups sizes, experiments number) temporarily set to given values
+        :param params: attributes names and values
+        :return: None
+        """
+        previous = {name: getattr(self, name) for name in params}
+        self.__dict__.update(params)
+        try:
+            yield
+        finally:
+            self.__dict__.update(previous)
+
+    def _simulate_nested_pvalues(
+        self,
+        test_names: List[str],
+        group_sizes: List[Tuple[int, int]],
+        mdes: List[float],
+        experiments_num: int,
+        samples_cache: dict = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Simulate AB tests for several groups sizes and mdes on common random numbers: block of experiments is
+        sampled once for the largest groups, smaller groups take nested samples of it (see `_get_nested_samples`)
+        and all mdes are added to the same samples
+        :param test_names: names of tests having batch versions
+        :param group_sizes: list of (control sample size, treatment sample size)
+        :param mdes: minimal detectable effects, to sum with test variable
+        :param experiments_num: number of experiments
+        :param samples_cache: dictionary to reuse samples between calls with the same tests, sizes and experiments
+        number. Samples are kept if all experiments fit into one block, otherwise random generator state of each
+        block is kept and block is sampled again
+        :return: dictionary test name -> array of p-values with shape (len(group_sizes), len(mdes), experiments_num)
+        (np.nan for experiments where test can't be performed)
+        """
+        # Nested sampling hooks are defined by subclasses which can take samples of smaller groups from larger ones
+        if not (hasattr(self, "_sample_nested_batch") and hasattr(self, "_get_nested_samples")):
+            raise ValueError(f"{type(self).__name__} doesn't support simulation on nested samples")
+        for test_name in test_names:
+            if test_name not in self.stattests_batch_func_map:
+                raise ValueError(f"Test {test_name} has no batch version to simulate on nested samples")
+
+        max_sizes = {
+            "control_sample_size": max(control_size for control_size, _ in group_sizes),
+            "treatment_sample_size": max(treatment_size for _, treatment_size in group_sizes),
+        }
+        with self._simulation_params(experiments_num=experiments_num, **max_sizes):
+            batch_size = min(self._get_batch_size(test_name) for test_name in test_names)
+
+        tests_pvalues = {
+            test_name: np.empty((len(group_sizes), len(mdes), experiments_num), dtype=self.pvalues_dtype)
+            for test_name in test_names
+        }
+        for start in progress_bar(
+            range(0, experiments_num, batch_size),
+            desc=f"Simulation test{'s' if len(test_names) > 1 else ''} '{', '.join(test_names)}' "
+            f"for {len(group_sizes)} sizes",
+            disable=self._disable_progress_bar,
+        ):
+            block = slice(start, min(start + batch_size, experiments_num))
+            samples = None if samples_cache is None else samples_cache.get(start)
+            if samples is None or isinstance(samples, dict):
+                if samples_cache is not None:
+                    self.rng.bit_generator.state = samples_cache.setdefault(start, self.rng.bit_generator.state)
+                with self._simulation_params(**max_sizes):
+                    samples = self._sample_nested_batch(test_names, block.stop - block.start)
+                if samples_cache is not None and batch_size >= experiments_num:
+                    samples_cache[start] = samples
+            for i, (control_size, treatment_size) in enumerate(group_sizes):
+                with self._simulation_params(control_sample_size=control_size, treatment_sample_size=treatment_size):
+                    nested_samples = self._get_nested_samples(samples, mdes)
+                    for test_name in test_names:
+                        tests_pvalues[test_name][i, :, block] = self.stattests_batch_func_map[test_name](
+                            mdes=mdes, experiments_num=block.stop - block.start, samples=nested_samples
+                        )
+        return tests_pvalues
+
+
+def _simulate_tests_chunk(
+    simulation_class: type,
+    state: dict,
+    shared_arrays_spec: Dict[str, Tuple[str, tuple, str]],
+    test_names: List[str],
+    experiments_num: int,
+    seed: np.random.SeedSequence,
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Worker function for parallel simulation. Restores simulation object from state and shared memory
+    and simulates `experiments_num` experiments with its own random generator
+    :param simulation_class: class of simulation object
+    :param state: simulation attributes given by `_get_worker_state`
+    :param shared_arrays_spec: dictionary name -> (shared memory name, shape, dtype) of shared arrays
+    :param test_names: names of tests for simulation
+    :param experiments_num: number of experiments to simulate in worker
+    :param seed: seed sequence for worker random generator
+    :return: dictionary test name -> (AA p-values, AB p-values)
+    """
+    shared_memories = {key: SharedMemory(name=spec[0]) for key, spec in shared_arrays_spec.items()}
+    try:
+        simulation = simulation_class.__new__(simulation_class)
+        simulation.__dict__.update(state)
+        simulation.stattests_func_map = {k: getattr(simulation, f) for k, f in state["stattests_func_map"].items()}
+        simulation.stattests_batch_func_map = {
+            k: getattr(simulation, f) for k, f in state["stattests_batch_func_map"].items()
+        }
+        simulation.stattests_analytic_func_map = {
+            k: getattr(simulation, f) for k, f in state["stattests_analytic_func_map"].items()
         }
+        simulation.experiments_num = experiments_num
+        simulation.n_jobs = 1
+        simulation.info = {}
+        simulation.rng = np.random.default_rng(seed)
+        simulation._disable_progress_bar = True  # pylint: disable=protected-access
+        simulation._set_shared_arrays(  # pylint: disable=protected-access
+            {
+                key: np.ndarray(shape, dtype=dtype, buffer=shared_memories[key].buf)
+                for key, (_, shape, dtype) in shared_arrays_spec.items()
+            }
+        )
+
+        result = simulation._simulate_tests_pvalues(test_names)  # pylint: disable=protected-access
+        del simulation
+    finally:
+        # Views on shared buffers must be released before closing
+        gc.collect()
+        for shared_memory in shared_memories.values():
+            shared_memory.close()
+    return result
@@ -0,0 +1,392 @@
+"""
+Compact representations of variables for simulation on large datasets
+"""
+
+from typing import Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from abtoolkit.continuous.summary import MomentSummary
+
+
+class ValueCountsVariable:
+    """
+    Variable stored as distinct values and their frequencies. Suitable for variables with low number of
+    distinct values (orders per user, sessions, rounded revenue): memory doesn't depend on number of objects
+    and samples are drawn from alias table in O(1) per sample
+    """
+
+    def __init__(self, values: np.ndarray, counts: np.ndarray, name: str = None):
+        """
+        Variable from distinct values and their frequencies
+        :param values: distinct values of variable
+        :param counts: number of objects with each value
+        :param name: name of variable
+        """
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.asarray(counts)
+        if values.ndim != 1 or values.shape != counts.shape:
+            raise ValueError("values and counts should be 1d arrays of the same length")
+        if (counts < 0).any() or counts.sum() <= 0:
+            raise ValueError("counts should be non-negative with positive sum")
+
+        nonzero = counts > 0
+        self.values = values[nonzero]
+        self.counts = counts[nonzero].astype(np.int64)
+        self.name = name
+        self._alias_table = None
+
+    @classmethod
+    def from_array(cls, variable: Union[np.ndarray, pd.Series], name: str = None) -> "ValueCountsVariable":
+        """
+        Compress raw variable, missing values are dropped
+        :param variable: raw values
+        :param name: name of variable, name of pd.Series by default
+        :return: compressed variable
+        """
+        name = getattr(variable, "name", None) if name is None else name
+        variable = np.asarray(variable, dtype=np.float64)
+        values, counts = np.unique(variable[~np.isnan(variable)], return_counts=True)
+        return cls(values, counts, name)
+
+    def __len__(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        """
+        Frequencies of values
+        """
+        return self.counts / self.counts.sum()
+
+    def mean(self) -> float:
+        """
+        Mean of variable
+        """
+        return float(self.probabilities @ self.values)
+
+    def var(self, ddof: int = 1) -> float:
+        """
+        Variance of variable
+        :param ddof: delta degrees of freedom
+        """
+        centered = self.values - self.mean()
+        return float(self.counts @ centered**2 / (len(self) - ddof))
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        Decompress variable to raw values (sorted by value)
+        :return: array with len(self) values
+        """
+        return np.repeat(self.values, self.counts)
+
+    def _get_alias_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Alias table for sampling (Vose's method): value i is taken with probability `threshold[i]`
+        after uniform choice of i, otherwise its alias is taken
+        :return: thresholds, aliases
+        """
+        if self._alias_table is None:
+            k = len(self.values)
+            scaled = self.probabilities * k
+            threshold = np.ones(k)
+            alias = np.arange(k)
+            small = list(np.flatnonzero(scaled < 1))
+            large = list(np.flatnonzero(scaled >= 1))
+            while small and large:
+                s, l = small.pop(), large.pop()
+                threshold[s] = scaled[s]
+                alias[s] = l
+                scaled[l] -= 1 - scaled[s]
+                (small if scaled[l] < 1 else large).append(l)
+            self._alias_table = threshold, alias
+        return self._alias_table
+
+    def sample(self, size: Union[int, Tuple[int, ...]], rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Sample values with replacement
+        :param size: shape of sample
+        :param rng: random generator
+        :return: array of sampled values
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        threshold, alias = self._get_alias_table()
+        index = rng.integers(0, len(self.values), size=size)
+        index = np.where(rng.random(size=size) < threshold[index], index, alias[index])
+        return self.values[index]
+
+    def sample_moments(
+        self, sample_size: int, size: int, rng: np.random.Generator = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mean and variance (ddof=1) of `size` samples with replacement without drawing samples themselves:
+        counts of values in each sample are drawn from multinomial distribution
+        :param sample_size: number of objects in sample
+        :param size: number of samples
+        :param rng: random generator
+        :return: array of means, array of variances
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        counts = rng.multinomial(sample_size, self.probabilities, size=size)
+        # Values are centered by variable mean for precision
+        center = self.mean()
+        centered = self.values - center
+        mean = counts @ centered / sample_size
+        var = (counts @ centered**2 - sample_size * mean**2) / (sample_size - 1)
+        return mean + center, var
+
+    def __repr__(self) -> str:
+        return f"ValueCountsVariable(name={self.name!r}, distinct_values={len(self.values)}, size={len(self)})"
+
+
+class ZeroInflatedVariable:
+    """
+    Sparse variable with most of values equal to zero (e.g. revenue per user): only rows with non-zero value
+    or covariant are stored. Samples take number of non-zero rows from binomial distribution and draw only them,
+    so sample moments are calculated in O(number of non-zero rows)
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        size: int,
+        covariant: np.ndarray = None,
+        name: str = None,
+    ):
+        """
+        Variable from its non-zero rows
+        :param values: values of variable in stored rows
+        :param size: number of objects including zero rows
+        :param covariant: values of covariant (previous period value, CUPED covariant) in stored rows,
+        rows which are not stored have zero value and zero covariant
+        :param name: name of variable
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 1:
+            raise ValueError("values should be 1d array")
+        if covariant is not None:
+            covariant = np.asarray(covariant, dtype=np.float64)
+            if covariant.shape != values.shape:
+                raise ValueError("values and covariant should have the same length")
+        if size < len(values) or size <= 0:
+            raise ValueError("size should be positive and not less than number of stored rows")
+
+        self.values = values
+        self.covariant = covariant
+        self.size = int(size)
+        self.name = name
+
+    @classmethod
+    def from_array(
+        cls,
+        variable: Union[np.ndarray, pd.Series],
+        covariant: Union[np.ndarray, pd.Series] = None,
+        name: str = None,
+    ) -> "ZeroInflatedVariable":
+        """
+        Compress dense variable by dropping rows with zero value and zero covariant
+        :param variable: dense values
+        :param covariant: dense covariant aligned with values
+        :param name: name of variable, name of pd.Series by default
+        :return: sparse variable
+        """
+        name = getattr(variable, "name", None) if name is None else name
+        variable = np.asarray(variable, dtype=np.float64)
+        if covariant is None:
+            return cls(variable[variable != 0], len(variable), name=name)
+
+        covariant = np.asarray(covariant, dtype=np.float64)
+        stored = (variable != 0) | (covariant != 0)
+        return cls(variable[stored], len(variable), covariant[stored], name)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def has_covariant(self) -> bool:
+        """
+        Variable keeps covariant
+        """
+        return self.covariant is not None
+
+    @property
+    def nonzero_probability(self) -> float:
+        """
+        Probability of stored (non-zero) row
+        """
+        return len(self.values) / self.size
+
+    def mean(self) -> float:
+        """
+        Mean of variable
+        """
+        return float(self.values.sum() / self.size)
+
+    def var(self, ddof: int = 1) -> float:
+        """
+        Variance of variable
+        :param ddof: delta degrees of freedom
+        """
+        mean = self.mean()
+        return float(
+            (np.sum((self.values - mean) ** 2) + (self.size - len(self.values)) * mean**2) / (self.size - ddof)
+        )
+
+    def to_numpy(self, covariant: bool = False) -> np.ndarray:
+        """
+        Decompress variable to dense values, stored rows go first
+        :param covariant: decompress covariant instead of variable
+        :return: array with len(self) values
+        """
+        values = self.covariant if covariant else self.values
+        return np.concatenate([values, np.zeros(self.size - len(values))])
+
+    def summary(self) -> MomentSummary:
+        """
+        Sufficient statistics of variable (and covariant) calculated from stored rows only
+        :return: summary for stattests on summaries (e.g. `ttest_from_summary`, `cuped_ttest_from_summary`)
+        """
+        zeros_num = self.size - len(self.values)
+        zeros = MomentSummary(zeros_num, 0, 0, *([0, 0, 0] if self.has_covariant else []))
+        if len(self.values) == 0:
+            return zeros
+        return MomentSummary.from_arrays(self.values, self.covariant).merge(zeros)
+
+    def _sample_stored_rows(
+        self, sample_size: int, size: int, rng: np.random.Generator
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sample stored rows for `size` samples at once
+        :param sample_size: number of objects in sample
+        :param size: number of samples
+        :param rng: random generator
+        :return: number of stored rows in each sample, indices of stored rows (samples go one after another)
+        """
+        stored_num = rng.binomial(sample_size, self.nonzero_probability, size=size)
+        index = rng.integers(0, len(self.values), size=stored_num.sum())
+        return stored_num, index
+
+    def sample(
+        self, size: Union[int, Tuple[int, int]], rng: np.random.Generator = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sample dense values with replacement. Stored rows are placed at random positions of each sample,
+        so any prefix of a sample is a sample of smaller size as well
+        :param size: size of sample or (number of samples, size of sample)
+        :param rng: random generator
+        :return: array of sampled values, array of sampled covariant (None if variable has no covariant)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        samples_num, sample_size = (None, size) if np.ndim(size) == 0 else size
+        stored = rng.random(size=(1 if samples_num is None else samples_num, sample_size)) < self.nonzero_probability
+        index = rng.integers(0, len(self.values), size=int(stored.sum()))
+
+        result = []
+        for values in [self.values, self.covariant]:
+            if values is None:
+                result.append(None)
+                continue
+            sample = np.zeros(stored.shape)
+            sample[stored] = values[index]
+            result.append(sample[0] if samples_num is None else sample)
+        return result[0], result[1]
+
+    def _sample_sums(self, sample_size: int, size: int, rng: np.random.Generator) -> dict:
+        """
+        Sums of values, squares and products of `size` samples calculated over sampled stored rows only.
+        Values are centered by mean of stored rows for precision
+        :param sample_size: number of objects in sample
+        :param size: number of samples
+        :param rng: random generator
+        :return: dictionary with arrays of numbers of sampled stored rows and centered sums
+        """
+        stored_num, index = self._sample_stored_rows(sample_size, size, rng)
+        sample_id = np.repeat(np.arange(size), stored_num)
+        values = self.values[index] - self._get_stored_mean(self.values)
+        sums = {
+            "n": stored_num,
+            "y": np.bincount(sample_id, weights=values, minlength=size),
+            "yy": np.bincount(sample_id, weights=values**2, minlength=size),
+        }
+        if self.has_covariant:
+            covariant = self.covariant[index] - self._get_stored_mean(self.covariant)
+            sums["x"] = np.bincount(sample_id, weights=covariant, minlength=size)
+            sums["xx"] = np.bincount(sample_id, weights=covariant**2, minlength=size)
+            sums["xy"] = np.bincount(sample_id, weights=values * covariant, minlength=size)
+        return sums
+
+    @staticmethod
+    def _get_stored_mean(values: np.ndarray) -> float:
+        """
+        Mean of stored rows, center of sums in `_sample_sums`
+        :param values: stored values or covariant
+        :return: mean (0 if there are no stored rows)
+        """
+        return float(values.mean()) if len(values) > 0 else 0.0
+
+    def _get_sample_moments(self, sums: dict, name: str, sample_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Mean and second central moment of samples: moments of sampled stored rows are merged with zero rows
+        (Chan et al. pairwise update, as in `MomentSummary.merge`)
+        :param sums: centered sums given by `_sample_sums`
+        :param name: name of sums ("y" for values, "x" for covariant)
+        :param sample_size: number of objects in sample
+        :return: array of means, array of second central moments, array of means of sampled stored rows
+        """
+        stored_num = sums["n"]
+        stored_centered_mean = sums[name] / np.maximum(stored_num, 1)
+        stored_m2 = sums[name * 2] - sums[name] * stored_centered_mean
+        stored_mean = stored_centered_mean + self._get_stored_mean(self.values if name == "y" else self.covariant)
+        return (
+            stored_mean * stored_num / sample_size,
+            stored_m2 + stored_mean**2 * stored_num * (sample_size - stored_num) / sample_size,
+            stored_mean,
+        )
+
+    def sample_moments(
+        self, sample_size: int, size: int, rng: np.random.Generator = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mean and variance (ddof=1) of `size` samples with replacement calculated over sampled non-zero rows only
+        :param sample_size: number of objects in sample
+        :param size: number of samples
+        :param rng: random generator
+        :return: array of means, array of variances
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        sums = self._sample_sums(sample_size, size, rng)
+        mean, m2, _ = self._get_sample_moments(sums, "y", sample_size)
+        return mean, m2 / (sample_size - 1)
+
+    def sample_covariant_moments(
+        self, sample_size: int, size: int, rng: np.random.Generator = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Moments of variable and covariant (ddof=1) of `size` samples with replacement calculated over
+        sampled non-zero rows only
+        :param sample_size: number of objects in sample
+        :param size: number of samples
+        :param rng: random generator
+        :return: arrays of variable means, covariant means, variable variances, covariant variances, covariances
+        """
+        if not self.has_covariant:
+            raise ValueError("Variable has no covariant")
+        rng = np.random.default_rng() if rng is None else rng
+        sums = self._sample_sums(sample_size, size, rng)
+        my, m2y, stored_my = self._get_sample_moments(sums, "y", sample_size)
+        mx, m2x, stored_mx = self._get_sample_moments(sums, "x", sample_size)
+        stored_num = sums["n"]
+        comoment = (
+            sums["xy"]
+            - sums["x"] * sums["y"] / np.maximum(stored_num, 1)
+            + stored_my * stored_mx * stored_num * (sample_size - stored_num) / sample_size
+        )
+        ddof_n = sample_size - 1
+        return my, mx, m2y / ddof_n, m2x / ddof_n, comoment / ddof_n
+
+    def __repr__(self) -> str:
+        return (
+            f"ZeroInflatedVariable(name={self.name!r}, stored_rows={len(self.values)}, size={self.size}, "
+            f"has_covariant={self.has_covariant})"
+        )
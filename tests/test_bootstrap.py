@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from abtoolkit.bootstrap import bootstrap
+from abtoolkit.variables import ValueCountsVariable, ZeroInflatedVariable
+
+
+class TestBootstrap(unittest.TestCase):
+    def setUp(self):
+        self.variable = np.random.default_rng(0).exponential(2, size=5000)
+
+    def test_bootstrap_mean(self):
+        values = bootstrap(self.variable, 1000, 2000, random_state=1)
+        self.assertEqual(values.shape, (2000,))
+        self.assertAlmostEqual(values.mean(), self.variable.mean(), delta=0.02)
+        self.assertAlmostEqual(values.std(), self.variable.std() / np.sqrt(1000), delta=0.01)
+
+    def test_bootstrap_memory_blocks(self):
+        # Tiny budget forces one resample per block, result should not depend on blocks
+        values = bootstrap(pd.Series(self.variable), 100, 50, np.quantile, memory_budget_mb=1e-6, random_state=1, q=0.5)
+        expected = bootstrap(self.variable, 100, 50, np.quantile, random_state=1, q=0.5)
+        np.testing.assert_allclose(values, expected)
+
+    def test_bootstrap_custom_metric(self):
+        values = bootstrap(self.variable, 100, 50, lambda x, k: np.sort(x)[-k], random_state=1, k=2)
+        axis_values = bootstrap(self.variable, 100, 50, np.max, random_state=1)
+        self.assertTrue(np.all(values <= axis_values))
+
+    def test_bootstrap_compressed_variables(self):
+        counts = ValueCountsVariable.from_array(np.random.default_rng(0).poisson(3, size=5000))
+        self.assertAlmostEqual(bootstrap(counts, 1000, 2000, random_state=1).mean(), counts.mean(), delta=0.02)
+        self.assertEqual(bootstrap(counts, 100, 30, np.median, random_state=1).shape, (30,))
+
+        sparse = ZeroInflatedVariable.from_array(np.where(self.variable > 4, self.variable, 0))
+        self.assertAlmostEqual(bootstrap(sparse, 1000, 2000, random_state=1).mean(), sparse.mean(), delta=0.02)
+        self.assertEqual(bootstrap(sparse, 100, 30, np.max, random_state=1).shape, (30,))
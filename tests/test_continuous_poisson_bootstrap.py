@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from abtoolkit.continuous.poisson_bootstrap import PoissonBootstrapSummary, poisson_bootstrap_test
+
+
+class TestPoissonBootstrap(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.control = rng.exponential(2, size=20000)
+        self.treatment = rng.exponential(2.2, size=20000)
+        self.bins = np.linspace(0, 30, 3001)
+
+    def test_mean(self):
+        summary = PoissonBootstrapSummary.from_array(self.control, replicates_num=500, random_state=1)
+        values = summary.get_metric_values()
+        self.assertEqual(values.shape, (500,))
+        self.assertAlmostEqual(values.mean(), self.control.mean(), delta=0.01)
+        self.assertAlmostEqual(values.std(), self.control.std() / np.sqrt(len(self.control)), delta=0.003)
+
+    def test_chunks_merge(self):
+        chunks = np.array_split(self.control, 7)
+        summary = PoissonBootstrapSummary.from_chunks(chunks, "quantile", 200, self.bins, q=0.9, random_state=1)
+        parallel_summary = PoissonBootstrapSummary.from_chunks(
+            iter(chunks), "quantile", 200, self.bins, q=0.9, random_state=1, n_jobs=2
+        )
+        np.testing.assert_allclose(summary.sums, parallel_summary.sums)
+        self.assertAlmostEqual(np.median(summary.get_metric_values()), np.quantile(self.control, 0.9), delta=0.1)
+
+        # Tiny memory budget splits chunks into many blocks of rows
+        blocks_summary = PoissonBootstrapSummary.from_array(
+            self.control[:100], metric="trimmed_mean", bins=self.bins, memory_budget_mb=0.01, random_state=1
+        )
+        self.assertEqual(blocks_summary.sums.shape, (1000, 2, 3000))
+
+        with self.assertRaises(ValueError):
+            summary.merge(PoissonBootstrapSummary.from_array(self.control, replicates_num=200))
+
+    def test_histogram_metrics(self):
+        values = np.arange(1, 101, dtype=float)
+        weights_one = PoissonBootstrapSummary("quantile", np.zeros((1, 2, 100)), np.arange(0.5, 101), q=0.5)
+        weights_one.sums[0, 0] = 1
+        weights_one.sums[0, 1] = values
+        self.assertAlmostEqual(weights_one.get_metric_values()[0], 50.5, delta=0.5)
+
+        weights_one.metric, weights_one.trim = "trimmed_mean", 0.1
+        self.assertAlmostEqual(weights_one.get_metric_values()[0], values[10:90].mean())
+
+    def test_ratio(self):
+        clicks = np.random.default_rng(1).poisson(self.control)
+        summary = PoissonBootstrapSummary.from_array(clicks, self.control, "ratio", 300, random_state=1)
+        self.assertAlmostEqual(np.mean(summary.get_metric_values()), clicks.sum() / self.control.sum(), delta=0.01)
+
+        with self.assertRaises(ValueError):
+            PoissonBootstrapSummary.from_array(clicks, metric="ratio")
+
+    def test_poisson_bootstrap_test(self):
+        control = PoissonBootstrapSummary.from_array(self.control, replicates_num=500, random_state=1)
+        treatment = PoissonBootstrapSummary.from_array(self.treatment, replicates_num=500, random_state=2)
+        p_value, (low, high) = poisson_bootstrap_test(control, treatment, "two-sided")
+        self.assertLess(p_value, 0.05)
+        self.assertLess(low, self.treatment.mean() - self.control.mean())
+        self.assertGreater(high, self.treatment.mean() - self.control.mean())
+
+        p_value, (low, high) = poisson_bootstrap_test(control, treatment, "greater")
+        self.assertGreater(p_value, 0.95)
+        self.assertEqual(low, -np.inf)
+
+        same_control = PoissonBootstrapSummary.from_array(self.control, replicates_num=500, random_state=3)
+        p_value, _ = poisson_bootstrap_test(control, same_control, "two-sided")
+        self.assertGreater(p_value, 0.5)
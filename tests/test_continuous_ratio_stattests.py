@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from abtoolkit.continuous.ratio_stattests import _ratio_ttest_ndarray
+from abtoolkit.continuous.ratio_stattests import ratio_ttest
+from abtoolkit.continuous.ratio_stattests import ratio_ttest_from_summary
+from abtoolkit.continuous.stattests import ttest
+from abtoolkit.continuous.summary import MomentSummary
+
+
+class TestRatioStatTests(unittest.TestCase):
+    def test_ratio_ttest(self):
+        rng = np.random.default_rng(0)
+        control_sessions, treatment_sessions = rng.poisson(5, size=3000) + 1, rng.poisson(5, size=3000) + 1
+        control_revenue = rng.gamma(control_sessions, 2.0)
+        treatment_revenue = rng.gamma(treatment_sessions, 2.0)
+
+        for alternative in ["less", "greater", "two-sided"]:
+            p_value = ratio_ttest(control_revenue, control_sessions, treatment_revenue, treatment_sessions, alternative)
+            self.assertTrue(0 <= p_value <= 1, f"Wrong value for p-value: {p_value}")
+            summary_p_value = ratio_ttest_from_summary(
+                MomentSummary.from_arrays(control_revenue, control_sessions),
+                MomentSummary.from_arrays(treatment_revenue, treatment_sessions),
+                alternative,
+            )
+            self.assertAlmostEqual(p_value, summary_p_value)
+
+        # Shift of treatment ratio is the same as increase of treatment numerator by shift * denominator
+        shifted_p_values = _ratio_ttest_ndarray(
+            control_revenue, control_sessions, treatment_revenue, treatment_sessions, "two-sided", [0, 0.3]
+        )
+        self.assertAlmostEqual(
+            shifted_p_values[1],
+            ratio_ttest(
+                control_revenue,
+                control_sessions,
+                treatment_revenue + 0.3 * treatment_sessions,
+                treatment_sessions,
+                "two-sided",
+            ),
+        )
+        self.assertLess(shifted_p_values[1], 0.05)
+
+        # With unit denominator ratio is a mean and test is the same as ttest for equal groups
+        ones = np.ones_like(control_revenue)
+        self.assertAlmostEqual(
+            ratio_ttest(control_revenue, ones, treatment_revenue, ones, "two-sided"),
+            ttest(control_revenue, treatment_revenue, "two-sided"),
+        )
@@ -1,8 +1,16 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
+import numpy as np
+
 from abtoolkit.continuous.simulation import StatTestsSimulation
+from abtoolkit.continuous.utils import estimate_mde_by_sample_size
+from abtoolkit.continuous.utils import estimate_sample_size_by_mde
 from abtoolkit.utils import generate_data
+from abtoolkit.variables import ValueCountsVariable
+from abtoolkit.variables import ZeroInflatedVariable
 
 
 class TestStatTestsSimulation(unittest.TestCase):
@@ -146,3 +154,625 @@ class TestStatTestsSimulation(unittest.TestCase):
             sim.simulate_difference_ttest(mde=0)
 
         self.assertTrue(diff_mock.called, "diff_ttest simulation should call difference_ttest")
+
+    def test_vectorized(self):
+        variable = generate_data(100, distribution_type="cont")
+        previous_value = generate_data(100, distribution_type="cont", index=variable.index).rename("prev")
+
+        experiments_num = 25
+
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=self.tests,
+            experiments_num=experiments_num,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.3,
+            mde=10,
+            previous_values=previous_value,
+            cuped_covariant=previous_value,
+            additional_vars=[previous_value],
+            vectorized=True,
+            memory_budget_mb=0.01,  # Forces several blocks of experiments
+        )
+        self.assertTrue(sim._get_batch_size("ttest") < experiments_num, "Memory budget should split experiments")
+        info = sim.run()
+
+        for test in self.tests:
+            test_info = info[test]
+            self.assertTrue(0 <= test_info["alpha"] <= 1, f"Alpha value has wrong value: {test_info['alpha']}")
+            self.assertTrue(0 <= test_info["power"] <= 1, f"Power value has wrong value: {test_info['power']}")
+            self.assertTrue(
+                len(test_info["aa_pvalues"]) == experiments_num,
+                f"Number of p-values in AA test doesn't match with number of experiments",
+            )
+            self.assertTrue(
+                len(test_info["ab_pvalues"]) == experiments_num,
+                f"Number of p-values in AB test doesn't match with number of experiments",
+            )
+        self.assertTrue(info["ttest"]["power"] == 1, "Huge effect should be detected in every experiment")
+
+    def test_ratio_ttest(self):
+        rng = np.random.default_rng(0)
+        sessions = rng.poisson(5, size=2000) + 1.0
+        revenue = rng.gamma(sessions, 2.0)
+
+        results = []
+        for vectorized in [False, True]:
+            sim = StatTestsSimulation(
+                revenue,
+                stattests_list=["ratio_ttest"],
+                experiments_num=200,
+                alternative="two-sided",
+                treatment_sample_size=500,
+                treatment_split_proportion=0.5,
+                mde=0.3,
+                ratio_denominator=sessions,
+                vectorized=vectorized,
+                random_state=1,
+            )
+            results.append(sim.run()["ratio_ttest"])
+        for info in results:
+            self.assertTrue(info["alpha"] <= 0.12, f"Alpha value is too high: {info['alpha']}")
+            self.assertTrue(info["power"] >= 0.8, f"Power value is too low: {info['power']}")
+
+        # Test can't be performed without denominator
+        for vectorized in [True, False]:
+            with self.assertRaises(ValueError):
+                StatTestsSimulation(revenue, "two-sided", ["ratio_ttest"], 500, 0.5, 10, 0.3, vectorized=vectorized)
+        with self.assertRaises(ValueError):
+            StatTestsSimulation(revenue, "two-sided", ["additional_vars_regression_test"], 500, 0.5, 10, 0.3)
+
+    def test_pvalues_arrays(self):
+        variable = generate_data(100, distribution_type="cont")
+        params = dict(
+            stattests_list=["ttest", "regression_test"],
+            experiments_num=20,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.5,
+            mde=1,
+            random_state=1,
+        )
+        for vectorized in [False, True]:
+            info = StatTestsSimulation(variable, vectorized=vectorized, pvalues_dtype=np.float32, **params).run()
+            for test in params["stattests_list"]:
+                for key in ["aa_pvalues", "ab_pvalues"]:
+                    self.assertIsInstance(info[test][key], np.ndarray)
+                    self.assertEqual(info[test][key].dtype, np.float32)
+                    self.assertEqual(len(info[test][key]), params["experiments_num"])
+
+    def test_analytic(self):
+        rng = np.random.default_rng(0)
+        previous_value = rng.normal(10, 3, size=5000)
+        variable = 0.8 * previous_value + rng.normal(0, 2, size=5000)
+        tests = ["ttest", "diff_ttest", "cuped_ttest", "did_regression_test"]
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=tests,
+            experiments_num=2000,
+            alternative="two-sided",
+            treatment_sample_size=300,
+            treatment_split_proportion=0.3,
+            mde=0.4,
+            previous_values=previous_value,
+            cuped_covariant=previous_value,
+            vectorized=True,
+            analytic=True,
+            cross_validate=True,
+            random_state=1,
+        )
+        info = sim.run()
+        self.assertEqual(list(info), tests)
+        self.assertNotIn("analytic", info["did_regression_test"], "Test without closed form should be simulated")
+        for test in tests[:3]:
+            test_info = info[test]
+            self.assertAlmostEqual(test_info["alpha"], 0.05)
+            self.assertAlmostEqual(test_info["power"], test_info["simulation"]["power"], delta=0.05, msg=test)
+            self.assertEqual(len(test_info["ab_pvalues"]), 2000)
+            self.assertAlmostEqual(np.mean(test_info["ab_pvalues"] < 0.05), test_info["power"], delta=1e-3)
+        self.assertLess(info["ttest"]["power"], info["cuped_ttest"]["power"], "CUPED should reduce variance")
+
+    def test_analytic_error_is_recorded(self):
+        def failing_distribution(mde):
+            raise ValueError("closed form is unavailable")
+
+        sim = StatTestsSimulation(
+            np.random.default_rng(0).normal(10, 3, size=2000),
+            stattests_list=["ttest"],
+            experiments_num=200,
+            alternative="two-sided",
+            treatment_sample_size=300,
+            treatment_split_proportion=0.5,
+            mde=0.5,
+            analytic=True,
+            random_state=1,
+        )
+        sim.stattests_analytic_func_map["ttest"] = failing_distribution
+        info = sim.run()
+        self.assertNotIn("analytic", info["ttest"], "Test should be simulated")
+        self.assertEqual(info["ttest"]["analytic_error"], "closed form is unavailable")
+        self.assertEqual(len(info["ttest"]["ab_pvalues"]), 200)
+
+    def test_analytic_constant_covariate(self):
+        variable = np.random.default_rng(0).normal(10, 3, size=2000)
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=["ttest", "cuped_ttest"],
+            experiments_num=100,
+            alternative="two-sided",
+            treatment_sample_size=300,
+            treatment_split_proportion=0.5,
+            mde=0.5,
+            cuped_covariant=np.ones(len(variable)),
+            vectorized=True,
+            analytic=True,
+            random_state=1,
+        )
+        info = sim.run()
+        self.assertTrue(info["ttest"]["analytic"])
+        self.assertNotIn("analytic", info["cuped_ttest"], "Test should be simulated")
+        self.assertIn("variance of CUPED covariant", info["cuped_ttest"]["analytic_error"])
+
+    def test_sample_size_by_simulation(self):
+        rng = np.random.default_rng(0)
+        previous_value = rng.normal(10, 3, size=5000)
+        variable = previous_value + rng.normal(0, 2, size=5000)
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=["ttest", "did_regression_test"],
+            experiments_num=4000,
+            alternative="two-sided",
+            treatment_sample_size=2000,
+            treatment_split_proportion=0.5,
+            mde=0.5,
+            previous_values=previous_value,
+            random_state=1,
+        )
+        result = sim.estimate_sample_size_by_simulation("ttest", power=0.8)
+        expected = estimate_sample_size_by_mde(
+            std=variable.std(), alpha=0.05, power=0.8, mde=0.5, alternative="two-sided"
+        )
+        self.assertAlmostEqual(result["treatment_sample_size"], expected, delta=expected * 0.05)
+        low, high = result["treatment_sample_size_ci"]
+        self.assertLessEqual(low, result["treatment_sample_size"])
+        self.assertLessEqual(result["treatment_sample_size"], high)
+        self.assertLess(high - low, expected * 0.1)
+        self.assertEqual(result["control_sample_size"], result["treatment_sample_size"])
+
+        result = sim.estimate_sample_size_by_simulation("did_regression_test", power=0.8)
+        low, high = result["treatment_sample_size_ci"]
+        self.assertLess(low, high)
+        self.assertAlmostEqual(result["power"], 0.8, delta=0.03)
+        self.assertEqual(sim.treatment_sample_size, 2000, "Simulation parameters should be restored")
+        self.assertEqual(sim.info, {})
+
+        with self.assertRaises(ValueError):
+            sim.estimate_sample_size_by_simulation("ttest", power=0.8, max_sample_size=100)
+
+    def test_sample_size_by_simulation_zero_inflated(self):
+        rng = np.random.default_rng(0)
+        dense = np.where(rng.random(20000) < 0.05, rng.exponential(10, size=20000), 0)
+        results = []
+        for variable in [dense, ZeroInflatedVariable.from_array(dense)]:
+            sim = StatTestsSimulation(
+                variable,
+                stattests_list=["ttest"],
+                experiments_num=4000,
+                alternative="two-sided",
+                treatment_sample_size=1000,
+                treatment_split_proportion=0.5,
+                mde=1,
+                random_state=1,
+            )
+            results.append(sim.estimate_sample_size_by_simulation("ttest", power=0.8))
+        # Smaller groups are prefixes of sampled groups, so zeros should be spread over samples
+        expected = results[0]["treatment_sample_size"]
+        self.assertAlmostEqual(results[1]["treatment_sample_size"], expected, delta=expected * 0.1)
+
+    def test_mde_by_simulation(self):
+        variable = np.random.default_rng(0).normal(10, 3, size=5000)
+        for alternative, sign in [("two-sided", 1), ("less", 1), ("greater", -1)]:
+            sim = StatTestsSimulation(
+                variable,
+                stattests_list=["ttest"],
+                experiments_num=4000,
+                alternative=alternative,
+                treatment_sample_size=500,
+                treatment_split_proportion=0.5,
+                mde=0.3,
+                random_state=1,
+            )
+            with patch.object(sim, "_sample_nested_batch", wraps=sim._sample_nested_batch) as sample_mock:
+                result = sim.estimate_mde_by_simulation("ttest", power=0.8)
+            self.assertEqual(sample_mock.call_count, 1, "Samples should be drawn once")
+
+            expected = estimate_mde_by_sample_size(
+                std=variable.std(), alpha=0.05, power=0.8, sample_size=500, alternative=alternative
+            )
+            self.assertAlmostEqual(result["mde"], sign * expected, delta=expected * 0.05, msg=alternative)
+            low, high = result["mde_ci"]
+            self.assertTrue(low <= result["mde"] <= high, alternative)
+            self.assertAlmostEqual(result["power"], 0.8, delta=0.01)
+            self.assertAlmostEqual(result["alpha"], 0.05, delta=0.015)
+
+    def test_power_surface(self):
+        rng = np.random.default_rng(0)
+        previous_value = rng.normal(10, 3, size=5000)
+        variable = previous_value + rng.normal(0, 2, size=5000)
+        tests = ["ttest", "cuped_ttest", "did_regression_test"]
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=tests,
+            experiments_num=2000,
+            alternative="two-sided",
+            treatment_sample_size=500,
+            treatment_split_proportion=0.5,
+            mde=0.3,
+            previous_values=previous_value,
+            cuped_covariant=previous_value,
+            memory_budget_mb=1024,
+            random_state=1,
+        )
+        with patch.object(sim, "_sample_nested_batch", wraps=sim._sample_nested_batch) as sample_mock:
+            surface = sim.simulate_power_surface([0.2, 0.6], [200, 500], [0.2, 0.5])
+        self.assertEqual(sample_mock.call_count, 1, "Samples should be drawn once for whole grid")
+        self.assertEqual(len(surface), len(tests) * 8)
+        self.assertEqual(list(surface["test"].unique()), tests)
+
+        ttest = surface[surface["test"] == "ttest"].set_index(
+            ["mde", "treatment_sample_size", "treatment_split_proportion"]
+        )
+        self.assertEqual(ttest.loc[(0.2, 200, 0.2), "control_sample_size"], 800)
+        self.assertLess(ttest.loc[(0.2, 200, 0.5), "power"], ttest.loc[(0.6, 200, 0.5), "power"])
+        self.assertLess(ttest.loc[(0.6, 200, 0.5), "power"], ttest.loc[(0.6, 500, 0.5), "power"])
+        self.assertLess(ttest.loc[(0.6, 200, 0.5), "power"], ttest.loc[(0.6, 200, 0.2), "power"])
+        self.assertTrue((surface["alpha_ci_low"] <= surface["alpha"]).all())
+        self.assertTrue((surface["power"] <= surface["power_ci_high"]).all())
+
+        sim.treatment_sample_size, sim.control_sample_size, sim.mde = 500, 500, 0.6
+        info = sim.run()
+        self.assertAlmostEqual(info["ttest"]["power"], ttest.loc[(0.6, 500, 0.5), "power"], delta=0.04)
+
+    def test_power_surface_zero_inflated(self):
+        rng = np.random.default_rng(0)
+        dense = np.where(rng.random(20000) < 0.05, rng.exponential(10, size=20000), 0)
+        surfaces = []
+        for variable in [dense, ZeroInflatedVariable.from_array(dense)]:
+            sim = StatTestsSimulation(
+                variable,
+                stattests_list=["ttest"],
+                experiments_num=4000,
+                alternative="two-sided",
+                treatment_sample_size=2000,
+                treatment_split_proportion=0.5,
+                mde=1,
+                random_state=1,
+            )
+            surfaces.append(sim.simulate_power_surface([0.5, 1.0], [100, 500, 2000]))
+        dense_surface, sparse_surface = surfaces
+        # t-test is conservative for groups with a few non-zero values, so alpha is checked for larger groups
+        large = sparse_surface["treatment_sample_size"] >= 500
+        np.testing.assert_allclose(sparse_surface.loc[large, "alpha"], 0.05, atol=0.015)
+        np.testing.assert_allclose(sparse_surface["alpha"], dense_surface["alpha"], atol=0.015)
+        np.testing.assert_allclose(sparse_surface["power"], dense_surface["power"], atol=0.04)
+
+    def test_parallel(self):
+        variable = generate_data(100, distribution_type="cont")
+        previous_value = generate_data(100, distribution_type="cont", index=variable.index).rename("prev")
+
+        experiments_num = 7
+        tests = ["ttest", "cuped_ttest", "additional_vars_regression_test"]
+
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=tests,
+            experiments_num=experiments_num,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.5,
+            mde=10,
+            cuped_covariant=previous_value,
+            additional_vars=[previous_value],
+            n_jobs=2,
+            random_state=0,
+        )
+        info = sim.run()
+
+        for test in tests:
+            test_info = info[test]
+            self.assertTrue(
+                len(test_info["aa_pvalues"]) == experiments_num,
+                f"Number of p-values in AA test doesn't match with number of experiments",
+            )
+            self.assertTrue(
+                len(test_info["ab_pvalues"]) == experiments_num,
+                f"Number of p-values in AB test doesn't match with number of experiments",
+            )
+            self.assertTrue(test_info["power"] == 1, "Huge effect should be detected in every experiment")
+
+    def test_random_state(self):
+        variable = generate_data(100, distribution_type="cont")
+        p_values = []
+        for _ in range(2):
+            sim = StatTestsSimulation(
+                variable,
+                stattests_list=["ttest"],
+                experiments_num=5,
+                alternative="two-sided",
+                treatment_sample_size=50,
+                treatment_split_proportion=0.5,
+                mde=1,
+                random_state=42,
+            )
+            p_values.append(sim.run()["ttest"]["aa_pvalues"])
+        self.assertTrue(np.array_equal(p_values[0], p_values[1]), "Simulations with the same random_state should match")
+
+    def test_common_random_numbers(self):
+        variable = generate_data(100, distribution_type="cont")
+        previous_value = generate_data(100, distribution_type="cont", index=variable.index).rename("prev")
+
+        # Without effect AA and AB tests on the same samples give the same p-values
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=self.tests,
+            experiments_num=5,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.5,
+            mde=0,
+            previous_values=previous_value,
+            cuped_covariant=previous_value,
+            additional_vars=[previous_value],
+            regression_backend="linearmodels",  # Regression tests are simulated experiment by experiment
+            common_random_numbers=True,
+        )
+        info = sim.run()
+
+        for test in self.tests:
+            np.testing.assert_allclose(info[test]["aa_pvalues"], info[test]["ab_pvalues"], err_msg=test)
+
+    def test_shared_sampling(self):
+        variable = generate_data(100, distribution_type="cont")
+        previous_value = generate_data(100, distribution_type="cont", index=variable.index).rename("prev")
+
+        experiments_num = 10
+        sim = StatTestsSimulation(
+            variable,
+            stattests_list=self.tests,
+            experiments_num=experiments_num,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.5,
+            mde=1,
+            previous_values=previous_value,
+            cuped_covariant=previous_value,
+            additional_vars=[previous_value],
+            shared_sampling=True,
+        )
+        info = sim.run()
+
+        self.assertTrue(list(info.keys()) == self.tests, "Results should keep order of tests")
+        for test in self.tests:
+            self.assertTrue(
+                len(info[test]["aa_pvalues"]) == experiments_num,
+                f"Number of p-values in AA test doesn't match with number of experiments",
+            )
+        # On identical samples t-test and regression test are the same test
+        np.testing.assert_allclose(info["ttest"]["aa_pvalues"], info["regression_test"]["aa_pvalues"])
+        np.testing.assert_allclose(info["ttest"]["ab_pvalues"], info["regression_test"]["ab_pvalues"])
+
+    def test_variables_alignment(self):
+        variable = generate_data(100, distribution_type="cont")
+        previous_value = generate_data(100, distribution_type="cont", index=variable.index).rename("prev")
+
+        params = dict(
+            stattests_list=["diff_ttest"],
+            experiments_num=10,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.5,
+            mde=1,
+            random_state=1,
+        )
+        sim = StatTestsSimulation(variable, previous_values=previous_value, **params)
+        shuffled_sim = StatTestsSimulation(variable, previous_values=previous_value.sample(frac=1), **params)
+        self.assertTrue(
+            np.array_equal(sim.run()["diff_ttest"]["aa_pvalues"], shuffled_sim.run()["diff_ttest"]["aa_pvalues"]),
+            "Optional variables should be aligned with variable by index",
+        )
+
+        with self.assertRaises(ValueError):
+            StatTestsSimulation(variable, previous_values=previous_value.iloc[1:], **params)
+
+    def test_mapped_variables(self):
+        variable = generate_data(100, distribution_type="cont")
+        previous_value = generate_data(100, distribution_type="cont", index=variable.index).rename("prev")
+        params = dict(
+            stattests_list=["ttest", "cuped_ttest", "additional_vars_regression_test"],
+            experiments_num=10,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.5,
+            mde=1,
+            random_state=1,
+        )
+        info = StatTestsSimulation(
+            variable, cuped_covariant=previous_value, additional_vars=[previous_value], **params
+        ).run()
+
+        with tempfile.TemporaryDirectory() as directory:
+            variable_path = os.path.join(directory, "variable.npy")
+            np.save(variable_path, variable.to_numpy())
+            previous_value_path = os.path.join(directory, "previous_value.npy")
+            np.save(previous_value_path, previous_value.to_numpy())
+            previous_value_memmap = np.load(previous_value_path, mmap_mode="r")
+
+            for n_jobs in [1, 2]:
+                mapped_info = StatTestsSimulation(
+                    variable_path,
+                    cuped_covariant=previous_value_memmap,
+                    additional_vars=[previous_value_path],
+                    n_jobs=n_jobs,
+                    **params,
+                ).run()
+                if n_jobs == 1:
+                    for test in params["stattests_list"]:
+                        self.assertTrue(
+                            np.allclose(info[test]["aa_pvalues"], mapped_info[test]["aa_pvalues"]),
+                            f"Test '{test}' gives different results for mapped variables",
+                        )
+                else:
+                    for test in params["stattests_list"]:
+                        self.assertTrue(len(mapped_info[test]["aa_pvalues"]) == params["experiments_num"])
+            del previous_value_memmap
+
+    def test_arrow_variables(self):
+        try:
+            import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+
+        variable = generate_data(100, distribution_type="cont")
+        sim = StatTestsSimulation(
+            pa.chunked_array([variable.to_numpy()]),
+            stattests_list=["ttest"],
+            experiments_num=10,
+            alternative="two-sided",
+            treatment_sample_size=50,
+            treatment_split_proportion=0.5,
+            mde=1,
+        )
+        self.assertTrue(len(sim.run()["ttest"]["aa_pvalues"]) == 10, "Wrong number of p-values")
+
+    def test_chunked_arrow_variables(self):
+        try:
+            import pyarrow as pa  # pylint: disable=import-outside-toplevel
+            from pyarrow import feather  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+
+        values = np.random.default_rng(0).normal(10, 3, size=300000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.feather")
+            feather.write_feather(pa.table({"variable": values}), path)
+            column = feather.read_table(path, memory_map=True).column("variable")
+            self.assertGreater(column.num_chunks, 1)
+
+            sim = StatTestsSimulation(
+                column,
+                stattests_list=["ttest"],
+                experiments_num=50,
+                alternative="two-sided",
+                treatment_sample_size=100,
+                treatment_split_proportion=0.5,
+                mde=1,
+                vectorized=True,
+                random_state=0,
+            )
+            array = sim._get_array("variable")
+            self.assertFalse(any(chunk.flags.owndata for chunk in array.chunks), "Chunks shouldn't be copied")
+            index = np.random.default_rng(1).integers(0, len(values), size=(5, 100))
+            np.testing.assert_array_equal(array[index], values[index])
+            np.testing.assert_array_equal(array[100:200000], values[100:200000])
+            self.assertEqual(len(sim.run()["ttest"]["ab_pvalues"]), 50)
+
+        with self.assertRaises(ValueError):
+            StatTestsSimulation(
+                pa.chunked_array([[1.0, None], [2.0, 3.0]]),
+                stattests_list=["ttest"],
+                experiments_num=10,
+                alternative="two-sided",
+                treatment_sample_size=2,
+                treatment_split_proportion=0.5,
+                mde=1,
+            )
+
+    def test_wrong_variable_length(self):
+        variable = generate_data(100, distribution_type="cont")
+        with self.assertRaises(ValueError):
+            StatTestsSimulation(
+                variable.to_numpy(),
+                stattests_list=["cuped_ttest"],
+                experiments_num=10,
+                alternative="two-sided",
+                treatment_sample_size=50,
+                treatment_split_proportion=0.5,
+                mde=1,
+                cuped_covariant=variable.to_numpy()[1:],
+            )
+
+    def test_value_counts_variable(self):
+        variable = ValueCountsVariable.from_array(np.random.poisson(3, size=10000))
+        experiments_num = 20
+
+        for vectorized in [False, True]:
+            sim = StatTestsSimulation(
+                variable,
+                stattests_list=["ttest", "regression_test"],
+                experiments_num=experiments_num,
+                alternative="two-sided",
+                treatment_sample_size=100,
+                treatment_split_proportion=0.5,
+                mde=1,
+                vectorized=vectorized,
+            )
+            info = sim.run()
+            for test in ["ttest", "regression_test"]:
+                self.assertTrue(
+                    len(info[test]["ab_pvalues"]) == experiments_num,
+                    f"Number of p-values in AB test doesn't match with number of experiments",
+                )
+
+        with self.assertRaises(ValueError):
+            StatTestsSimulation(
+                variable,
+                stattests_list=["cuped_ttest"],
+                experiments_num=experiments_num,
+                alternative="two-sided",
+                treatment_sample_size=100,
+                treatment_split_proportion=0.5,
+                mde=1,
+                cuped_covariant=np.zeros(len(variable)),
+            )
+
+    def test_zero_inflated_variable(self):
+        size = 20000
+        rng = np.random.default_rng(0)
+        # Most rows are zero both in variable and covariant, so only active rows are stored
+        active = rng.random(size) < 0.05
+        covariant = np.where(active, rng.exponential(10, size=size), 0)
+        dense = np.where(active, 0.8 * covariant + rng.exponential(2, size=size), 0)
+        variable = ZeroInflatedVariable.from_array(dense, covariant)
+        self.assertLess(len(variable.values), 0.1 * size)
+        tests = ["ttest", "diff_ttest", "cuped_ttest", "regression_test", "did_regression_test"]
+        params = dict(
+            stattests_list=tests,
+            alternative="two-sided",
+            treatment_sample_size=1000,
+            treatment_split_proportion=0.5,
+            mde=0.2,
+            random_state=1,
+        )
+
+        for vectorized in [False, True]:
+            info = StatTestsSimulation(variable, experiments_num=20, vectorized=vectorized, **params).run()
+            for test in tests:
+                self.assertTrue(
+                    len(info[test]["ab_pvalues"]) == 20,
+                    f"Number of p-values in AB test doesn't match with number of experiments",
+                )
+
+        # Sparse path gives the same alpha and power as the same data in dense form
+        sparse_info = StatTestsSimulation(variable, experiments_num=2000, vectorized=True, **params).run()
+        dense_info = StatTestsSimulation(
+            dense,
+            experiments_num=2000,
+            vectorized=True,
+            previous_values=covariant,
+            cuped_covariant=covariant,
+            **params,
+        ).run()
+        for test in tests:
+            for key in ["alpha", "power"]:
+                self.assertAlmostEqual(sparse_info[test][key], dense_info[test][key], delta=0.04, msg=f"{test} {key}")
@@ -1,11 +1,24 @@
 import unittest
 
+import numpy as np
+import pandas as pd
+
+from abtoolkit.continuous.stattests import _additional_vars_regression_test_ndarray
+from abtoolkit.continuous.stattests import _cuped_ttest_ndarray
+from abtoolkit.continuous.stattests import _did_regression_test_ndarray
+from abtoolkit.continuous.stattests import _difference_ttest_ndarray
+from abtoolkit.continuous.stattests import _regression_test_ndarray
+from abtoolkit.continuous.stattests import _ttest_ndarray
 from abtoolkit.continuous.stattests import regression_test
 from abtoolkit.continuous.stattests import did_regression_test
 from abtoolkit.continuous.stattests import additional_vars_regression_test
 from abtoolkit.continuous.stattests import cuped_ttest
 from abtoolkit.continuous.stattests import difference_ttest
 from abtoolkit.continuous.stattests import ttest
+from abtoolkit.continuous.stattests import cuped_ttest_from_summary
+from abtoolkit.continuous.stattests import difference_ttest_from_summary
+from abtoolkit.continuous.stattests import ttest_from_summary
+from abtoolkit.continuous.summary import MomentSummary
 from abtoolkit.utils import generate_data
 
 
@@ -97,3 +110,168 @@ class TestStatTests(unittest.TestCase):
             "two-sided",
         )
         self.assertTrue(0 <= p_value <= 1, f"Wrong value for p-value: {p_value}")
+
+    def test_ndarray_kernels_match_series_tests(self):
+        control = np.random.normal(0, 3, size=(5, 40))
+        control_pre = np.random.normal(0, 3, size=(5, 40))
+        treatment = np.random.normal(1, 3, size=(5, 60))
+        treatment_pre = np.random.normal(0, 3, size=(5, 60)) + treatment
+
+        ttest_p_values = _ttest_ndarray(control, treatment, "less")
+        diff_p_values = _difference_ttest_ndarray(control, control_pre, treatment, treatment_pre, "two-sided")
+        cuped_p_values = _cuped_ttest_ndarray(control, control_pre, treatment, treatment_pre, "greater")
+        for i in range(control.shape[0]):
+            c, c_pre = pd.Series(control[i]), pd.Series(control_pre[i])
+            t, t_pre = pd.Series(treatment[i]), pd.Series(treatment_pre[i])
+            self.assertAlmostEqual(ttest_p_values[i], ttest(c, t, "less"))
+            self.assertAlmostEqual(diff_p_values[i], difference_ttest(c, c_pre, t, t_pre, "two-sided"))
+            self.assertAlmostEqual(cuped_p_values[i], cuped_ttest(c, c_pre, t, t_pre, "greater"))
+
+    def test_regression_backends_match(self):
+        control_sr = generate_data(100, distribution_type="cont")
+        control_pre_sr = generate_data(100, distribution_type="cont", index=control_sr.index).rename("var_1")
+        test_sr = generate_data(80, distribution_type="cont") + 1
+        test_pre_sr = generate_data(80, distribution_type="cont", index=test_sr.index).rename("var_1")
+
+        for alternative in ["two-sided", "less", "greater"]:
+            for stattest, args in [
+                (regression_test, (control_sr, test_sr)),
+                (did_regression_test, (control_pre_sr, control_sr, test_pre_sr, test_sr)),
+                (additional_vars_regression_test, (control_sr, [control_pre_sr], test_sr, [test_pre_sr])),
+            ]:
+                numpy_p_value = stattest(*args, alternative, backend="numpy")
+                linearmodels_p_value = stattest(*args, alternative, backend="linearmodels")
+                self.assertAlmostEqual(numpy_p_value, linearmodels_p_value, msg=f"{stattest.__name__}, {alternative}")
+
+    def test_regression_wrong_backend(self):
+        test_sr = generate_data(100, distribution_type="cont")
+        control_sr = generate_data(100, distribution_type="cont")
+        self.assertRaises(ValueError, regression_test, control_sr, test_sr, "two-sided", "statsmodels")
+
+    def test_ndarray_regression_kernels_match_series_tests(self):
+        control = np.random.normal(0, 3, size=(5, 40))
+        control_pre = np.random.normal(0, 3, size=(5, 40)) + control
+        treatment = np.random.normal(1, 3, size=(5, 60))
+        treatment_pre = np.random.normal(0, 3, size=(5, 60)) + treatment
+
+        reg_p_values = _regression_test_ndarray(control, treatment, "less")
+        did_p_values = _did_regression_test_ndarray(control, control_pre, treatment, treatment_pre, "two-sided")
+        add_p_values = _additional_vars_regression_test_ndarray(
+            control, [control_pre], treatment, [treatment_pre], "greater"
+        )
+        for i in range(control.shape[0]):
+            c, c_pre = pd.Series(control[i]), pd.Series(control_pre[i], name="var_1")
+            t, t_pre = pd.Series(treatment[i]), pd.Series(treatment_pre[i], name="var_1")
+            self.assertAlmostEqual(reg_p_values[i], regression_test(c, t, "less"))
+            self.assertAlmostEqual(did_p_values[i], did_regression_test(c, c_pre, t, t_pre, "two-sided"))
+            self.assertAlmostEqual(add_p_values[i], additional_vars_regression_test(c, [c_pre], t, [t_pre], "greater"))
+
+    def test_ndarray_kernels_treatment_shifts(self):
+        control = np.random.normal(0, 3, size=(5, 40))
+        control_pre = np.random.normal(0, 3, size=(5, 40)) + control
+        treatment = np.random.normal(1, 3, size=(5, 60))
+        treatment_pre = np.random.normal(0, 3, size=(5, 60)) + treatment
+        shifts = [0, 0.5, -2]
+
+        for kernel, args in [
+            (_ttest_ndarray, ()),
+            (_cuped_ttest_ndarray, (control_pre, treatment_pre)),
+            (_regression_test_ndarray, ()),
+            (_did_regression_test_ndarray, (control_pre, treatment_pre)),
+            (_additional_vars_regression_test_ndarray, ([control_pre], [treatment_pre])),
+        ]:
+            if args:
+                shifted_p_values = kernel(control, args[0], treatment, args[1], "two-sided", shifts)
+            else:
+                shifted_p_values = kernel(control, treatment, "two-sided", shifts)
+
+            for shift, p_values in zip(shifts, shifted_p_values):
+                if args:
+                    expected_p_values = kernel(control, args[0], treatment + shift, args[1], "two-sided")
+                else:
+                    expected_p_values = kernel(control, treatment + shift, "two-sided")
+                np.testing.assert_allclose(p_values, expected_p_values, err_msg=kernel.__name__)
+
+    def test_summary_tests_match_series_tests(self):
+        control = generate_data(100, distribution_type="cont")
+        control_pre = (control + generate_data(100, distribution_type="cont", index=control.index)).rename("pre")
+        treatment = generate_data(120, distribution_type="cont")
+        treatment_pre = (treatment + generate_data(120, distribution_type="cont", index=treatment.index)).rename("pre")
+
+        control_summary = MomentSummary.from_arrays(control, control_pre)
+        treatment_summary = MomentSummary.from_arrays(treatment, treatment_pre)
+        for alternative in ["less", "greater", "two-sided"]:
+            self.assertTrue(
+                np.isclose(
+                    ttest_from_summary(control_summary, treatment_summary, alternative),
+                    ttest(control, treatment, alternative),
+                )
+            )
+            self.assertTrue(
+                np.isclose(
+                    difference_ttest_from_summary(control_summary, treatment_summary, alternative),
+                    difference_ttest(control, control_pre, treatment, treatment_pre, alternative),
+                )
+            )
+            self.assertTrue(
+                np.isclose(
+                    cuped_ttest_from_summary(control_summary, treatment_summary, alternative),
+                    cuped_ttest(control, control_pre, treatment, treatment_pre, alternative),
+                )
+            )
+
+    def test_summary_from_chunks_tests_match_series_tests(self):
+        control = generate_data(1000, distribution_type="cont")
+        control_covariant = (control + generate_data(1000, distribution_type="cont", index=control.index)).rename("cov")
+        treatment = generate_data(1000, distribution_type="cont")
+        treatment_covariant = (treatment + generate_data(1000, distribution_type="cont", index=treatment.index)).rename(
+            "cov"
+        )
+
+        def chunks(value, covariant):
+            for i in range(0, len(value), 128):
+                yield value.iloc[i : i + 128], covariant.iloc[i : i + 128]
+
+        control_summary = MomentSummary.from_chunks(chunks(control, control_covariant))
+        treatment_summary = MomentSummary.from_chunks(chunks(treatment, treatment_covariant))
+        self.assertTrue(
+            np.isclose(
+                ttest_from_summary(control_summary, treatment_summary, "two-sided"),
+                ttest(control, treatment, "two-sided"),
+            )
+        )
+        self.assertTrue(
+            np.isclose(
+                cuped_ttest_from_summary(control_summary, treatment_summary, "two-sided"),
+                cuped_ttest(control, control_covariant, treatment, treatment_covariant, "two-sided"),
+            )
+        )
+
+    def test_ndarray_inputs_match_series_inputs(self):
+        control = generate_data(100, distribution_type="cont")
+        control_pre = (control + generate_data(100, distribution_type="cont", index=control.index)).rename("pre")
+        treatment = generate_data(120, distribution_type="cont")
+        treatment_pre = (treatment + generate_data(120, distribution_type="cont", index=treatment.index)).rename("pre")
+        arrays = [sample.to_numpy() for sample in [control, control_pre, treatment, treatment_pre]]
+
+        for test in [ttest, regression_test]:
+            self.assertTrue(
+                np.isclose(test(arrays[0], arrays[2], "less"), test(control, treatment, "less")),
+                f"{test.__name__} gives different results for numpy arrays",
+            )
+        for test in [difference_ttest, cuped_ttest, did_regression_test]:
+            self.assertTrue(
+                np.isclose(
+                    test(*arrays, "less"),
+                    test(control, control_pre, treatment, treatment_pre, "less"),
+                ),
+                f"{test.__name__} gives different results for numpy arrays",
+            )
+        for backend in ["numpy", "linearmodels"]:
+            self.assertTrue(
+                np.isclose(
+                    additional_vars_regression_test(arrays[0], [arrays[1]], arrays[2], [arrays[3]], "less", backend),
+                    additional_vars_regression_test(control, [control_pre], treatment, [treatment_pre], "less"),
+                ),
+                f"additional_vars_regression_test gives different results for numpy arrays with {backend} backend",
+            )
@@ -0,0 +1,62 @@
+import json
+import unittest
+
+import numpy as np
+
+from abtoolkit.continuous.summary import MomentSummary
+
+
+class TestMomentSummary(unittest.TestCase):
+    def test_from_arrays(self):
+        value = np.random.normal(10, 3, size=1000)
+        covariant = value + np.random.normal(0, 1, size=1000)
+        summary = MomentSummary.from_arrays(value, covariant)
+
+        self.assertTrue(summary.n == 1000, f"Wrong number of samples: {summary.n}")
+        self.assertTrue(np.isclose(summary.mean, value.mean()), "Wrong mean")
+        self.assertTrue(np.isclose(summary.variance, value.var(ddof=1)), "Wrong variance")
+        self.assertTrue(np.isclose(summary.covariant_variance, covariant.var(ddof=1)), "Wrong covariant variance")
+        self.assertTrue(np.isclose(summary.covariance, np.cov(value, covariant)[0, 1]), "Wrong covariance")
+
+    def test_merge(self):
+        value = np.random.normal(10, 3, size=1000)
+        covariant = value + np.random.normal(0, 1, size=1000)
+        merged = MomentSummary.from_arrays(value[:300], covariant[:300]) + MomentSummary.from_arrays(
+            value[300:], covariant[300:]
+        )
+        full = MomentSummary.from_arrays(value, covariant)
+        for name, v in full.to_dict().items():
+            self.assertTrue(np.isclose(merged.to_dict()[name], v), f"Wrong merged '{name}'")
+
+    def test_from_sums(self):
+        value = np.random.normal(10, 3, size=1000)
+        covariant = value + np.random.normal(0, 1, size=1000)
+        summary = MomentSummary.from_sums(
+            len(value), value.sum(), (value**2).sum(), covariant.sum(), (covariant**2).sum(), (value * covariant).sum()
+        )
+        full = MomentSummary.from_arrays(value, covariant)
+        for name, v in full.to_dict().items():
+            self.assertTrue(np.isclose(summary.to_dict()[name], v), f"Wrong '{name}'")
+
+    def test_serialization(self):
+        summary = MomentSummary.from_arrays(np.random.normal(10, 3, size=100))
+        restored = MomentSummary.from_dict(json.loads(json.dumps(summary.to_dict())))
+        self.assertTrue(restored == summary, f"Summary {restored} doesn't match {summary}")
+
+    def test_merge_without_covariant(self):
+        with self.assertRaises(ValueError):
+            MomentSummary.from_arrays(np.ones(10)).merge(MomentSummary.from_arrays(np.ones(10), np.ones(10)))
+
+    def test_from_chunks(self):
+        value = np.random.normal(1e9, 1, size=10000)
+        covariant = value + np.random.normal(0, 1, size=10000)
+        summary = MomentSummary.from_chunks(
+            (value[i : i + 999], covariant[i : i + 999]) for i in range(0, len(value), 999)
+        )
+        self.assertTrue(summary.n == len(value), f"Wrong number of samples: {summary.n}")
+        self.assertTrue(np.isclose(summary.variance, value.var(ddof=1), rtol=1e-9), "Wrong variance")
+        self.assertTrue(np.isclose(summary.covariance, np.cov(value, covariant)[0, 1], rtol=1e-9), "Wrong covariance")
+
+    def test_from_empty_chunks(self):
+        with self.assertRaises(ValueError):
+            MomentSummary.from_chunks([np.array([])])
@@ -1,5 +1,10 @@
 import unittest
+
+import numpy as np
+
 from abtoolkit.discrete.simulation import StatTestsSimulation
+from abtoolkit.discrete.simulation import _NestedBinomialCounts
+from abtoolkit.analytic import _analytic_rejection_probability
 from abtoolkit.utils import generate_data
 
 
@@ -109,3 +114,229 @@ class TestStatTestsSimulation(unittest.TestCase):
                 len(test_info["ab_pvalues"]) == experiments_num,
                 f"Number of p-values in AB test doesn't match with number of experiments",
             )
+
+    def test_vectorized(self):
+        experiments_num = 1000
+        tests = ["conversion_ztest", "chi_square_test", "bayesian_test"]
+
+        sim = StatTestsSimulation(
+            count=20,
+            objects_num=100,
+            stattests_list=tests,
+            experiments_num=experiments_num,
+            alternative="two-sided",
+            treatment_sample_size=500,
+            treatment_split_proportion=0.5,
+            mde=0.1,
+            vectorized=True,
+        )
+        info = sim.run()
+
+        for test in tests:
+            test_info = info[test]
+            self.assertTrue(0 <= test_info["alpha"] <= 0.1, f"Alpha value has wrong value: {test_info['alpha']}")
+            self.assertTrue(test_info["power"] > 0.9, f"Power value has wrong value: {test_info['power']}")
+            self.assertTrue(
+                len(test_info["aa_pvalues"]) == experiments_num,
+                f"Number of p-values in AA test doesn't match with number of experiments",
+            )
+
+    def test_skipped_experiments(self):
+        tests = ["conversion_ztest", "chi_square_test"]
+        for vectorized in [False, True]:
+            sim = StatTestsSimulation(
+                count=2,
+                objects_num=100,
+                stattests_list=tests,
+                experiments_num=200,
+                alternative="two-sided",
+                treatment_sample_size=20,
+                treatment_split_proportion=0.5,
+                mde=0.01,
+                vectorized=vectorized,
+                random_state=1,
+            )
+            info = sim.run()
+            # Groups without positives don't make z-test skipped
+            self.assertEqual(info["conversion_ztest"]["aa_skipped"], 0)
+            self.assertEqual(len(info["conversion_ztest"]["aa_pvalues"]), 200)
+            self.assertGreater(info["chi_square_test"]["aa_skipped"], 0)
+            performed = np.sum(~np.isnan(info["chi_square_test"]["aa_pvalues"]))
+            self.assertEqual(info["chi_square_test"]["aa_skipped"] + performed, 200)
+
+    def test_parallel(self):
+        experiments_num = 11
+        tests = ["conversion_ztest", "bayesian_test"]
+
+        sim = StatTestsSimulation(
+            count=20,
+            objects_num=100,
+            stattests_list=tests,
+            experiments_num=experiments_num,
+            alternative="two-sided",
+            treatment_sample_size=100,
+            treatment_split_proportion=0.5,
+            mde=0.1,
+            n_jobs=3,
+        )
+        info = sim.run()
+
+        for test in tests:
+            self.assertTrue(
+                len(info[test]["aa_pvalues"]) == experiments_num,
+                f"Number of p-values in AA test doesn't match with number of experiments",
+            )
+            self.assertTrue(
+                len(info[test]["ab_pvalues"]) == experiments_num,
+                f"Number of p-values in AB test doesn't match with number of experiments",
+            )
+
+    def test_common_random_numbers(self):
+        tests = ["conversion_ztest", "chi_square_test", "bayesian_test"]
+
+        # Without effect AA and AB tests on the same samples give the same p-values
+        sim = StatTestsSimulation(
+            count=20,
+            objects_num=100,
+            stattests_list=tests,
+            experiments_num=20,
+            alternative="two-sided",
+            treatment_sample_size=100,
+            treatment_split_proportion=0.5,
+            mde=0,
+            common_random_numbers=True,
+        )
+        info = sim.run()
+
+        for test in tests:
+            np.testing.assert_allclose(info[test]["aa_pvalues"], info[test]["ab_pvalues"], err_msg=test)
+
+    def test_nested_binomial_counts(self):
+        counts = _NestedBinomialCounts(np.random.default_rng(0), 1000, 50000)
+        sizes, probabilities = [1000, 300, 700, 100], [0.1, 0.13, 0.11]
+        result = {(size, p): counts.count(size, p) for size in sizes for p in probabilities}
+        for (size, p), count in result.items():
+            self.assertAlmostEqual(count.mean() / (size * p), 1, delta=0.01)
+            self.assertAlmostEqual(count.var() / (size * p * (1 - p)), 1, delta=0.03)
+        # Counts are taken from the same trials, so they grow with group size and probability
+        for p in probabilities:
+            self.assertTrue(np.all(np.diff([result[(size, p)] for size in sorted(sizes)], axis=0) >= 0))
+        for size in sizes:
+            self.assertTrue(np.all(np.diff([result[(size, p)] for p in sorted(probabilities)], axis=0) >= 0))
+        np.testing.assert_array_equal(counts.count(300, 0.11), result[(300, 0.11)])
+        self.assertTrue(np.all(counts.count(2000, 0.11) >= result[(1000, 0.11)]))
+        with self.assertRaises(ValueError):
+            counts.count(100, 1.5)
+
+    def test_shared_sampling(self):
+        tests = ["chi_square_test", "bayesian_test", "conversion_ztest"]
+        experiments_num = 20
+
+        sim = StatTestsSimulation(
+            count=20,
+            objects_num=100,
+            stattests_list=tests,
+            experiments_num=experiments_num,
+            alternative="two-sided",
+            treatment_sample_size=100,
+            treatment_split_proportion=0.5,
+            mde=0.1,
+            shared_sampling=True,
+        )
+        info = sim.run()
+
+        self.assertTrue(list(info.keys()) == tests, "Results should keep order of tests")
+        for test in tests:
+            self.assertTrue(
+                len(info[test]["ab_pvalues"]) <= experiments_num,
+                f"Number of p-values in AB test is bigger than number of experiments",
+            )
+
+    def test_analytic(self):
+        for alternative, mde in [("two-sided", 0.04), ("less", 0.04), ("greater", -0.04)]:
+            sim = StatTestsSimulation(
+                count=200,
+                objects_num=1000,
+                stattests_list=["conversion_ztest", "chi_square_test"],
+                experiments_num=4000,
+                alternative=alternative,
+                treatment_sample_size=1000,
+                treatment_split_proportion=0.5,
+                mde=mde,
+                vectorized=True,
+                analytic=True,
+                cross_validate=True,
+                random_state=1,
+            )
+            info = sim.run()
+            test_info = info["conversion_ztest"]
+            self.assertTrue(test_info["analytic"])
+            self.assertAlmostEqual(test_info["alpha"], 0.05)
+            self.assertAlmostEqual(test_info["power"], test_info["simulation"]["power"], delta=0.04, msg=alternative)
+            self.assertNotIn("analytic", info["chi_square_test"], "Test without closed form should be simulated")
+
+    def test_sample_size_by_simulation(self):
+        sim = StatTestsSimulation(
+            count=100,
+            objects_num=1000,
+            stattests_list=self.tests,
+            experiments_num=4000,
+            alternative="two-sided",
+            treatment_sample_size=5000,
+            treatment_split_proportion=0.5,
+            mde=0.03,
+            random_state=1,
+        )
+        result = sim.estimate_sample_size_by_simulation("conversion_ztest", power=0.8)
+        sim.treatment_sample_size = result["treatment_sample_size"]
+        sim.control_sample_size = result["control_sample_size"]
+        power = _analytic_rejection_probability(*sim.analytic_conversion_ztest(0.03), 0.05, "two-sided")
+        self.assertAlmostEqual(power, 0.8, delta=0.03)
+
+        result = sim.estimate_sample_size_by_simulation("bayesian_test", power=0.8, max_experiments_num=1000)
+        low, high = result["treatment_sample_size_ci"]
+        self.assertLessEqual(low, result["treatment_sample_size"])
+        self.assertLessEqual(result["treatment_sample_size"], high)
+        self.assertGreater(result["experiments_num"], 200, "Experiments number should grow for noisy test")
+        self.assertLessEqual(result["experiments_num"], 1000)
+
+    def test_mde_by_simulation(self):
+        sim = StatTestsSimulation(
+            count=100,
+            objects_num=1000,
+            stattests_list=self.tests,
+            experiments_num=4000,
+            alternative="two-sided",
+            treatment_sample_size=2000,
+            treatment_split_proportion=0.5,
+            mde=0.01,
+            random_state=1,
+        )
+        result = sim.estimate_mde_by_simulation("conversion_ztest", power=0.8)
+        power = _analytic_rejection_probability(*sim.analytic_conversion_ztest(result["mde"]), 0.05, "two-sided")
+        self.assertAlmostEqual(power, 0.8, delta=0.03)
+        low, high = result["mde_ci"]
+        self.assertTrue(low <= result["mde"] <= high)
+
+        result = sim.estimate_mde_by_simulation("bayesian_test", power=0.8)
+        self.assertGreater(result["mde"], 0)
+
+    def test_power_surface(self):
+        sim = StatTestsSimulation(
+            count=100,
+            objects_num=1000,
+            stattests_list=self.tests,
+            experiments_num=2000,
+            alternative="two-sided",
+            treatment_sample_size=2000,
+            treatment_split_proportion=0.5,
+            mde=0.03,
+            random_state=1,
+        )
+        surface = sim.simulate_power_surface([0.01, 0.03], [500, 2000])
+        self.assertEqual(len(surface), 8)
+        ztest = surface[surface["test"] == "conversion_ztest"].set_index(["mde", "treatment_sample_size"])
+        for (mde, size), power in ztest["power"].items():
+            sim.treatment_sample_size, sim.control_sample_size = size, size
+            expected = _analytic_rejection_probability(*sim.analytic_conversion_ztest(mde), 0.05, "two-sided")
+            self.assertAlmostEqual(power, expected, delta=0.04, msg=f"mde={mde}, size={size}")
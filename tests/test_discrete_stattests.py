@@ -1,7 +1,10 @@
 import unittest
 
 import numpy as np
+from scipy import stats
+
 from abtoolkit.discrete.stattests import conversion_ztest, chi_square_test
+from abtoolkit.discrete.stattests import _chi_square_test_ndarray
 from abtoolkit.discrete.stattests import bayesian_test
 from abtoolkit.utils import generate_data
 
@@ -13,6 +16,15 @@ class TestStatTests(unittest.TestCase):
         p_value = conversion_ztest(control_sr.sum(), len(control_sr), test_sr.sum(), len(test_sr), "less")
         self.assertTrue(0 <= p_value <= 1, f"Wrong value for p-value: {p_value}")
 
+    def test_ztest_without_positives(self):
+        # Groups without positives show no difference, so test doesn't reject
+        with np.errstate(all="raise"):
+            self.assertEqual(conversion_ztest(0, 100, 0, 100, "two-sided"), 1)
+            self.assertEqual(conversion_ztest(100, 100, 100, 100, "less"), 0.5)
+            p_values = conversion_ztest(np.array([0, 5]), 100, np.array([0, 10]), 100, "two-sided")
+        self.assertEqual(p_values[0], 1)
+        self.assertTrue(0 < p_values[1] < 1)
+
     def test_chi_square(self):
         test_sr = generate_data(100, distribution_type="disc")
         control_sr = generate_data(100, distribution_type="disc")
@@ -54,3 +66,43 @@ class TestStatTests(unittest.TestCase):
             prior_negatives_count=10,
         )
         self.assertTrue(0 <= p_value <= 1, f"Wrong value for p-value: {p_value}")
+
+    def test_ztest_array(self):
+        control_count = np.random.binomial(300, 0.2, size=10)
+        treatment_count = np.random.binomial(100, 0.25, size=10)
+        p_values = conversion_ztest(control_count, 300, treatment_count, 100, "two-sided")
+        for i in range(len(control_count)):
+            self.assertAlmostEqual(
+                p_values[i], conversion_ztest(control_count[i], 300, treatment_count[i], 100, "two-sided")
+            )
+
+    def test_chi_square_ndarray(self):
+        control_count = np.random.binomial(300, 0.2, size=10)
+        treatment_count = np.random.binomial(100, 0.25, size=10)
+        p_values = _chi_square_test_ndarray(control_count, 300, treatment_count, 100)
+        for i in range(len(control_count)):
+            self.assertAlmostEqual(p_values[i], chi_square_test(control_count[i], 300, treatment_count[i], 100))
+            contingency_table = [
+                [control_count[i], 300 - control_count[i]],
+                [treatment_count[i], 100 - treatment_count[i]],
+            ]
+            self.assertAlmostEqual(p_values[i], stats.chi2_contingency(contingency_table, correction=True)[1])
+
+        p_values = _chi_square_test_ndarray(np.array([3, 50]), 100, np.array([40, 50]), 100)
+        self.assertTrue(np.isnan(p_values[0]), "Experiment with too few samples should give nan p-value")
+
+    def test_bayesian_test_fractional_prior(self):
+        probability = bayesian_test(3, 10, 4, 10, "greater", 1.5, 0.5)
+        probabilities = bayesian_test(np.array([3]), 10, np.array([4]), 10, "greater", 1.5, 0.5)
+        self.assertTrue(np.isclose(probability, probabilities[0], rtol=0, atol=1e-9), f"{probability}")
+        self.assertTrue(np.isclose(probability, 0.333, atol=1e-3), f"Wrong probability: {probability}")
+
+    def test_bayesian_test_array(self):
+        control_count = np.random.binomial(300, 0.2, size=10)
+        treatment_count = np.random.binomial(300, 0.25, size=(2, 10))
+        probabilities = bayesian_test(control_count, 300, treatment_count, 300, "greater")
+        self.assertTrue(probabilities.shape == (2, 10), f"Wrong shape of probabilities: {probabilities.shape}")
+        for i in range(2):
+            for j in range(10):
+                probability = bayesian_test(control_count[j], 300, treatment_count[i, j], 300, "greater")
+                self.assertTrue(np.isclose(probabilities[i, j], probability, rtol=0, atol=1e-9))
@@ -1,7 +1,12 @@
 import unittest
+
+import numpy as np
+from scipy import special
+
 from abtoolkit.discrete.utils import estimate_sample_size_by_mde
 from abtoolkit.discrete.utils import estimate_mde_by_sample_size
 from abtoolkit.discrete.utils import estimate_ci_binomial
+from abtoolkit.discrete.utils import compare_beta_distributions
 
 
 class TestSampleSizeEstimation(unittest.TestCase):
@@ -40,3 +45,41 @@ class TestSampleSizeEstimation(unittest.TestCase):
     def test_invalid_alternative_for_mde(self):
         with self.assertRaises(ValueError):
             estimate_mde_by_sample_size(0.07, 0.05, 0.8, 1136, alternative="invalid")
+
+    def test_compare_beta_distributions_quadrature_matches_exact(self):
+        for a1, b1, a2, b2 in [(5, 10, 7, 12), (30, 300, 25, 310), (1, 2000, 3, 2500), (200, 9000, 230, 9500)]:
+            exact = compare_beta_distributions(a1, b1, a2, b2)
+            quadrature = compare_beta_distributions(a1, b1, a2, b2, max_exact_terms=0)
+            self.assertTrue(np.isclose(exact, quadrature, rtol=0, atol=1e-9), f"{exact} != {quadrature}")
+
+    def test_compare_beta_distributions_fractional_parameters(self):
+        a1, b1, a2, b2 = 4.5, 7.5, 5.5, 6.5
+        probability = compare_beta_distributions(a1, b1, a2, b2)
+        array_probability = compare_beta_distributions(np.array([a1]), b1, a2, b2)[0]
+        rng = np.random.default_rng(0)
+        monte_carlo = np.mean(rng.beta(a2, b2, size=10**6) > rng.beta(a1, b1, size=10**6))
+        self.assertTrue(np.isclose(probability, array_probability, rtol=0, atol=1e-9))
+        self.assertTrue(np.isclose(probability, monte_carlo, rtol=0, atol=3e-3), f"{probability} != {monte_carlo}")
+
+    def test_compare_beta_distributions_parameters_less_than_one(self):
+        # Closed forms: P(Beta2 > Uniform) = E[Beta2], P(Beta2 > Beta(a, 1)) = E[Beta2^a] = B(a2 + a, b2) / B(a2, b2)
+        cases = [
+            ((0.5, 0.5, 0.5, 0.5), 0.5),
+            ((1, 1, 0.5, 3.5), 0.125),
+            ((0.5, 1, 0.5, 0.5), 2 / np.pi),
+            ((0.2, 1, 0.3, 0.1), special.beta(0.5, 0.1) / special.beta(0.3, 0.1)),
+        ]
+        for params, expected in cases:
+            probability = compare_beta_distributions(*params)
+            self.assertTrue(np.isclose(probability, expected, rtol=0, atol=1e-12), f"{params}: {probability}")
+
+        a1, b1 = np.array([0.5, 0.1, 4.5, 2]), np.array([0.5, 0.1, 7.5, 3])
+        a2, b2 = np.array([1.5, 0.2, 5.5, 0.5]), np.array([0.5, 0.05, 6.5, 0.7])
+        forward, backward = compare_beta_distributions(a1, b1, a2, b2), compare_beta_distributions(a2, b2, a1, b1)
+        np.testing.assert_allclose(forward + backward, 1, rtol=0, atol=1e-12)
+        for i in range(len(a1)):
+            self.assertAlmostEqual(forward[i], compare_beta_distributions(a1[i], b1[i], a2[i], b2[i]), places=12)
+
+    def test_compare_beta_distributions_large_counts(self):
+        probability = compare_beta_distributions(1001, 10**6, 1101, 10**6)
+        self.assertTrue(0.98 < probability < 0.99, f"Wrong probability: {probability}")
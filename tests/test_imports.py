@@ -0,0 +1,38 @@
+import subprocess
+import sys
+import unittest
+
+
+def _imported_modules(import_statement: str, modules: list) -> list:
+    """
+    Run import in fresh interpreter and return given modules which were loaded by it
+    """
+    code = f"import sys; {import_statement}; print(','.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+class TestImports(unittest.TestCase):
+    def test_lazy_imports(self):
+        self.assertEqual(
+            _imported_modules("import abtoolkit", ["matplotlib", "linearmodels", "tqdm"]),
+            [],
+            "Plotting, progress bars and linearmodels should load on first use",
+        )
+        self.assertEqual(
+            _imported_modules(
+                "import abtoolkit.utils, abtoolkit.continuous.simulation, abtoolkit.discrete.simulation",
+                ["matplotlib", "linearmodels", "tqdm"],
+            ),
+            [],
+            "Simulation modules shouldn't load plotting, progress bars and linearmodels on import",
+        )
+
+    def test_discrete_stattests_imports(self):
+        self.assertEqual(
+            _imported_modules(
+                "import abtoolkit.discrete.stattests", ["matplotlib", "linearmodels", "tqdm", "pandas", "scipy.stats"]
+            ),
+            [],
+            "Heavy modules shouldn't be imported by discrete stattests",
+        )
@@ -1,6 +1,9 @@
 import unittest
 import numpy as np
+from abtoolkit.utils import BaseSimulationClass
+from abtoolkit.utils import _pvalues_ecdf
 from abtoolkit.utils import check_clt
+from abtoolkit.variables import ValueCountsVariable
 
 
 class TestUtils(unittest.TestCase):
@@ -28,3 +31,53 @@ class TestUtils(unittest.TestCase):
         var = np.random.normal(0, 2, size=10000)
         p_value = check_clt(var, do_plot_distribution=False, metric_f=np.percentile, q=0.9)
         self.assertTrue(p_value >= 0, f"p-value: {p_value}")
+
+    def test_check_central_limit_theorem_value_counts(self):
+        var = ValueCountsVariable.from_array(np.random.poisson(3, size=10000))
+        p_value = check_clt(var, do_plot_distribution=False, sample_size=100, experiments_num=500)
+        self.assertTrue(p_value >= 0, f"p-value: {p_value}")
+
+    def test_check_central_limit_theorem_sample_sizes(self):
+        var = np.random.chisquare(df=2, size=10000)
+        p_values = check_clt(var, do_plot_distribution=False, sample_size=[10, 1000], random_state=1)
+        self.assertEqual(list(p_values), [10, 1000])
+        self.assertEqual(p_values[10], check_clt(var, do_plot_distribution=False, sample_size=10, random_state=1))
+
+    def test_pvalues_ecdf(self):
+        pvalues = np.random.uniform(size=1000)
+        x_axis, y_axis = _pvalues_ecdf(pvalues, points_num=100)
+        self.assertEqual(len(x_axis), 100)
+        np.testing.assert_allclose(y_axis, [np.mean(pvalues < x) for x in x_axis])
+
+        x_axis, y_axis = _pvalues_ecdf(pvalues)
+        self.assertEqual(len(x_axis), len(pvalues) + 2)
+        self.assertEqual((y_axis[0], y_axis[-1]), (0, 1))
+
+    def test_nested_simulation_requires_hooks(self):
+        sim = BaseSimulationClass(
+            alternative="two-sided",
+            stattests_list=["test"],
+            treatment_sample_size=100,
+            treatment_split_proportion=0.5,
+            experiments_num=10,
+            mde=1,
+        )
+        sim.stattests_batch_func_map = {"test": lambda mdes, experiments_num, samples=None: None}
+        with self.assertRaises(ValueError):
+            sim.estimate_sample_size_by_simulation("test")
+        with self.assertRaises(ValueError):
+            sim.simulate_power_surface([1], [100])
+
+    def test_skipped_experiments_are_not_counted(self):
+        sim = BaseSimulationClass(
+            alternative="two-sided",
+            stattests_list=["test"],
+            treatment_sample_size=100,
+            treatment_split_proportion=0.5,
+            experiments_num=4,
+            mde=1,
+        )
+        sim._save_test_info("test", np.array([0.01, 0.5, np.nan, np.nan]), np.array([0.01, 0.01, 0.5, np.nan]))
+        self.assertAlmostEqual(sim.info["test"]["alpha"], 0.5)
+        self.assertAlmostEqual(sim.info["test"]["power"], 2 / 3)
+        self.assertEqual((sim.info["test"]["aa_skipped"], sim.info["test"]["ab_skipped"]), (2, 1))
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from abtoolkit.continuous.stattests import cuped_ttest
+from abtoolkit.continuous.stattests import cuped_ttest_from_summary
+from abtoolkit.continuous.stattests import ttest
+from abtoolkit.continuous.stattests import ttest_from_summary
+from abtoolkit.variables import ValueCountsVariable
+from abtoolkit.variables import ZeroInflatedVariable
+
+
+class TestValueCountsVariable(unittest.TestCase):
+    def test_from_array(self):
+        raw = np.random.poisson(3, size=10000).astype(float)
+        variable = ValueCountsVariable.from_array(raw)
+
+        self.assertTrue(len(variable) == len(raw), f"Wrong size of variable: {len(variable)}")
+        self.assertTrue(np.isclose(variable.mean(), raw.mean()), "Wrong mean")
+        self.assertTrue(np.isclose(variable.var(), raw.var(ddof=1)), "Wrong variance")
+        self.assertTrue(np.array_equal(variable.to_numpy(), np.sort(raw)), "Wrong decompressed variable")
+
+    def test_sample(self):
+        variable = ValueCountsVariable(np.array([0, 1, 5]), np.array([700, 200, 100]))
+        sample = variable.sample((100, 1000), np.random.default_rng(0))
+
+        self.assertTrue(sample.shape == (100, 1000), f"Wrong sample shape: {sample.shape}")
+        for value, probability in zip(variable.values, variable.probabilities):
+            self.assertTrue(
+                np.isclose((sample == value).mean(), probability, atol=0.01),
+                f"Wrong frequency of value {value}",
+            )
+
+    def test_sample_moments(self):
+        variable = ValueCountsVariable(np.array([0, 1, 5]), np.array([700, 200, 100]))
+        mean, var = variable.sample_moments(500, 2000, np.random.default_rng(0))
+
+        self.assertTrue(np.isclose(mean.mean(), variable.mean(), atol=0.01), "Wrong mean of sample means")
+        self.assertTrue(np.isclose(var.mean(), variable.var(ddof=0), rtol=0.05), "Wrong mean of sample variances")
+
+    def test_wrong_counts(self):
+        with self.assertRaises(ValueError):
+            ValueCountsVariable(np.array([0, 1]), np.array([0, -1]))
+
+
+def generate_sparse(size: int, rng: np.random.Generator, nonzero_probability: float = 0.05) -> np.ndarray:
+    return np.where(rng.random(size) < nonzero_probability, rng.exponential(10, size=size), 0)
+
+
+class TestZeroInflatedVariable(unittest.TestCase):
+    def test_from_array(self):
+        rng = np.random.default_rng(0)
+        dense = generate_sparse(10000, rng)
+        covariant = generate_sparse(10000, rng)
+        variable = ZeroInflatedVariable.from_array(dense, covariant)
+
+        self.assertTrue(len(variable) == len(dense), f"Wrong size of variable: {len(variable)}")
+        self.assertTrue(len(variable.values) < len(dense) / 5, "Zero rows should not be stored")
+        self.assertTrue(np.isclose(variable.mean(), dense.mean()), "Wrong mean")
+        self.assertTrue(np.isclose(variable.var(), dense.var(ddof=1)), "Wrong variance")
+        self.assertTrue(np.isclose(variable.to_numpy().sum(), dense.sum()), "Wrong decompressed variable")
+
+    def test_summary_tests_match_dense_tests(self):
+        rng = np.random.default_rng(0)
+        control, control_covariant = generate_sparse(10000, rng), generate_sparse(10000, rng)
+        treatment, treatment_covariant = generate_sparse(12000, rng), generate_sparse(12000, rng)
+        control_summary = ZeroInflatedVariable.from_array(control, control_covariant).summary()
+        treatment_summary = ZeroInflatedVariable.from_array(treatment, treatment_covariant).summary()
+
+        self.assertTrue(
+            np.isclose(
+                ttest_from_summary(control_summary, treatment_summary, "two-sided"),
+                ttest(control, treatment, "two-sided"),
+            )
+        )
+        self.assertTrue(
+            np.isclose(
+                cuped_ttest_from_summary(control_summary, treatment_summary, "two-sided"),
+                cuped_ttest(control, control_covariant, treatment, treatment_covariant, "two-sided"),
+            )
+        )
+
+    def test_sample(self):
+        rng = np.random.default_rng(0)
+        variable = ZeroInflatedVariable.from_array(generate_sparse(10000, rng), generate_sparse(10000, rng))
+        values, covariant = variable.sample((100, 1000), np.random.default_rng(0))
+
+        self.assertTrue(values.shape == (100, 1000), f"Wrong sample shape: {values.shape}")
+        self.assertTrue(covariant.shape == (100, 1000), f"Wrong covariant sample shape: {covariant.shape}")
+        self.assertTrue(np.isclose(values.mean(), variable.mean(), rtol=0.05), "Wrong mean of samples")
+
+    def test_sample_moments(self):
+        rng = np.random.default_rng(0)
+        variable = ZeroInflatedVariable.from_array(generate_sparse(10000, rng), generate_sparse(10000, rng))
+        my, mx, vy, vx, cxy = variable.sample_covariant_moments(1000, 2000, np.random.default_rng(0))
+        summary = variable.summary()
+
+        self.assertTrue(np.isclose(my.mean(), summary.mean, rtol=0.01), "Wrong mean of sample means")
+        self.assertTrue(np.isclose(mx.mean(), summary.covariant_mean, rtol=0.01), "Wrong mean of covariant means")
+        self.assertTrue(np.isclose(vy.mean(), summary.variance, rtol=0.05), "Wrong mean of sample variances")